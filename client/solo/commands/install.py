@@ -606,7 +606,8 @@ Install or update packages or package files.
             # state.
             notif_acquired = notification_lock.try_acquire_shared()
 
-            for count, pkg_match in enumerate(run_queue, 1):
+            install_queue = []
+            for pkg_match in run_queue:
 
                 metaopts = {
                     'removeconfig': config_files,
@@ -622,36 +623,37 @@ Install or update packages or package files.
                     metaopts['install_source'] = \
                         etpConst['install_sources']['automatic_dependency']
 
-                package_id, repository_id = pkg_match
-                atom = entropy_client.open_repository(
-                    repository_id).retrieveAtom(package_id)
+                install_queue.append((pkg_match, metaopts))
 
-                pkg = None
-                try:
-                    pkg = action_factory.get(
-                        action_factory.INSTALL_ACTION,
-                        pkg_match, opts=metaopts)
+            pipeline = action_factory.install_pipeline(install_queue)
+            try:
+                for count, pkg in enumerate(pipeline, 1):
 
-                    xterm_header = "equo (%s) :: %d of %d ::" % (
-                        _("install"), count, total)
+                    try:
+                        atom = pkg.atom()
 
-                    pkg.set_xterm_header(xterm_header)
+                        xterm_header = "equo (%s) :: %d of %d ::" % (
+                            _("install"), count, total)
 
-                    entropy_client.output(
-                        purple(atom),
-                        count=(count, total),
-                        header=darkgreen(" +++ ") + ">>> ")
-
-                    exit_st = pkg.start()
-                    if exit_st != 0:
-                        if ugc_thread is not None:
-                            ugc_thread.join()
-                        return 1, True
-
-                finally:
-                    if pkg is not None:
+                        pkg.set_xterm_header(xterm_header)
+
+                        entropy_client.output(
+                            purple(atom),
+                            count=(count, total),
+                            header=darkgreen(" +++ ") + ">>> ")
+
+                        exit_st = pkg.start()
+                        if exit_st != 0:
+                            if ugc_thread is not None:
+                                ugc_thread.join()
+                            return 1, True
+
+                    finally:
                         pkg.finalize()
 
+            finally:
+                pipeline.close()
+
         finally:
             if notif_acquired:
                 notification_lock.release()
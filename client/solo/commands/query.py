@@ -13,10 +13,15 @@ import os
 import sys
 import re
 import argparse
+import bisect
+import collections
+import itertools
+import threading
 
 from entropy.const import etpConst, const_convert_to_unicode, \
     const_convert_to_rawstring
 from entropy.i18n import _, ngettext
+from entropy.misc import ParallelTask
 from entropy.output import darkgreen, darkred, blue, teal, purple, brown, \
     bold
 
@@ -37,6 +42,9 @@ class SoloQuery(SoloCommand):
     ALIASES = ["q"]
     ALLOW_UNPRIVILEGED = True
 
+    # number of threads walking the filesystem in "orphans"
+    ORPHANS_WORKERS = 4
+
     INTRODUCTION = """\
 Repository query tools.
 """
@@ -1046,6 +1054,164 @@ Repository query tools.
 
         return 0
 
+    def _orphans_owned_files(self, inst_repo, reverse_symlink_map):
+        """
+        Return a sorted tuple, without duplicates, of the file paths owned
+        by installed packages, including their reverse symlink and
+        resolved directory variants.
+        """
+        # files are sorted by path, so a per-directory cache
+        # avoids calling os.path.realpath() for each of them
+        realpath_cache = {}
+        owned_files = []
+
+        for path in inst_repo.listAllFilesIter():
+            # reverse sym
+            for sym_dir in reverse_symlink_map:
+                if path.startswith(sym_dir):
+                    for sym_child in reverse_symlink_map[sym_dir]:
+                        owned_files.append(sym_child + path[len(sym_dir):])
+
+            # real path also
+            dirname = os.path.dirname(path)
+            dirname_real = realpath_cache.get(dirname)
+            if dirname_real is None:
+                dirname_real = os.path.realpath(dirname)
+                realpath_cache[dirname] = dirname_real
+            if dirname_real != dirname:
+                owned_files.append(
+                    os.path.join(dirname_real, os.path.basename(path)))
+            owned_files.append(path)
+
+        owned_files.sort()
+        return tuple(x for x, _group in itertools.groupby(owned_files))
+
+    def _orphans_scan(self, entropy_client, directories, is_masked,
+                      owned_files, quiet):
+        """
+        Walk the given directories and return a tuple composed by the
+        number of analyzed files and the list of the ones not contained
+        in owned_files (as returned by _orphans_owned_files()).
+        Directory subtrees are walked in parallel and matched on the fly,
+        so that only orphaned files are kept in memory.
+        """
+        # nested directories would be walked twice
+        directories = sorted(set(os.path.normpath(x) for x in directories))
+        top_dirs = []
+        for xdir in directories:
+            if not any(xdir.startswith(x.rstrip(os.sep) + os.sep)
+                       for x in top_dirs):
+                top_dirs.append(xdir)
+
+        # (path, recursive) tuples, deque.popleft() is thread-safe
+        work = collections.deque()
+        for xdir in top_dirs:
+            # make sure it's bytes (raw encoding
+            # as per EntropyRepository.retrieveContent())
+            xdir = const_convert_to_rawstring(
+                    xdir,
+                    from_enctype=etpConst['conf_raw_encoding'])
+            try:
+                currentdir, subdirs, _files = next(os.walk(xdir))
+            except StopIteration:
+                # not a directory
+                continue
+            except RuntimeError: # maximum recursion?
+                continue
+            work.append((currentdir, False))
+            for subdir in subdirs:
+                path = os.path.join(currentdir, subdir)
+                # os.walk() does not follow them
+                if not os.path.islink(path):
+                    work.append((path, True))
+
+        progress = {
+            'count': 0,
+            'path': None,
+        }
+        progress_lock = threading.Lock()
+
+        def _walk():
+            count = 0
+            orphans = []
+            while True:
+                try:
+                    path, recursive = work.popleft()
+                except IndexError:
+                    break
+
+                try:
+                    for currentdir, subdirs, files in os.walk(path):
+                        dir_count = 0
+                        for filename in files:
+                            filename = os.path.join(currentdir, filename)
+
+                            # filter symlinks, broken ones will be reported
+                            if os.path.islink(filename) and \
+                                    os.path.lexists(filename):
+                                continue
+                            if is_masked(filename):
+                                continue
+
+                            dir_count += 1
+                            filename_utf = const_convert_to_unicode(filename)
+                            idx = bisect.bisect_left(owned_files, filename_utf)
+                            if idx < len(owned_files) and \
+                                    owned_files[idx] == filename_utf:
+                                continue
+                            orphans.append(filename_utf)
+
+                        count += dir_count
+                        with progress_lock:
+                            progress['count'] += dir_count
+                            progress['path'] = currentdir
+
+                        if not recursive:
+                            break
+                except RuntimeError: # maximum recursion?
+                    continue
+
+            return count, orphans
+
+        workers = []
+        for _idx in range(min(self.ORPHANS_WORKERS, len(work))):
+            worker = ParallelTask(_walk)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(0.5)
+                if quiet:
+                    continue
+
+                with progress_lock:
+                    count = progress['count']
+                    path = progress['path']
+                if path is None:
+                    continue
+                path_utf = const_convert_to_unicode(path)
+                if len(path_utf) > 50:
+                    path_utf = path_utf[:40] + \
+                        const_convert_to_unicode("...") + \
+                        path_utf[-10:]
+                entropy_client.output(
+                    "%s: %s, %s" % (
+                        blue(_("Analyzing")),
+                        bold(const_convert_to_unicode(count)),
+                        path_utf),
+                    header=darkred(" @@ "),
+                    back=True)
+
+        totalfiles = 0
+        file_data = []
+        for worker in workers:
+            count, orphans = worker.get_rc()
+            totalfiles += count
+            file_data.extend(orphans)
+        return totalfiles, file_data
+
     @sharedlock
     def _orphans(self, entropy_client, inst_repo):
         """
@@ -1072,69 +1238,35 @@ Repository query tools.
             reg_mask = re.compile(mask)
             system_dirs_mask_regexp.append(reg_mask)
 
-        file_data = set()
-        dirs = settings['system_dirs']
-        count = 0
-        for xdir in dirs:
-            # make sure it's bytes (raw encoding
-            # as per EntropyRepository.retrieveContent())
-            xdir = const_convert_to_rawstring(
-                    xdir,
-                    from_enctype=etpConst['conf_raw_encoding'])
-            try:
-                wd = os.walk(xdir)
-            except RuntimeError: # maximum recursion?
-                continue
-
-            for currentdir, subdirs, files in wd:
-                found_files = set()
-
-                for filename in files:
-                    filename = os.path.join(currentdir, filename)
-
-                    # filter symlinks, broken ones will be reported
-                    if os.path.islink(filename) and \
-                            os.path.lexists(filename):
-                        continue
-
-                    do_cont = False
-                    for mask in system_dirs_mask:
-                        if filename.startswith(mask):
-                            do_cont = True
-                            break
-                    if do_cont:
-                        continue
-
-                    for mask in system_dirs_mask_regexp:
-                        if mask.match(filename):
-                            do_cont = True
-                            break
+        def is_masked(filename):
+            for mask in system_dirs_mask:
+                if filename.startswith(mask):
+                    return True
+            for mask in system_dirs_mask_regexp:
+                if mask.match(filename):
+                    return True
+            return False
 
-                    if do_cont:
-                        continue
+        if not quiet:
+            entropy_client.output(
+                blue(_("Indexing files owned by installed packages")),
+                header=darkred(" @@ "),
+                back=True)
 
-                    count += 1
-                    filename_utf = const_convert_to_unicode(filename)
-                    if not quiet and ((count == 0) or (count % 500 == 0)):
-                        count = 0
-                        if len(filename_utf) > 50:
-                            fname = filename_utf[:40] + \
-                                const_convert_to_unicode("...") + \
-                                filename_utf[-10:]
-                        else:
-                            fname = filename_utf
-                        entropy_client.output(
-                            "%s: %s" % (
-                                blue(_("Analyzing")),
-                                fname),
-                            header=darkred(" @@ "),
-                            back=True)
-                    found_files.add(filename_utf)
+        owned_files = self._orphans_owned_files(
+            inst_repo, reverse_symlink_map)
 
-                if found_files:
-                    file_data |= found_files
+        if not quiet:
+            entropy_client.output(
+                "%s: %s" % (
+                    blue(_("Number of files owned by installed packages")),
+                    bold(const_convert_to_unicode(len(owned_files))),),
+                header=darkred(" @@ "))
 
-        totalfiles = len(file_data)
+        totalfiles, file_data = self._orphans_scan(
+            entropy_client, settings['system_dirs'], is_masked,
+            owned_files, quiet)
+        del owned_files
 
         if not quiet:
             entropy_client.output(
@@ -1152,47 +1284,6 @@ Repository query tools.
                     blue(_("Number of files collected on the filesystem")),
                     bold(const_convert_to_unicode(totalfiles)),),
                 header=darkred(" @@ "))
-            entropy_client.output(
-                "%s: %s" % (
-                    blue(_("Now searching among installed packages")),
-                    bold(const_convert_to_unicode(totalfiles)),),
-                header=darkred(" @@ "))
-
-
-        pkg_ids = inst_repo.listAllPackageIds()
-        length = str(len(pkg_ids))
-        count = 0
-
-        def gen_cont(pkg_id):
-            for path, ftype in inst_repo.retrieveContentIter(
-                pkg_id):
-                # reverse sym
-                for sym_dir in reverse_symlink_map:
-                    if path.startswith(sym_dir):
-                        for sym_child in reverse_symlink_map[sym_dir]:
-                            yield sym_child+path[len(sym_dir):]
-                # real path also
-                dirname_real = os.path.realpath(os.path.dirname(path))
-                yield os.path.join(dirname_real, os.path.basename(path))
-                yield path
-
-        for pkg_id in pkg_ids:
-
-            if not quiet:
-                count += 1
-                atom = inst_repo.retrieveAtom(pkg_id)
-                if atom is None:
-                    continue
-                entropy_client.output(
-                    "%s: %s" % (
-                        blue(_("Checking")),
-                        bold(atom),),
-                    header=darkred(" @@ "),
-                    count=(count, length),
-                    back=True)
-
-            # remove from file_data
-            file_data -= set(gen_cont(pkg_id))
 
         orphanedfiles = len(file_data)
         fname = "/tmp/entropy-orphans.txt"
@@ -1225,7 +1316,6 @@ Repository query tools.
                 header=darkred(" @@ "))
 
         sizecount = 0
-        file_data = list(file_data)
         file_data.sort(reverse = True)
 
         with open(fname, "wb") as f_out:
@@ -622,8 +622,8 @@ System security tools.
         with inst_repo.shared():
 
             affected_deps = set()
-            for advisory_id in sec.list():
-                affected_deps.update(sec.affected_id(advisory_id))
+            for advisory_deps in sec.affected_all().values():
+                affected_deps.update(advisory_deps)
 
             valid_matches = set()
             for atom in affected_deps:
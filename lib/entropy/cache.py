@@ -9,10 +9,10 @@
     B{Entropy Framework cache module}.
 
     This module contains the Entropy, asynchronous caching logic.
-    It is not meant to handle cache pollution management, because
-    this is either handled implicitly when cached items are pulled
-    in or by using entropy.dump or cache cleaners (see
-    entropy.client.interfaces.cache mixin methods)
+    Cached objects are stored through pluggable backends (see
+    EntropyCacheBackend): by default, each cache directory is backed by
+    a single SQLite file which is bounded in size, least recently used
+    objects are evicted when it grows too much.
 
 """
 import os
@@ -23,7 +23,7 @@ import tempfile
 
 from entropy.const import etpConst, const_debug_write, \
     const_debug_enabled, const_pid_exists, const_setup_perms, \
-    const_mkdtemp
+    const_setup_file, const_mkdtemp, const_convert_to_unicode
 from entropy.core import Singleton
 from entropy.misc import TimeScheduled, ParallelTask, Lifo
 import time
@@ -33,6 +33,396 @@ import copy
 import entropy.dump
 import entropy.tools
 
+
+class EntropyCacheBackend(object):
+
+    """
+    Base class for EntropyCacher storage backends. A backend instance
+    is bound to a cache directory and stores picklable objects by key.
+    Keys are "/" separated paths, like "atom_match/repo/abcdef".
+    Backends must be thread-safe.
+    """
+
+    def __init__(self, cache_dir):
+        """
+        EntropyCacheBackend constructor.
+
+        @param cache_dir: cache directory
+        @type cache_dir: string
+        """
+        object.__init__(self)
+        self._cache_dir = cache_dir
+
+    def store(self, items, ignore_exceptions = True):
+        """
+        Store a batch of objects.
+
+        @param items: list of (key, data) tuples
+        @type items: list
+        @keyword ignore_exceptions: if False, raise IOError if data
+            cannot be stored
+        @type ignore_exceptions: bool
+        @raise IOError: if data cannot be stored and ignore_exceptions
+            is False
+        """
+        raise NotImplementedError()
+
+    def load(self, key, aging_days = None):
+        """
+        Load an object.
+
+        @param key: cache data identifier
+        @type key: string
+        @keyword aging_days: if int, consider the cached object invalid
+            if older than aging_days.
+        @type aging_days: int
+        @return: the object or None
+        @rtype: Python object
+        """
+        raise NotImplementedError()
+
+    def clear(self, prefix):
+        """
+        Remove all the objects stored under given key prefix. If prefix
+        is an empty string, all the objects are removed.
+
+        @param prefix: key prefix, the "directory" part of a cache key
+        @type prefix: string
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Release any resource held by the backend. The backend can be
+        still used afterwards.
+        """
+
+
+class DumpCacheBackend(EntropyCacheBackend):
+
+    """
+    EntropyCacher storage backend writing each object to its own
+    pickle file through entropy.dump.
+    """
+
+    def store(self, items, ignore_exceptions = True):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        for key, data in items:
+            try:
+                entropy.dump.dumpobj(key, data, dump_dir = self._cache_dir,
+                    ignore_exceptions = ignore_exceptions)
+            except (EOFError, IOError, OSError) as err:
+                raise IOError("cannot store %s to %s. err: %s" % (
+                    key, self._cache_dir, repr(err)))
+
+    def load(self, key, aging_days = None):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        return entropy.dump.loadobj(key, dump_dir = self._cache_dir,
+            aging_days = aging_days)
+
+    def clear(self, prefix):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        dump_dir = os.path.join(self._cache_dir, prefix)
+        for currentdir, subdirs, files in os.walk(dump_dir):
+            path = os.path.join(dump_dir, currentdir)
+            for item in files:
+                if item.endswith(entropy.dump.D_EXT):
+                    item = os.path.join(path, item)
+                    try:
+                        os.remove(item)
+                    except (OSError, IOError,):
+                        pass
+            try:
+                if not os.listdir(path):
+                    os.rmdir(path)
+            except (OSError, IOError,):
+                pass
+
+
+class SQLiteCacheBackend(EntropyCacheBackend):
+
+    """
+    EntropyCacher storage backend keeping all the objects of a cache
+    directory inside a single SQLite database file, indexed by key.
+
+    Objects are written in batches, one transaction per batch. When the
+    stored data exceeds MAX_SIZE bytes, the least recently used objects
+    are evicted until the stored data is below EVICT_SIZE bytes.
+    Last access times are kept in RAM and written together with the
+    next batch, so that lookups never write to disk.
+    """
+
+    # Name of the database file inside the cache directory
+    DB_NAME = "entropy_cache.db"
+
+    # Evict objects when the stored data exceeds this amount of bytes
+    MAX_SIZE = 128 * 1024 * 1024
+
+    # ... until stored data goes below this amount of bytes
+    EVICT_SIZE = 96 * 1024 * 1024
+
+    # Seconds to wait for other processes to release the database lock
+    LOCK_TIMEOUT = 30.0
+
+    def __init__(self, cache_dir):
+        """
+        SQLiteCacheBackend constructor.
+
+        @param cache_dir: cache directory
+        @type cache_dir: string
+        """
+        EntropyCacheBackend.__init__(self, cache_dir)
+        self._db_path = os.path.join(cache_dir, self.DB_NAME)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._conn_pid = None
+        self._size = None
+        self._accessed = {}
+
+    def _connection(self):
+        """
+        Return the database connection, opening it if needed. The
+        connection is reopened in forked processes.
+        Must be called with self._lock held.
+
+        @raise sqlite3.Error: if the database cannot be opened
+        @raise OSError: if the cache directory cannot be created
+        """
+        pid = os.getpid()
+        if self._conn is not None and self._conn_pid == pid:
+            return self._conn
+        # the parent connection must not be used nor closed here
+        self._conn = None
+        self._size = None
+        self._accessed.clear()
+
+        import sqlite3
+
+        if not os.path.isdir(self._cache_dir):
+            try:
+                os.makedirs(self._cache_dir, 0o775)
+                const_setup_file(self._cache_dir, entropy.dump.E_GID, 0o775)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+
+        created = not os.path.isfile(self._db_path)
+        conn = sqlite3.connect(self._db_path, timeout = self.LOCK_TIMEOUT,
+            check_same_thread = False)
+        try:
+            # this is a cache, losing the last writes on power failure
+            # is fine.
+            conn.execute("PRAGMA synchronous = OFF")
+            # size comes before data, so that computing the total size
+            # does not need to read the objects.
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime REAL,
+                atime REAL,
+                data BLOB
+            )""")
+            conn.execute("""
+            CREATE INDEX IF NOT EXISTS cache_atime ON cache ( atime )
+            """)
+            conn.commit()
+        except sqlite3.Error:
+            conn.close()
+            raise
+
+        if created:
+            try:
+                const_setup_file(self._db_path, entropy.dump.E_GID, 0o664)
+            except (OSError, IOError):
+                pass
+
+        self._conn = conn
+        self._conn_pid = pid
+        return conn
+
+    def _evict(self, conn):
+        """
+        Evict least recently used objects if stored data exceeds MAX_SIZE.
+        Must be called with self._lock held, inside a transaction.
+        """
+        if self._size is None:
+            cur = conn.execute("SELECT SUM(size) FROM cache")
+            self._size = cur.fetchone()[0] or 0
+        if self._size <= self.MAX_SIZE:
+            return
+
+        # other processes write here too, get the real figure
+        cur = conn.execute("SELECT SUM(size) FROM cache")
+        self._size = cur.fetchone()[0] or 0
+        if self._size <= self.MAX_SIZE:
+            return
+
+        evicted = []
+        size = self._size
+        cur = conn.execute("SELECT key, size FROM cache ORDER BY atime")
+        for key, obj_size in cur:
+            if size <= self.EVICT_SIZE:
+                break
+            evicted.append((key,))
+            size -= obj_size
+
+        conn.executemany("DELETE FROM cache WHERE key = ?", evicted)
+        self._size = size
+
+        if const_debug_enabled():
+            const_debug_write(__name__,
+                "SQLiteCacheBackend: evicted %d objects from %s" % (
+                    len(evicted), self._db_path,))
+
+    def store(self, items, ignore_exceptions = True):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        import sqlite3
+
+        rows = []
+        cur_t = time.time()
+        for key, data in items:
+            try:
+                blob = entropy.dump.serialize_string(data)
+            except (RuntimeError, TypeError, AttributeError,
+                    entropy.dump.pickle.PicklingError) as err:
+                if ignore_exceptions:
+                    continue
+                raise IOError("cannot serialize %s. err: %s" % (
+                    key, repr(err)))
+            rows.append((const_convert_to_unicode(key), len(blob),
+                         cur_t, cur_t, sqlite3.Binary(blob)))
+
+        with self._lock:
+            try:
+                conn = self._connection()
+                accessed = [(atime, key) for key, atime in \
+                                self._accessed.items()]
+                self._accessed.clear()
+                with conn:
+                    conn.executemany("""
+                    INSERT OR REPLACE INTO cache
+                    (key, size, mtime, atime, data) VALUES (?, ?, ?, ?, ?)
+                    """, rows)
+                    if accessed:
+                        conn.executemany(
+                            "UPDATE cache SET atime = ? WHERE key = ?",
+                            accessed)
+                    if self._size is not None:
+                        # replaced objects make this an estimate,
+                        # _evict() recounts before evicting.
+                        self._size += sum([x[1] for x in rows])
+                    self._evict(conn)
+            except (sqlite3.Error, OSError, IOError) as err:
+                if ignore_exceptions:
+                    return
+                raise IOError("cannot store %d objects to %s. err: %s" % (
+                    len(rows), self._db_path, repr(err)))
+
+    def load(self, key, aging_days = None):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        import sqlite3
+
+        key = const_convert_to_unicode(key)
+        with self._lock:
+            if not os.path.isfile(self._db_path):
+                # avoid creating the database on lookups
+                return None
+            try:
+                conn = self._connection()
+                cur = conn.execute(
+                    "SELECT mtime, data FROM cache WHERE key = ?", (key,))
+                row = cur.fetchone()
+            except (sqlite3.Error, OSError, IOError):
+                return None
+            if row is None:
+                return None
+
+            mtime, blob = row
+            cur_t = time.time()
+            if aging_days is not None:
+                if abs(cur_t - mtime) > (aging_days * 86400):
+                    return None
+            self._accessed[key] = cur_t
+
+        try:
+            return entropy.dump.unserialize_string(bytes(blob))
+        except (ValueError, EOFError, IOError, OSError,
+                entropy.dump.pickle.UnpicklingError, TypeError,
+                AttributeError, ImportError, SystemError,):
+            return None
+
+    def clear(self, prefix):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        import sqlite3
+
+        prefix = const_convert_to_unicode(prefix)
+        if prefix and not prefix.endswith("/"):
+            prefix += "/"
+
+        with self._lock:
+            if not os.path.isfile(self._db_path):
+                return
+            try:
+                conn = self._connection()
+                with conn:
+                    if prefix:
+                        conn.execute(
+                            "DELETE FROM cache WHERE substr(key, 1, ?) = ?",
+                            (len(prefix), prefix,))
+                    else:
+                        conn.execute("DELETE FROM cache")
+                self._size = None
+                for key in list(self._accessed.keys()):
+                    if key.startswith(prefix):
+                        del self._accessed[key]
+            except (sqlite3.Error, OSError, IOError):
+                pass
+
+    def close(self):
+        """
+        Reimplemented from EntropyCacheBackend.
+        """
+        import sqlite3
+
+        with self._lock:
+            conn = self._conn
+            if conn is None:
+                return
+            pid_match = self._conn_pid == os.getpid()
+            self._conn = None
+            self._size = None
+            if not pid_match:
+                self._accessed.clear()
+                return
+
+            accessed = [(atime, key) for key, atime in \
+                            self._accessed.items()]
+            self._accessed.clear()
+            try:
+                if accessed and os.path.isfile(self._db_path):
+                    with conn:
+                        conn.executemany(
+                            "UPDATE cache SET atime = ? WHERE key = ?",
+                            accessed)
+            except sqlite3.Error:
+                pass
+            finally:
+                conn.close()
+
+
 class EntropyCacher(Singleton):
 
     # Max number of cache objects written at once
@@ -46,6 +436,10 @@ class EntropyCacher(Singleton):
     # yet able to write data to disk.
     STASHING_CACHE = True
 
+    # EntropyCacheBackend subclass used to store cache objects,
+    # one instance is created for each cache directory.
+    BACKEND = SQLiteCacheBackend
+
     """
     Entropy asynchronous and synchronous cache writer
     and reader. This class is a Singleton and contains
@@ -106,6 +500,8 @@ class EntropyCacher(Singleton):
         self.__stashing_cache = {}
         self.__inside_with_stmt = 0
         self.__dump_data_lock = threading.Lock()
+        self.__backends = {}
+        self.__backends_lock = threading.Lock()
         self.__worker_sem = threading.Semaphore(0)
         # this lock ensures that all the writes are hold while it's acquired
         self.__enter_context_lock = threading.RLock()
@@ -136,6 +532,25 @@ class EntropyCacher(Singleton):
         """
         return self.__copy.deepcopy(obj)
 
+    def __backend(self, cache_dir):
+        """
+        Return the EntropyCacheBackend instance bound to the given
+        cache directory.
+
+        @param cache_dir: cache directory
+        @type cache_dir: string
+        @return: the cache backend
+        @rtype: EntropyCacheBackend
+        """
+        backend = self.__backends.get(cache_dir)
+        if backend is None:
+            with self.__backends_lock:
+                backend = self.__backends.get(cache_dir)
+                if backend is None:
+                    backend = EntropyCacher.BACKEND(cache_dir)
+                    self.__backends[cache_dir] = backend
+        return backend
+
     def __cacher(self, run_until_empty = False, sync = False, _loop=False):
         """
         This is where the actual asynchronous copy takes
@@ -171,10 +586,13 @@ class EntropyCacher(Singleton):
                 pass
 
         def _commit_data(_massive_data):
+            # group by cache directory, so that each backend
+            # gets a single batch
+            batches = {}
             for (key, cache_dir), data in _massive_data:
-                d_o = entropy.dump.dumpobj
-                if d_o is not None:
-                    d_o(key, data, dump_dir = cache_dir)
+                batches.setdefault(cache_dir, []).append((key, data))
+            for cache_dir, items in batches.items():
+                self.__backend(cache_dir).store(items)
 
         while self.__alive or run_until_empty:
 
@@ -287,6 +705,7 @@ class EntropyCacher(Singleton):
             self.__cache_writer.join()
             self.__cache_writer = None
         self.sync()
+        self.close()
 
     def sync(self):
         """
@@ -306,6 +725,20 @@ class EntropyCacher(Singleton):
         self.__cache_buffer.clear()
         self.__stashing_cache.clear()
 
+    def close(self):
+        """
+        Release the resources held by the cache backends, like open
+        files. Backends are reopened on demand, so this method must be
+        called before removing the cache directories from disk.
+
+        @return: None
+        """
+        with self.__backends_lock:
+            backends = list(self.__backends.values())
+            self.__backends.clear()
+        for backend in backends:
+            backend.close()
+
     def save(self, key, data, cache_dir = None):
         """
         Save data object to cache asynchronously and in any case.
@@ -321,13 +754,9 @@ class EntropyCacher(Singleton):
         """
         if cache_dir is None:
             cache_dir = self.current_directory()
-        try:
-            with self.__dump_data_lock:
-                entropy.dump.dumpobj(key, data, dump_dir = cache_dir,
-                    ignore_exceptions = False)
-        except (EOFError, IOError, OSError) as err:
-            raise IOError("cannot store %s to %s. err: %s" % (
-                key, cache_dir, repr(err)))
+        with self.__dump_data_lock:
+            self.__backend(cache_dir).store([(key, data)],
+                ignore_exceptions = False)
 
     def push(self, key, data, async = True, cache_dir = None):
         """
@@ -373,7 +802,7 @@ class EntropyCacher(Singleton):
             #        "EntropyCacher.push, sync push %s, into %s" % (
             #            key, cache_dir,))
             with self.__dump_data_lock:
-                entropy.dump.dumpobj(key, data, dump_dir = cache_dir)
+                self.__backend(cache_dir).store([(key, data)])
 
     def pop(self, key, cache_dir = None, aging_days = None):
         """
@@ -385,6 +814,9 @@ class EntropyCacher(Singleton):
         @type key: string
         @keyword cache_dir: alternative cache directory
         @type cache_dir: string
+        @keyword aging_days: if int, consider the cached object invalid
+            if older than aging_days.
+        @type aging_days: int
         @rtype: Python object
         @return: object stored into the stack or None (if stack is empty)
         """
@@ -397,15 +829,18 @@ class EntropyCacher(Singleton):
             if ram_obj is not None:
                 return ram_obj
 
-        l_o = entropy.dump.loadobj
-        if not l_o:
+        try:
+            backend = self.__backend(cache_dir)
+        except AttributeError:
+            # interpreter shutdown
             return
-        return l_o(key, dump_dir = cache_dir, aging_days = aging_days)
+        return backend.load(key, aging_days = aging_days)
 
     @classmethod
     def clear_cache_item(cls, cache_item, cache_dir = None):
         """
-        Clear Entropy Cache item from on-disk cache.
+        Clear Entropy Cache item from on-disk cache. All the objects
+        sharing the same key "directory" of cache_item are removed.
 
         @param cache_item: Entropy Cache item identifier
         @type cache_item: string
@@ -414,23 +849,8 @@ class EntropyCacher(Singleton):
         """
         if cache_dir is None:
             cache_dir = cls.current_directory()
-        dump_path = os.path.join(cache_dir, cache_item)
-
-        dump_dir = os.path.dirname(dump_path)
-        for currentdir, subdirs, files in os.walk(dump_dir):
-            path = os.path.join(dump_dir, currentdir)
-            for item in files:
-                if item.endswith(entropy.dump.D_EXT):
-                    item = os.path.join(path, item)
-                    try:
-                        os.remove(item)
-                    except (OSError, IOError,):
-                        pass
-            try:
-                if not os.listdir(path):
-                    os.rmdir(path)
-            except (OSError, IOError,):
-                pass
+        cacher = cls()
+        cacher.__backend(cache_dir).clear(os.path.dirname(cache_item))
 
 
 class MtimePingus(object):
@@ -423,6 +423,7 @@ class Client(Singleton, TextInterface, CalculatorsMixin,
                     repo.clearCache()
 
             cache_dir = self._cacher.current_directory()
+            self._cacher.close()
             try:
                 shutil.rmtree(cache_dir, True)
             except (shutil.Error, IOError, OSError):
@@ -32,6 +32,7 @@ from entropy.exceptions import RepositoryError, SystemDatabaseError, \
 from entropy.security import Repository as RepositorySecurity
 from entropy.misc import TimeScheduled, ParallelTask
 from entropy.fetchers import UrlFetcher
+from entropy.client.mirrors import MirrorScores
 from entropy.i18n import _
 from entropy.db.skel import EntropyRepositoryPlugin, EntropyRepositoryBase
 from entropy.db.exceptions import IntegrityError, OperationalError, Error, \
@@ -41,6 +42,7 @@ from entropy.services.client import WebService
 from entropy.client.services.interfaces import RepositoryWebService, \
     RepositoryWebServiceFactory
 
+import entropy.db.delta
 import entropy.dep
 import entropy.tools
 
@@ -174,6 +176,7 @@ class AvailablePackagesRepositoryUpdater(object):
         self._supported_download_items = (
             "db", "dbck", "dblight", "ck", "cklight", "compck",
             "lock", "dbdump", "dbdumplight", "dbdumplightck", "dbdumpck",
+            "dbdumplightplain", "dbdumplightdelta",
             "meta_file", "meta_file_gpg", "notice_board"
         )
         self._developer_repo = \
@@ -394,7 +397,10 @@ class AvailablePackagesRepositoryUpdater(object):
         repos_data = self._settings['repositories']
         avail_data = repos_data['available']
         repo_data = avail_data[self._repository_id]
-        database_uris = repo_data['databases']
+        # prefer the mirrors that performed better in the past
+        mirror_scores = MirrorScores()
+        database_uris = mirror_scores.sort(
+            repo_data['databases'], key = lambda x: x['uri'])
 
         ws_revision = self._remote_webservice_revision()
 
@@ -459,7 +465,7 @@ class AvailablePackagesRepositoryUpdater(object):
             importance = 1, level = "warning", header = "\t",
         )
 
-        package_uris = repo_data['plain_packages']
+        package_uris = mirror_scores.sort(repo_data['plain_packages'])
         default_cformat = etpConst['etpdatabasefileformat']
         for package_uri in package_uris:
             self._entropy.output(
@@ -644,6 +650,125 @@ class AvailablePackagesRepositoryUpdater(object):
 
         return down_status, sig_status, downloaded_item
 
+    def __database_delta_download(self, uri):
+        """
+        Rebuild the EAPI2 repository dump from the local copy of the
+        previous one (the delta basis), only fetching the changed chunks
+        from the mirror. See entropy.db.delta.
+
+        @return: tuple composed by whether the mirror publishes the delta
+            index and the list of downloaded files, the latter is None if
+            the delta update was not possible and the full dump must be
+            downloaded
+        @rtype: tuple
+        """
+        down_item = "dbdumplightdelta"
+        if not self._download_item(uri, down_item, disallow_redirect = True):
+            const_debug_write(__name__,
+                "__database_delta_download: delta index not available")
+            return False, None
+        sig_status = self._download_item(uri, down_item,
+            disallow_redirect = True, get_signature = True)
+        garbage, index_path = self._construct_paths(uri, down_item, None)
+
+        repo_data = self._settings['repositories']['available'][
+            self._repository_id]
+        basis_path = os.path.join(repo_data['dbpath'],
+            etpConst['etpdatabasedumplightbasis'])
+        if not const_file_readable(basis_path):
+            const_debug_write(__name__,
+                "__database_delta_download: no delta basis")
+            return True, None
+
+        mytxt = "%s ..." % (red(_("Computing repository delta")),)
+        self._entropy.output(
+            mytxt,
+            importance = 1,
+            level = "info",
+            header = "\t"
+        )
+        try:
+            index = entropy.db.delta.read_index(index_path)
+            basis_index = entropy.db.delta.build_index(basis_path)
+        except (ValueError, IOError, OSError) as err:
+            const_debug_write(__name__,
+                "__database_delta_download: error: %s" % (repr(err),))
+            return True, None
+
+        ranges = entropy.db.delta.missing_ranges(index, basis_index)
+        fetch_size = sum(x[1] for x in ranges)
+        # changed chunks are sent uncompressed, the compressed dump
+        # is cheaper if they weigh more.
+        if fetch_size >= index['compressed_size']:
+            const_debug_write(__name__,
+                "__database_delta_download: delta too big: %s/%s" % (
+                    fetch_size, index['compressed_size'],))
+            return True, None
+
+        dump_url, dump_path = self._construct_paths(
+            uri, "dbdumplightplain", None)
+        ranges_path = None
+        try:
+            if ranges:
+                ranges_path = dump_path + ".delta_ranges"
+                fetcher = self._entropy._url_fetcher(
+                    dump_url, ranges_path, resume = False,
+                    disallow_redirect = True)
+                rc = fetcher.download_ranges(ranges)
+                if rc in self.FETCH_ERRORS:
+                    return True, None
+
+            status = entropy.db.delta.reconstruct(
+                index, basis_path, basis_index, ranges_path, dump_path)
+        finally:
+            if ranges_path is not None:
+                try:
+                    os.remove(ranges_path)
+                except OSError as err:
+                    if err.errno != errno.ENOENT:
+                        raise
+
+        if not status:
+            mytxt = "%s: %s" % (
+                red(_("Repository delta")),
+                darkred(_("checksum mismatch, downloading the whole file")),
+            )
+            self._entropy.output(
+                mytxt,
+                importance = 1,
+                level = "warning",
+                header = "\t"
+            )
+            try:
+                os.remove(dump_path)
+            except OSError as err:
+                if err.errno != errno.ENOENT:
+                    raise
+            return True, None
+
+        const_setup_file(dump_path, etpConst['entropygid'], 0o644,
+            uid = etpConst['uid'])
+
+        mytxt = "%s: %s %s, %s %s" % (
+            red(_("Repository delta")),
+            bold(entropy.tools.bytes_into_human(fetch_size)),
+            darkgreen(_("downloaded")),
+            bold(entropy.tools.bytes_into_human(index['size'] - fetch_size)),
+            darkgreen(_("reused")),
+        )
+        self._entropy.output(
+            mytxt,
+            importance = 1,
+            level = "info",
+            header = "\t"
+        )
+
+        downloaded_files = [index_path]
+        if sig_status:
+            downloaded_files.append(
+                self.__append_gpg_signature_to_path(index_path))
+        return True, downloaded_files
+
     def __database_checksum_download(self, uri, cmethod):
 
         downitem = 'cklight'
@@ -955,6 +1080,14 @@ class AvailablePackagesRepositoryUpdater(object):
                 "%s/%s" % (uri, ec_cm6,),
                 "%s/%s" % (repo_dbpath, ec_cm6,),
             ),
+            'dbdumplightplain': (
+                "%s/%s" % (uri, etpConst['etpdatabasedumplight'],),
+                "%s/%s" % (repo_dbpath, etpConst['etpdatabasedumplight'],),
+            ),
+            'dbdumplightdelta': (
+                "%s/%s" % (uri, etpConst['etpdatabasedumplightdelta'],),
+                "%s/%s" % (repo_dbpath, etpConst['etpdatabasedumplightdelta'],),
+            ),
             'lock': (
                 "%s/%s" % (uri, repo_lock_file,),
                 "%s/%s" % (repo_dbpath, repo_lock_file,),
@@ -1813,8 +1946,9 @@ class AvailablePackagesRepositoryUpdater(object):
 
         # now that we have all stored, add
         for package_id in added_ids:
-            mydata = self._cacher.pop("%s%s" % (self.WEBSERV_CACHE_ID,
-                package_id,))
+            # segments are stored through dumpobj(), not EntropyCacher,
+            # which could evict them before they are read back
+            mydata = loadobj("%s%s" % (self.WEBSERV_CACHE_ID, package_id,))
             if mydata is None:
                 mytxt = "%s: %s" % (
                     blue(_("Fetch error on segment while adding")),
@@ -2046,11 +2180,19 @@ class AvailablePackagesRepositoryUpdater(object):
         cmethod = etpConst['etpdatabasecompressclasses'].get(
             cformat)
 
+        delta_available = False
+        delta_files = None
         while True:
 
             downloaded_db_item = None
             sig_down_status = False
             db_checksum_down_status = False
+            if self._repo_eapi == 2 and self._differential_update:
+                delta_available, delta_files = \
+                    self.__database_delta_download(uri)
+                if delta_files is not None:
+                    break
+
             if self._repo_eapi < 3:
 
                 down_status, sig_down_status, downloaded_db_item = \
@@ -2086,6 +2228,8 @@ class AvailablePackagesRepositoryUpdater(object):
                 break
 
         downloaded_files = self._standard_items_download(uri)
+        if delta_files is not None:
+            downloaded_files.extend(delta_files)
         # also add db file to downloaded item
         # and md5 check repository
         if downloaded_db_item is not None:
@@ -2133,17 +2277,19 @@ class AvailablePackagesRepositoryUpdater(object):
                         __name__, "rename failed: %s" % (err,))
                     do_db_update_transfer = False
 
-            unpack_status, unpacked_item = \
-                self._downloaded_database_unpack(uri, cmethod)
+            if delta_files is None:
+                unpack_status, unpacked_item = \
+                    self._downloaded_database_unpack(uri, cmethod)
 
-            if not unpack_status:
-                # delete all
-                self.__remove_repository_files()
-                return EntropyRepositoryBase.REPOSITORY_GENERIC_ERROR
+                if not unpack_status:
+                    # delete all
+                    self.__remove_repository_files()
+                    return EntropyRepositoryBase.REPOSITORY_GENERIC_ERROR
 
-            unpack_url, unpack_path = self._construct_paths(
-                uri, unpacked_item, cmethod)
-            files_to_remove.append(unpack_path)
+                unpack_url, unpack_path = self._construct_paths(
+                    uri, unpacked_item, cmethod)
+                files_to_remove.append(unpack_path)
+            # otherwise, the dump has been already rebuilt in place
 
             # re-validate
             if not os.path.isfile(dbfile):
@@ -2161,8 +2307,17 @@ class AvailablePackagesRepositoryUpdater(object):
                 self.__eapi1_eapi2_databases_alignment(dbfile, dbfile_old)
 
             if self._repo_eapi == 2:
-                # remove the dump
-                files_to_remove.append(dumpfile)
+                basis_path = os.path.join(repo_data['dbpath'],
+                    etpConst['etpdatabasedumplightbasis'])
+                if rc == 0 and delta_available:
+                    # keep the dump, basis of the next delta update
+                    os.rename(dumpfile, basis_path)
+                else:
+                    # remove the dump, and the basis if the mirror
+                    # stopped publishing delta indexes
+                    files_to_remove.append(dumpfile)
+                    if rc == 0:
+                        files_to_remove.append(basis_path)
 
         if rc != 0:
             # delete all
@@ -2237,6 +2392,7 @@ class MaskableRepository(EntropyRepositoryBase):
 
     _real_client_settings = None
     _real_client_settings_lock = threading.Lock()
+    _mask_filter_lock = threading.Lock()
 
     def __init__(self, *args, **kwargs):
         super(MaskableRepository, self).__init__(*args, **kwargs)
@@ -2263,25 +2419,15 @@ class MaskableRepository(EntropyRepositoryBase):
         from entropy.client.interfaces import Client
         return Client()._settings_client_plugin
 
-    def _mask_filter_fetch_cache(self, package_id):
-        if self._caching:
-            return loadobj(
-                "MaskableRepositoryFilter/%s_%s/%s" % (
-                    self.name,
-                    self.atomMatchCacheKey(),
-                    package_id,
-                    )
-                )
-
-    def _mask_filter_store_cache(self, package_id, value):
-        if self._caching:
-            dumpobj(
-                "MaskableRepositoryFilter/%s_%s/%s" % (
-                    self.name,
-                    self.atomMatchCacheKey(),
-                    package_id,
-                    ),
-                value)
+    def _mask_filter_cache_key(self):
+        """
+        Return the on-disk cache key of the package mask status map.
+        """
+        return "MaskableRepositoryFilter/%s_%s_%s" % (
+            self.name,
+            self.atomMatchCacheKey(),
+            self.checksum(strict = False),
+            )
 
     def _maskFilter_live(self, package_id):
 
@@ -2297,8 +2443,10 @@ class MaskableRepository(EntropyRepositoryBase):
 
             return package_id, ref['user_live_unmask']
 
-    def _maskFilter_user_package_mask(self, package_id, live):
-
+    def _maskFilter_user_package_mask_ids(self):
+        """
+        Return the set of package identifiers masked by the user.
+        """
         with self._settings['mask']:
             # thread-safe in here
             cache_obj = self._settings['mask'].get()
@@ -2325,22 +2473,19 @@ class MaskableRepository(EntropyRepositoryBase):
 
             cache_obj[self.name] = user_package_mask_ids
 
-        if package_id in user_package_mask_ids:
-            # sorry, masked
-            ref = self._settings['pkg_masking_reference']
-            myr = ref['user_package_mask']
-
-            try:
-                clset = self._client_settings
-                validator_cache = clset['masking_validation']['cache']
-                validator_cache[(package_id, self.name, live)] = -1, myr
-            except KeyError: # system settings client plugin not found
-                pass
+        return user_package_mask_ids
 
-            return -1, myr
+    def _maskFilter_user_package_mask(self, package_id):
 
-    def _maskFilter_user_package_unmask(self, package_id, live):
+        if package_id in self._maskFilter_user_package_mask_ids():
+            # sorry, masked
+            ref = self._settings['pkg_masking_reference']
+            return -1, ref['user_package_mask']
 
+    def _maskFilter_user_package_unmask_ids(self):
+        """
+        Return the set of package identifiers unmasked by the user.
+        """
         with self._settings['unmask']:
             # thread-safe in here
             cache_obj = self._settings['unmask'].get()
@@ -2366,22 +2511,19 @@ class MaskableRepository(EntropyRepositoryBase):
 
             cache_obj[self.name] = user_package_unmask_ids
 
-        if package_id in user_package_unmask_ids:
+        return user_package_unmask_ids
 
-            ref = self._settings['pkg_masking_reference']
-            myr = ref['user_package_unmask']
-            try:
-                clset = self._client_settings
-                validator_cache = clset['masking_validation']['cache']
-                validator_cache[(package_id, self.name, live)] = \
-                    package_id, myr
-            except KeyError: # system settings client plugin not found
-                pass
+    def _maskFilter_user_package_unmask(self, package_id):
 
-            return package_id, myr
-
-    def _maskFilter_packages_db_mask(self, package_id, live):
+        if package_id in self._maskFilter_user_package_unmask_ids():
+            ref = self._settings['pkg_masking_reference']
+            return package_id, ref['user_package_unmask']
 
+    def _maskFilter_packages_db_mask_ids(self):
+        """
+        Return the set of package identifiers masked by the repository
+        packages.db.mask file.
+        """
         # check if repository packages.db.mask needs it masked
         repos_mask = {}
         clset = self._client_settings
@@ -2389,67 +2531,51 @@ class MaskableRepository(EntropyRepositoryBase):
             repos_mask = clset['repositories']['mask']
 
         repomask = repos_mask.get(self.name)
-        if isinstance(repomask, (list, set, frozenset)):
+        if not isinstance(repomask, (list, set, frozenset)):
+            return set()
 
-            # first, seek into generic masking, all branches
-            # (below) avoid issues with repository names
-            mask_repo_id = "%s_ids@@:of:%s" % (self.name, self.name,)
-            repomask_ids = repos_mask.get(mask_repo_id)
+        # first, seek into generic masking, all branches
+        # (below) avoid issues with repository names
+        mask_repo_id = "%s_ids@@:of:%s" % (self.name, self.name,)
+        repomask_ids = repos_mask.get(mask_repo_id)
 
-            if not isinstance(repomask_ids, set):
-                repomask_ids = set()
-                for atom in repomask:
-                    matches, r = self.atomMatch(atom, multiMatch = True,
-                        maskFilter = False)
-                    if r != 0:
-                        continue
-                    repomask_ids |= set(matches)
-                repos_mask[mask_repo_id] = repomask_ids
-
-            if package_id in repomask_ids:
+        if not isinstance(repomask_ids, set):
+            repomask_ids = set()
+            for atom in repomask:
+                matches, r = self.atomMatch(atom, multiMatch = True,
+                    maskFilter = False)
+                if r != 0:
+                    continue
+                repomask_ids |= set(matches)
+            repos_mask[mask_repo_id] = repomask_ids
 
-                ref = self._settings['pkg_masking_reference']
-                myr = ref['repository_packages_db_mask']
+        return repomask_ids
 
-                try:
-                    validator_cache = clset['masking_validation']['cache']
-                    validator_cache[(package_id, self.name, live)] = \
-                        -1, myr
-                except KeyError: # system settings client plugin not found
-                    pass
+    def _maskFilter_packages_db_mask(self, package_id):
 
-                return -1, myr
+        if package_id in self._maskFilter_packages_db_mask_ids():
+            ref = self._settings['pkg_masking_reference']
+            return -1, ref['repository_packages_db_mask']
 
-    def _maskFilter_package_license_mask(self, package_id, live):
+    def _maskFilter_package_license_mask(self, package_id, mylicenses):
 
-        if not self._settings['license_mask']:
+        lic_mask = self._settings['license_mask']
+        if not lic_mask:
             return
 
-        mylicenses = self.retrieveLicense(package_id)
-        mylicenses = mylicenses.strip().split()
-        lic_mask = self._settings['license_mask']
-        for mylicense in mylicenses:
+        for mylicense in mylicenses.strip().split():
 
             if mylicense not in lic_mask:
                 continue
 
             ref = self._settings['pkg_masking_reference']
-            myr = ref['user_license_mask']
-            try:
-                clset = self._client_settings
-                validator_cache = clset['masking_validation']['cache']
-                validator_cache[(package_id, self.name, live)] = -1, myr
-            except KeyError: # system settings client plugin not found
-                pass
-
-            return -1, myr
+            return -1, ref['user_license_mask']
 
-    def _maskFilter_keyword_mask(self, package_id, live):
+    def _maskFilter_keyword_mask(self, package_id, mykeywords):
 
         # WORKAROUND for buggy entries
         # ** is fine then
         # TODO: remove this before 31-12-2011
-        mykeywords = self.retrieveKeywords(package_id)
         if mykeywords == set([""]):
             mykeywords = set(['**'])
 
@@ -2459,17 +2585,7 @@ class MaskableRepository(EntropyRepositoryBase):
         # (universal keywords have been merged from package.keywords)
         same_keywords = etpConst['keywords'] & mykeywords
         if same_keywords:
-            myr = mask_ref['system_keyword']
-            try:
-                clset = self._client_settings
-                validator_cache = clset['masking_validation']['cache']
-                validator_cache[(package_id, self.name, live)] = \
-                    package_id, myr
-
-            except KeyError: # system settings client plugin not found
-                pass
-
-            return package_id, myr
+            return package_id, mask_ref['system_keyword']
 
         # if we get here, it means we didn't find mykeywords
         # in etpConst['keywords']
@@ -2488,16 +2604,7 @@ class MaskableRepository(EntropyRepositoryBase):
 
             if "*" in keyword_data:
                 # all packages in this repo with keyword "keyword" are ok
-                myr = mask_ref['user_repo_package_keywords_all']
-                try:
-                    clset = self._client_settings
-                    validator_cache = clset['masking_validation']['cache']
-                    validator_cache[(package_id, self.name, live)] = \
-                        package_id, myr
-                except KeyError: # system settings client plugin not found
-                    pass
-
-                return package_id, myr
+                return package_id, mask_ref['user_repo_package_keywords_all']
 
             kwd_key = "%s_ids" % (keyword,)
             keyword_data_ids = keyword_repo[self.name].get(kwd_key)
@@ -2514,22 +2621,13 @@ class MaskableRepository(EntropyRepositoryBase):
                 keyword_repo[self.name][kwd_key] = keyword_data_ids
 
             if package_id in keyword_data_ids:
-
-                myr = mask_ref['user_repo_package_keywords']
-                try:
-                    clset = self._client_settings
-                    validator_cache = clset['masking_validation']['cache']
-                    validator_cache[(package_id, self.name, live)] = \
-                        package_id, myr
-                except KeyError: # system settings client plugin not found
-                    pass
-                return package_id, myr
+                return package_id, mask_ref['user_repo_package_keywords']
 
         keyword_pkg = self._settings['keywords']['packages']
 
         # if we get here, it means we didn't find a match in repositories
         # so we scan packages, last chance
-        for keyword in keyword_pkg.keys():
+        for keyword in list(keyword_pkg.keys()):
             # use .keys() because keyword_pkg gets modified during iteration
 
             # first of all check if keyword is in mykeywords
@@ -2556,18 +2654,8 @@ class MaskableRepository(EntropyRepositoryBase):
                 keyword_pkg[self.name+kwd_key] = keyword_data_ids
 
             if package_id in keyword_data_ids:
-
                 # valid!
-                myr = mask_ref['user_package_keywords']
-                try:
-                    clset = self._client_settings
-                    validator_cache = clset['masking_validation']['cache']
-                    validator_cache[(package_id, self.name, live)] = \
-                        package_id, myr
-                except KeyError: # system settings client plugin not found
-                    pass
-
-                return package_id, myr
+                return package_id, mask_ref['user_package_keywords']
 
 
         ## if we get here, it means that pkg it keyword masked
@@ -2591,11 +2679,7 @@ class MaskableRepository(EntropyRepositoryBase):
         same_keywords = repo_keywords.get('universal') & mykeywords
         if same_keywords:
             # universal keyword matches!
-            myr = mask_ref['repository_packages_db_keywords']
-            validator_cache = clset['masking_validation']['cache']
-            validator_cache[(package_id, self.name, live)] = \
-                package_id, myr
-            return package_id, myr
+            return package_id, mask_ref['repository_packages_db_keywords']
 
         ## if we get here, it means that even universal masking failed
         ## and we need to look at per-package settings
@@ -2628,68 +2712,138 @@ class MaskableRepository(EntropyRepositoryBase):
             same_keywords = pkg_keywords & etpConst['keywords']
         if same_keywords:
             # found! this pkg is not masked, yay!
-            myr = mask_ref['repository_packages_db_keywords']
-            validator_cache = clset['masking_validation']['cache']
-            validator_cache[(package_id, self.name, live)] = \
-                package_id, myr
-            return package_id, myr
+            return package_id, mask_ref['repository_packages_db_keywords']
 
-    def maskFilter(self, package_id, live = True):
+    def _maskFilter_package(self, package_id, mylicenses, mykeywords):
         """
-        Reimplemented from EntropyRepositoryBase
+        Compute the mask status of a single package, live masking
+        excluded.
         """
-        validator_cache = self._client_settings.get(
-            'masking_validation', {}).get('cache', {})
-
-        cached = validator_cache.get((package_id, self.name, live))
-        if cached is not None:
-            return cached
-
-        # use on-disk cache?
-        cached = self._mask_filter_fetch_cache(package_id)
-        if cached is not None:
-            return cached
-
-        # avoid memleaks
-        if len(validator_cache) > 100000:
-            validator_cache.clear()
-
-        if live:
-            data = self._maskFilter_live(package_id)
-            if data:
-                return data
-
-        data = self._maskFilter_user_package_mask(package_id, live)
+        data = self._maskFilter_user_package_mask(package_id)
         if data:
-            self._mask_filter_store_cache(package_id, data)
             return data
 
-        data = self._maskFilter_user_package_unmask(package_id, live)
+        data = self._maskFilter_user_package_unmask(package_id)
         if data:
-            self._mask_filter_store_cache(package_id, data)
             return data
 
-        data = self._maskFilter_packages_db_mask(package_id, live)
+        data = self._maskFilter_packages_db_mask(package_id)
         if data:
-            self._mask_filter_store_cache(package_id, data)
             return data
 
-        data = self._maskFilter_package_license_mask(package_id, live)
+        data = self._maskFilter_package_license_mask(package_id, mylicenses)
         if data:
-            self._mask_filter_store_cache(package_id, data)
             return data
 
-        data = self._maskFilter_keyword_mask(package_id, live)
+        data = self._maskFilter_keyword_mask(package_id, mykeywords)
         if data:
-            self._mask_filter_store_cache(package_id, data)
             return data
 
         # holy crap, can't validate
         myr = self._settings['pkg_masking_reference']['completely_masked']
-        validator_cache[(package_id, self.name, live)] = -1, myr
-        self._mask_filter_store_cache(package_id, data)
         return -1, myr
 
+    def _maskFilter_map(self):
+        """
+        Compute the mask status of all the packages in the repository
+        at once, live masking excluded.
+        The user and repository masks are applied through set operations,
+        license and keywords metadata is read with a single batch.
+
+        @return: dict mapping package identifiers to maskFilter() results
+        @rtype: dict
+        """
+        ref = self._settings['pkg_masking_reference']
+        remaining = set(self.listAllPackageIds())
+        mask_map = {}
+
+        for ids, package_ids_masked, reason in (
+            (self._maskFilter_user_package_mask_ids(), True,
+             ref['user_package_mask']),
+            (self._maskFilter_user_package_unmask_ids(), False,
+             ref['user_package_unmask']),
+            (self._maskFilter_packages_db_mask_ids(), True,
+             ref['repository_packages_db_mask']),
+            ):
+            matched = remaining & ids
+            if package_ids_masked:
+                mask_map.update((x, (-1, reason)) for x in matched)
+            else:
+                mask_map.update((x, (x, reason)) for x in matched)
+            remaining -= matched
+
+        metadata = self.getPackageDataMany(
+            remaining, get_content = False, get_changelog = False,
+            get_content_safety = False, fields = ("license", "keywords"))
+        for package_id in remaining:
+            data = metadata[package_id]
+            if data is None:
+                # package vanished in the meantime
+                continue
+            mylicenses = data['license'] or ""
+            mask_map[package_id] = \
+                self._maskFilter_package_license_mask(
+                    package_id, mylicenses) or \
+                self._maskFilter_keyword_mask(
+                    package_id, data['keywords']) or \
+                (-1, ref['completely_masked'])
+
+        return mask_map
+
+    def _maskFilter_get_map(self):
+        """
+        Return the mask status map of this repository, loading it from
+        the on-disk cache or computing it if needed. The map is kept in
+        the Entropy Client masking validation cache until the latter is
+        cleared.
+        """
+        try:
+            validator_cache = self._client_settings[
+                'masking_validation']['cache']
+        except KeyError: # system settings client plugin not found
+            validator_cache = {}
+
+        mask_map = validator_cache.get(self.name)
+        if mask_map is not None:
+            return mask_map
+
+        with self._mask_filter_lock:
+            mask_map = validator_cache.get(self.name)
+            if mask_map is not None:
+                return mask_map
+
+            cache_key = None
+            if self._caching:
+                cache_key = self._mask_filter_cache_key()
+                mask_map = self._cacher.pop(cache_key)
+
+            if mask_map is None:
+                mask_map = self._maskFilter_map()
+                if cache_key is not None:
+                    self._cacher.push(cache_key, mask_map)
+
+            validator_cache[self.name] = mask_map
+            return mask_map
+
+    def maskFilter(self, package_id, live = True):
+        """
+        Reimplemented from EntropyRepositoryBase
+        """
+        if live:
+            data = self._maskFilter_live(package_id)
+            if data:
+                return data
+
+        mask_map = self._maskFilter_get_map()
+        data = mask_map.get(package_id)
+        if data is None:
+            # package added after the map has been built
+            mylicenses = self.retrieveLicense(package_id) or ""
+            data = self._maskFilter_package(
+                package_id, mylicenses, self.retrieveKeywords(package_id))
+            mask_map[package_id] = data
+        return data
+
     def atomMatchCacheKey(self):
         """
         Reimplemented from EntropyRepositoryBase.
@@ -346,8 +346,11 @@ class CalculatorsMixin:
         """
         Search packages inside all the available repositories, including the
         installed packages one.
-        Results are returned in random order by default, and as a list of
-        package matches (pkg_id_int, repo_string).
+        Results are returned as a list of package matches
+        (pkg_id_int, repo_string), ranked across repositories: exact name
+        matches come first, then name prefix and substring matches, then
+        other atom (category, provide) matches and finally, if requested,
+        description matches. Ties keep the repository order.
 
         @param keyword: string to search
         @type keyword: string
@@ -392,7 +395,8 @@ class CalculatorsMixin:
         if search_tag:
             atom = entropy.dep.remove_tag(atom)
 
-        matches = []
+        ranked_matches = []
+        atom_lower = atom.lower()
 
         for repository in repositories:
 
@@ -402,12 +406,19 @@ class CalculatorsMixin:
                 # ouch, repository not available or corrupted !
                 continue
 
-            pkg_ids = repo.searchPackages(
+            results = repo.searchPackages(
                 atom, slot = match_slot,
-                tag = search_tag,
-                just_id = True)
+                tag = search_tag)
 
-            matches.extend((pkg_id, repository) for pkg_id in pkg_ids)
+            for pkg_atom, pkg_id, _branch in results:
+                ranked_matches.append(
+                    (self._atom_search_rank(atom_lower, pkg_atom),
+                     (pkg_id, repository)))
+
+        # sort() is stable, repository order is kept for equal ranks
+        ranked_matches.sort(key = lambda x: x[0])
+        matches = [pkg_match for _rank, pkg_match in ranked_matches]
+        del ranked_matches[:]
 
         # less relevance
         if description:
@@ -435,6 +446,24 @@ class CalculatorsMixin:
 
         return matches
 
+    @staticmethod
+    def _atom_search_rank(keyword, atom):
+        """
+        Return the atom_search() relevance of a package atom matching
+        the given lowercase keyword, lower is better.
+        """
+        key = entropy.dep.dep_getkey(atom).lower()
+        name = key.split("/")[-1]
+        if keyword in (name, key):
+            return 0
+        if name.startswith(keyword):
+            return 1
+        if "/" in keyword and key.startswith(keyword):
+            return 1
+        if keyword in name:
+            return 2
+        return 3
+
     def _resolve_or_dependencies(self, dependencies, selected_matches,
                                  _selected_matches_cache = None):
         """
@@ -671,7 +700,7 @@ class CalculatorsMixin:
                 deep_deps, dependencies,))
 
         etp_cmp = entropy.dep.entropy_compare_versions
-        etp_get_rev = entropy.dep.dep_get_entropy_revision
+        parse_atom = entropy.dep.parse_atom
 
         if depcache is None:
             depcache = {}
@@ -746,14 +775,15 @@ class CalculatorsMixin:
                 # check if dependency can be matched in available repos and
                 # if it is a tagged package, in this case, we need to rewrite
                 # the dependency string to restrict its scope
-                dependency_tag = entropy.dep.dep_gettag(dependency)
+                parsed_dependency = parse_atom(dependency)
+                dependency_tag = parsed_dependency.tag
                 if not dependency_tag:
                     # also filter out empty tags (pkgs without tags)
                     av_tags = [x for x in \
                         _my_get_available_tags(dependency, None) if x]
                     if av_tags:
                         matching_tags = set()
-                        i_key = entropy.dep.dep_getkey(dependency)
+                        i_key = parsed_dependency.key
                         for a_tag in av_tags:
                             a_dep_tag = i_key + \
                                 etpConst['entropytagprefix'] + a_tag
@@ -783,9 +813,10 @@ class CalculatorsMixin:
 
             # support for app-foo/foo-123~-1
             # -1 revision means, always pull the latest
+            parsed_dependency = parse_atom(dependency)
             do_rev_deep = False
             if not deep_deps:
-                string_rev = etp_get_rev(dependency)
+                string_rev = parsed_dependency.revision
                 if string_rev == -1:
                     do_rev_deep = True
 
@@ -805,7 +836,7 @@ class CalculatorsMixin:
 
             # WARN: unfortunately, need to deal with Portage (and other
             # backends) old-style PROVIDE metadata
-            if entropy.dep.dep_getcat(dependency) == \
+            if parsed_dependency.key.split("/")[0] == \
                 EntropyRepositoryBase.VIRTUAL_META_PACKAGE_CATEGORY:
                 provide_stop = False
                 for c_id in c_ids:
@@ -3084,8 +3115,8 @@ class CalculatorsMixin:
         deps = set()
 
         security = self.Security()
-        for advisory_id in security.list():
-            deps.update(security.affected_id(advisory_id))
+        for affected_deps in security.affected_all().values():
+            deps.update(affected_deps)
 
         sec_updates = []
         inst_repo = self.installed_repository()
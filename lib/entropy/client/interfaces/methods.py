@@ -38,10 +38,10 @@ from entropy.db.skel import EntropyRepositoryBase
 from entropy.db.exceptions import Error as EntropyRepositoryError
 from entropy.cache import EntropyCacher
 from entropy.misc import FlockFile
-from entropy.fetchers import UrlFetcher
 from entropy.client.interfaces.db import ClientEntropyRepositoryPlugin, \
     InstalledPackagesRepository, AvailablePackagesRepository, GenericRepository
-from entropy.client.mirrors import StatusInterface
+from entropy.client.mirrors import StatusInterface, MirrorProber, \
+    MirrorScores
 from entropy.client.misc import sharedinstlock
 from entropy.output import purple, bold, red, blue, darkgreen, darkred, brown, \
     teal
@@ -60,8 +60,60 @@ class RepositoryMixin:
     def __get_repository_cache_key(self, repository_id):
         return (repository_id, etpConst['systemroot'],)
 
-    def _validate_repositories(self, quiet = False, enabled_repos = None):
+    def __repository_validation_stamp(self, repository_id):
+        """
+        Return the validation stamp of the given repository, describing
+        its on-disk file. Return None if the repository is not backed by
+        a file.
+
+        @param repository_id: repository identifier
+        @type repository_id: string
+        @return: the validation stamp or None
+        @rtype: dict or None
+        """
+        repo_obj = self._settings['repositories']['available'].get(
+            repository_id)
+        if not repo_obj or repo_obj.get('__temporary__'):
+            return None
+        if not repo_obj.get('dbpath'):
+            return None
+
+        dbfile = os.path.join(repo_obj['dbpath'],
+            etpConst['etpdatabasefile'])
+        try:
+            st = os.stat(dbfile)
+        except OSError:
+            return None
+
+        repo_class = self.get_repository(repository_id)
+        return {
+            'path': dbfile,
+            'inode': st.st_ino,
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'schema': getattr(repo_class, "_SCHEMA_REVISION", None),
+        }
+
+    def __repository_validation_cache_key(self, repository_id):
+        return "repository_validation/%s" % (repository_id,)
+
+    def _validate_repositories(self, quiet = False, enabled_repos = None,
+                               full = False):
+        """
+        Validate the configured repositories and fill enabled_repos with
+        the usable ones. Repositories whose file did not change since
+        their last successful validation are not opened, unless full is
+        True.
 
+        @keyword quiet: do not print validation errors
+        @type quiet: bool
+        @keyword enabled_repos: list to fill with the valid repositories,
+            by default the list of enabled repositories is used
+        @type enabled_repos: list
+        @keyword full: validate all the repositories, ignoring the
+            validation stamps
+        @type full: bool
+        """
         if enabled_repos is None:
             enabled_repos = self._enabled_repos
 
@@ -95,6 +147,16 @@ class RepositoryMixin:
         _enabled_repos = []
         all_repos = self._settings['repositories']['order'][:]
         for repoid in self._settings['repositories']['order']:
+
+            stamp_key = self.__repository_validation_cache_key(repoid)
+            if not full:
+                stamp = self.__repository_validation_stamp(repoid)
+                if stamp is not None and \
+                        self._cacher.pop(stamp_key) == stamp:
+                    # unchanged since last validation
+                    _enabled_repos.append(repoid)
+                    continue
+
             # open database
             try:
                 dbc = self._open_repository(
@@ -102,6 +164,16 @@ class RepositoryMixin:
                 dbc.listConfigProtectEntries()
                 dbc.validate()
                 _enabled_repos.append(repoid)
+
+                # the stamp must be taken after opening, which may
+                # update the repository schema.
+                stamp = self.__repository_validation_stamp(repoid)
+                if stamp is not None:
+                    try:
+                        self._cacher.save(stamp_key, stamp)
+                    except IOError:
+                        # unprivileged user, cannot write to cache
+                        pass
             except RepositoryError as err:
 
                 ensure_closed_repo(repoid)
@@ -1860,82 +1932,91 @@ class MiscMixin:
 
     def benchmark_mirrors(self, mirrors):
         """
-        Execute a throughput-oriented benchmark against the
-        list of given Entropy Packages mirrors. Return a new sorted list.
+        Execute a latency and throughput benchmark against the list of
+        given Entropy Packages mirrors. Mirrors are probed concurrently
+        through MirrorProber and the results are accounted into the
+        persistent MirrorScores, so that later downloads can rank mirrors
+        without benchmarking them again. Return a new list sorted by
+        increasing mirror quality (the best mirror is the last one), as
+        expected by the repositories configuration.
+
+        @param mirrors: list of packages mirror URLs
+        @type mirrors: list
+        @return: new sorted list of mirrors
+        @rtype: list
         """
-        # we believe that if a mirror does not respond in 6
-        # seconds, then we should give up.
-        reasonable_timeout = 6
-        mirror_stats = {}
-        mirror_cache = set()
-        retries = 1
         mirror_test_file = "MIRROR_TEST"
+        mirror_cache = set()
+        mirror_urls = {}
 
         for mirror in mirrors:
+            url_data = entropy.tools.spliturl(mirror)
+            hostname = url_data.hostname
+            if hostname is None:
+                # mirror string is fucked up
+                continue
+            if hostname in mirror_cache:
+                continue
+            mirror_cache.add(hostname)
+            mirror_urls[mirror] = mirror + "/" + mirror_test_file
 
-            tmp_fd, tmp_path = const_mkstemp(
-                prefix="entropy.client.methods.reorder_mirrors")
-            try:
-
-                url_data = entropy.tools.spliturl(mirror)
-                hostname = url_data.hostname
-                if hostname is None:
-                    # mirror string is fucked up
-                    continue
-                if hostname in mirror_cache:
-                    continue
-                mirror_cache.add(hostname)
-                mirror_url = mirror + "/" + mirror_test_file
+        mytxt = "%s: %s" % (
+            blue(_("Checking speed of mirrors")),
+            purple(str(len(mirror_urls))),
+        )
+        self.output(
+            mytxt,
+            importance = 1,
+            level = "info",
+            header = purple(" @@ "),
+            back = True
+        )
 
-                mytxt = "%s: %s" % (
-                    blue(_("Checking speed of")),
+        results = MirrorProber().probe(list(mirror_urls.values()))
+        scores = MirrorScores()
+        for mirror, mirror_url in mirror_urls.items():
+            sample = results[mirror_url]
+            if sample == MirrorProber.NOT_PROBED:
+                # out of time, keep the previous score
+                continue
+            scores.update(mirror, sample)
+        scores.save()
+
+        # calculate new order, best mirror last
+        new_mirrors = scores.sort(
+            [x for x in mirrors if x in mirror_urls])[::-1]
+
+        for mirror in new_mirrors[::-1]:
+            sample = results[mirror_urls[mirror]]
+            hostname = entropy.tools.spliturl(mirror).hostname
+            if sample == MirrorProber.NOT_PROBED:
+                mytxt = "%s: %s, %s" % (
+                    blue(_("Mirror speed")),
                     purple(hostname),
+                    brown(_("not checked")),
                 )
-                self.output(
-                    mytxt,
-                    importance = 1,
-                    level = "info",
-                    header = purple(" @@ "),
-                    back = True
-                )
-
-                download_speeds = []
-                fetch_errors = (
-                    UrlFetcher.TIMEOUT_FETCH_ERROR,
-                    UrlFetcher.GENERIC_FETCH_ERROR)
-                for idx in range(retries):
-                    fetcher = self._url_fetcher(mirror_url, tmp_path,
-                        resume = False, show_speed = False,
-                        timeout = reasonable_timeout)
-                    rc = fetcher.download()
-                    if rc not in fetch_errors:
-                        download_speeds.append(fetcher.get_transfer_rate())
-
-                result_speed = 0.0
-                if download_speeds:
-                    download_speeds.sort(reverse=True)
-                    # take the best
-                    result_speed = download_speeds[0]
-                mirror_stats[mirror] = result_speed
-
-                mytxt = "%s: %s, %s/sec" % (
+            elif sample is None:
+                mytxt = "%s: %s, %s" % (
                     blue(_("Mirror speed")),
                     purple(hostname),
-                    teal(str(entropy.tools.bytes_into_human(result_speed))),
+                    darkred(_("not available")),
                 )
-                self.output(
-                    mytxt,
-                    importance = 1,
-                    level = "info",
-                    header = brown(" @@ ")
+            else:
+                mytxt = "%s: %s, %s/sec, %s: %d ms" % (
+                    blue(_("Mirror speed")),
+                    purple(hostname),
+                    teal(str(entropy.tools.bytes_into_human(
+                        sample['rate']))),
+                    blue(_("response time")),
+                    int(sample['ttfb'] * 1000),
                 )
-            finally:
-                os.close(tmp_fd)
-                os.remove(tmp_path)
+            self.output(
+                mytxt,
+                importance = 1,
+                level = "info",
+                header = brown(" @@ ")
+            )
 
-        # calculate new order
-        new_mirrors = sorted(mirror_stats.keys(),
-            key = lambda x: mirror_stats[x])
         return new_mirrors
 
     def reorder_mirrors(self, repository_id, dry_run = False):
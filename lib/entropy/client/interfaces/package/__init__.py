@@ -20,7 +20,8 @@ import collections
 
 from entropy.const import etpConst, const_setup_perms, const_mkstemp, \
     const_isunicode, const_convert_to_unicode, const_debug_write, \
-    const_debug_enabled, const_convert_to_rawstring, const_is_python3
+    const_debug_enabled, const_convert_to_rawstring, const_is_python3, \
+    const_get_cpus
 from entropy.exceptions import EntropyException, PermissionDenied, SPMError
 from entropy.i18n import _, ngettext
 from entropy.output import brown, blue, bold, darkgreen, \
@@ -127,6 +128,101 @@ class PackageActionFactory(object):
                 "action does not exist")
         return action_class(self._entropy, package_match, opts = opts)
 
+    def install_pipeline(self, install_queue, lookahead = None):
+        """
+        Return a PackageInstallPipeline object for the given install queue.
+
+        @param install_queue: ordered list of tuples composed by an Entropy
+            package match and the opts dict to pass to the install
+            PackageAction instance
+        @type install_queue: list
+        @keyword lookahead: number of packages to unpack in background while
+            the current one is installed, if None, it is computed from the
+            number of available CPUs
+        @type lookahead: int
+        @return: a PackageInstallPipeline instance
+        @rtype: PackageInstallPipeline
+        """
+        return PackageInstallPipeline(
+            self, install_queue, lookahead = lookahead)
+
+
+class PackageInstallPipeline(object):
+    """
+    Install queue driver returning the install PackageAction objects in
+    queue order and unpacking, in separate processes, the package files
+    of the next ones while the current package is being merged and its
+    triggers are run. Packages are installed strictly one at a time,
+    exactly as if the install PackageAction objects were created and
+    started sequentially. Package files must have been already downloaded.
+
+    Example code:
+
+    >>> factory = PackageActionFactory(entropy_client)
+    >>> pipeline = factory.install_pipeline(
+    ...     [((123, "sabayon-weekly"), {}), ((124, "sabayon-weekly"), {})])
+    >>> try:
+    ...     for pkg in pipeline:
+    ...         try:
+    ...             exit_st = pkg.start()
+    ...         finally:
+    ...             pkg.finalize()
+    ... finally:
+    ...     pipeline.close()
+    """
+
+    # upper bound of the default lookahead value
+    MAX_LOOKAHEAD = 4
+
+    def __init__(self, action_factory, install_queue, lookahead = None):
+        """
+        Object constructor, see PackageActionFactory.install_pipeline().
+        """
+        self._factory = action_factory
+        self._queue = collections.deque(install_queue)
+        if lookahead is None:
+            lookahead = min(const_get_cpus(), self.MAX_LOOKAHEAD)
+        self._lookahead = max(0, lookahead)
+        self._pending = collections.deque()
+
+    def __iter__(self):
+        while True:
+            while self._queue and len(self._pending) <= self._lookahead:
+                package_match, opts = self._queue.popleft()
+                self._pending.append(
+                    self._factory.get(
+                        self._factory.INSTALL_ACTION,
+                        package_match, opts = opts))
+
+            if not self._pending:
+                break
+
+            pkg = self._pending.popleft()
+            for next_pkg in self._pending:
+                try:
+                    next_pkg.unpack_async()
+                except Exception as err:
+                    # the same error will be raised (and handled)
+                    # when the action is executed.
+                    const_debug_write(
+                        __name__,
+                        "PackageInstallPipeline: unpack_async() of %s, "
+                        "error: %s" % (
+                            (next_pkg.package_id(),
+                             next_pkg.repository_id()),
+                            repr(err)))
+            yield pkg
+
+    def close(self):
+        """
+        Finalize the install PackageAction objects that have not been
+        returned yet, killing their background unpack processes.
+        """
+        self._queue.clear()
+        while self._pending:
+            pkg = self._pending.popleft()
+            pkg.finalize()
+
 
 class PackageActionFactoryWrapper(PackageActionFactory):
     """
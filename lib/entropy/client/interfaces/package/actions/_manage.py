@@ -115,6 +115,8 @@ class _PackageInstallRemoveAction(PackageAction):
         """
         preserved_libs = preserved_mgr.collect()
         inst_repo = preserved_mgr.installed_repository()
+        file_owners = inst_repo.isFileAvailableMany(
+            path for _library, _elfclass, path in preserved_libs)
 
         for library, elfclass, path in preserved_libs:
 
@@ -122,8 +124,7 @@ class _PackageInstallRemoveAction(PackageAction):
             # the library has been replaced, we should not remove it
             # but just unregister.
             remove = False
-            package_ids = inst_repo.isFileAvailable(path, get_id = True)
-            if not package_ids:
+            if path not in file_owners:
                 remove = True
 
             if remove:
@@ -466,6 +467,12 @@ class _PackageInstallRemoveAction(PackageAction):
                 if paths is not None:
                     preserved_lib_paths.update(paths)
 
+        # look up the ownership of all the files at once
+        file_owners = {}
+        if col_protect > 0:
+            file_owners = inst_repo.isFileAvailableMany(
+                item for _pkg_id, item, _ftype in remove_content)
+
         for _pkg_id, item, _ftype in remove_content:
 
             if not item:
@@ -482,7 +489,7 @@ class _PackageInstallRemoveAction(PackageAction):
             # collision check
             if col_protect > 0:
 
-                if inst_repo.isFileAvailable(item) \
+                if item in file_owners \
                     and os.path.isfile(sys_root_item_encoded):
 
                     # in this way we filter out directories
@@ -17,7 +17,7 @@ import stat
 
 from entropy.const import etpConst, const_debug_write, const_debug_enabled, \
     const_mkstemp
-from entropy.client.mirrors import StatusInterface
+from entropy.client.mirrors import StatusInterface, MirrorScores
 from entropy.exceptions import InterruptError
 from entropy.fetchers import UrlFetcher
 from entropy.i18n import _
@@ -646,6 +646,8 @@ class _PackageFetchAction(PackageAction):
             else:
                 uris = avail_data[repository_id]['packages'][::-1]
 
+        # prefer the mirrors that performed better in the past
+        uris = MirrorScores().sort(uris)
         remaining = set(uris)
         mirror_status = StatusInterface()
 
@@ -1025,10 +1027,22 @@ class _PackageFetchAction(PackageAction):
                 )
             return False
 
+        # digests are calculated all at once, see below
+        file_digests = {}
+
+        def digest_comparator(hash_type):
+            def _compare(pkg_path, hash_val):
+                hash_str = file_digests.get(hash_type)
+                if hash_str is None:
+                    hash_str = entropy.tools.digests(
+                        pkg_path, (hash_type,))[hash_type]
+                return str(hash_val) == hash_str
+            return _compare
+
         signature_vry_map = {
-            'sha1': entropy.tools.compare_sha1,
-            'sha256': entropy.tools.compare_sha256,
-            'sha512': entropy.tools.compare_sha512,
+            'sha1': digest_comparator('sha1'),
+            'sha256': digest_comparator('sha256'),
+            'sha512': digest_comparator('sha512'),
             'gpg': do_compare_gpg,
         }
 
@@ -1112,9 +1126,26 @@ class _PackageFetchAction(PackageAction):
         )
 
         download_name = os.path.basename(download_path)
+
+        # check if package has been already checked
+        mtime_validated = do_mtime_validation() == 0
+
+        # read the package file once for all the required digests
+        hash_types = set(["md5"])
+        if not mtime_validated and isinstance(signatures, dict):
+            for hash_type, hash_val in signatures.items():
+                if hash_val is None:
+                    continue
+                if hash_type not in enabled_hashes:
+                    continue
+                if hash_type in ("sha1", "sha256", "sha512"):
+                    hash_types.add(hash_type)
+
         valid_checksum = False
         try:
-            valid_checksum = entropy.tools.compare_md5(download_path, checksum)
+            file_digests.update(entropy.tools.digests(
+                download_path, hash_types, use_mmap = True))
+            valid_checksum = str(checksum) == file_digests['md5']
         except (OSError, IOError) as err:
             valid_checksum = False
             const_debug_write(
@@ -1148,9 +1179,8 @@ class _PackageFetchAction(PackageAction):
             )
             return 1
 
-        # check if package has been already checked
         validated = True
-        if do_mtime_validation() != 0:
+        if not mtime_validated:
             validated = do_signatures_validation(signatures) == 0
 
         if not validated:
@@ -10,9 +10,11 @@
 
 """
 import errno
+import multiprocessing
 import os
 import shutil
 import stat
+import sys
 import time
 
 from entropy.const import etpConst, const_convert_to_unicode, \
@@ -32,6 +34,54 @@ from .. import _content as Content
 from .. import preservedlibs
 
 
+def _unpack_package_files(package_paths, image_dir, pkg_dbpath):
+    """
+    Unpack the given package files into image_dir and, if pkg_dbpath is
+    not None, dump the Entropy metadata of the first package file there.
+    This function does not produce any output and is executed in a separate
+    process by _PackageInstallAction.unpack_async().
+
+    @return: exit status
+    @rtype: int
+    """
+    try:
+        try:
+            os.makedirs(image_dir, 0o755)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                return 1
+
+        if pkg_dbpath is not None:
+            try:
+                os.makedirs(os.path.dirname(pkg_dbpath), 0o755)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    return 1
+            if not entropy.tools.dump_entropy_metadata(
+                    package_paths[0], pkg_dbpath):
+                return 1
+
+        for package_path in package_paths:
+            exit_st = entropy.tools.uncompress_tarball(
+                package_path,
+                extract_path = image_dir,
+                catch_empty = True
+            )
+            if exit_st != 0:
+                return 1
+
+    except Exception:
+        return 1
+    return 0
+
+
+def _unpack_package_files_process(package_paths, image_dir, pkg_dbpath):
+    """
+    multiprocessing.Process target of _unpack_package_files().
+    """
+    sys.exit(_unpack_package_files(package_paths, image_dir, pkg_dbpath))
+
+
 class _PackageInstallAction(_PackageInstallRemoveAction):
     """
     PackageAction used for package installation.
@@ -51,12 +101,19 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
         """
         super(_PackageInstallAction, self).__init__(
             entropy_client, package_match, opts = opts)
+        self._unpack_job = None
 
     def finalize(self):
         """
         Finalize the object, release all its resources.
         """
         super(_PackageInstallAction, self).finalize()
+        if self._unpack_job is not None:
+            # the action has not been executed, throw away the
+            # background unpack and its image directory.
+            self._wait_unpack_async(terminate = True)
+            shutil.rmtree(
+                const_convert_to_rawstring(self._meta['unpackdir']), True)
         if self._meta is not None:
             meta = self._meta
             self._meta = None
@@ -347,9 +404,91 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
 
         return 0
 
-    def _unpack_package(self, package_path, image_dir, pkg_dbpath):
+    def unpack_async(self):
         """
-        Effectively unpack the package tarballs.
+        Start unpacking the package files into the image directory in a
+        separate process, so that it can happen while other packages are
+        being installed. The unpack phase will then wait for it and reuse
+        its outcome, falling back to the in-process unpack on failure.
+        The package files must have been already downloaded.
+
+        @return: True, if the background unpack has been started
+        @rtype: bool
+        """
+        self.setup()
+        if self._meta['merge_from'] or self._unpack_job is not None:
+            return False
+
+        download_paths = [self._meta['pkgpath']]
+        for extra_download in self._meta['extra_download']:
+            download_paths.append(
+                self.get_standard_fetch_disk_path(
+                    extra_download['download']))
+
+        # hold the same shared locks the unpack phase would take,
+        # without blocking, for the whole background unpack.
+        locks = []
+        started = False
+        try:
+            for download_path in download_paths:
+                lock = self.path_lock(download_path)
+                locks.append(lock)
+                if not lock.try_acquire_shared():
+                    return False
+                if not self._stat_path(download_path):
+                    return False
+
+            process = multiprocessing.Process(
+                target = _unpack_package_files_process,
+                args = (download_paths, self._meta['imagedir'],
+                        self._meta['pkgdbpath']))
+            process.daemon = True
+            process.start()
+            started = True
+
+        finally:
+            if not started:
+                for lock in locks:
+                    lock.close()
+
+        self._unpack_job = (process, download_paths, locks)
+        return True
+
+    def _wait_unpack_async(self, terminate = False):
+        """
+        Wait for the background unpack started by unpack_async() and
+        release its resources.
+
+        @keyword terminate: kill the unpack process instead of waiting
+        @type terminate: bool
+        @return: the list of unpacked package files, or None if there was
+            no background unpack or it failed
+        @rtype: list or None
+        """
+        if self._unpack_job is None:
+            return None
+        process, download_paths, locks = self._unpack_job
+        self._unpack_job = None
+
+        try:
+            if terminate:
+                process.terminate()
+            process.join()
+        finally:
+            for lock in locks:
+                lock.close()
+
+        if process.exitcode != 0:
+            const_debug_write(
+                __name__,
+                "_wait_unpack_async: %s unpack failed: %s" % (
+                    download_paths, process.exitcode))
+            return None
+        return download_paths
+
+    def _unpack_package_output(self, package_path):
+        """
+        Print the unpack message for the given package file.
         """
         txt = "%s: %s" % (
             blue(_("Unpacking")),
@@ -362,6 +501,12 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
             header = red("   ## ")
         )
 
+    def _unpack_package(self, package_path, image_dir, pkg_dbpath):
+        """
+        Effectively unpack the package tarballs.
+        """
+        self._unpack_package_output(package_path)
+
         self._entropy.logger.log(
             "[Package]",
             etpConst['logging']['normal_loglevel_id'],
@@ -587,6 +732,25 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
                 header = red("   ## ")
             )
 
+        unpacked_paths = self._wait_unpack_async()
+        if unpacked_paths is not None:
+            for download_path in unpacked_paths:
+                self._unpack_package_output(download_path)
+            spm_class = self._entropy.Spm_class()
+            # call Spm unpack hook
+            return spm_class.entropy_install_unpack_hook(self._entropy,
+                self._meta)
+
+        # make sure that a failed background unpack did not leave
+        # anything behind.
+        shutil.rmtree(
+            const_convert_to_rawstring(self._meta['imagedir']), True)
+        try:
+            os.remove(self._meta['pkgdbpath'])
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+
         locks = []
         try:
             download_path = self._meta['pkgpath']
@@ -1432,17 +1596,34 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
 
         return 0
 
-    def _handle_install_collision_protect_unlocked(self, inst_repo,
+    def _get_install_file_owners_unlocked(self, inst_repo, image_dir):
+        """
+        Return the installed packages owning the files that are going
+        to be merged from the package image directory, see
+        EntropyRepositoryBase.isFileAvailableMany().
+        """
+        def _image_files():
+            for currentdir, subdirs, files in os.walk(image_dir):
+                for item in files:
+                    fromfile = os.path.join(currentdir, item)
+                    yield const_convert_to_unicode(
+                        fromfile[len(image_dir):])
+
+        return inst_repo.isFileAvailableMany(_image_files())
+
+    def _handle_install_collision_protect_unlocked(self, file_owners,
                                                    remove_package_id,
                                                    tofile,
                                                    todbfile):
         """
         Handle files collition protection for the install phase.
-        """
 
-        avail = inst_repo.isFileAvailable(
-            const_convert_to_unicode(todbfile),
-            get_id = True)
+        @param file_owners: installed files ownership map, as returned by
+            _get_install_file_owners_unlocked()
+        @type file_owners: dict
+        """
+        avail = file_owners.get(
+            const_convert_to_unicode(todbfile), frozenset())
 
         if (remove_package_id not in avail) and avail:
             mytxt = darkred(_("Collision found during install for"))
@@ -1737,7 +1918,7 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
             if col_protect > 1:
                 todbfile = fromfile[len(image_dir):]
                 myrc = self._handle_install_collision_protect_unlocked(
-                    inst_repo, remove_package_id, tofile, todbfile)
+                    file_owners, remove_package_id, tofile, todbfile)
                 if not myrc:
                     return 0
 
@@ -1949,6 +2130,12 @@ class _PackageInstallAction(_PackageInstallRemoveAction):
 
             return 0
 
+        # look up the ownership of all the files at once
+        file_owners = {}
+        if col_protect > 1:
+            file_owners = self._get_install_file_owners_unlocked(
+                inst_repo, image_dir)
+
         # merge data into system
         for currentdir, subdirs, files in os.walk(image_dir):
 
@@ -15,7 +15,7 @@ import os
 import threading
 
 from entropy.const import etpConst, const_setup_perms, const_mkstemp
-from entropy.client.mirrors import StatusInterface
+from entropy.client.mirrors import StatusInterface, MirrorScores
 from entropy.exceptions import InterruptError
 from entropy.fetchers import UrlFetcher
 from entropy.output import blue, darkblue, bold, red, darkred, brown, darkgreen
@@ -554,6 +554,11 @@ class _PackageMultiFetchAction(_PackageFetchAction):
             for new_obj in new_ones:
                 obj.insert(0, new_obj)
 
+        # prefer the mirrors that performed better in the past
+        mirror_scores = MirrorScores()
+        for repository_id, uris in repo_uris.items():
+            repo_uris[repository_id] = mirror_scores.sort(uris)
+
         remaining = repo_uris.copy()
         mirror_status = StatusInterface()
 
@@ -166,7 +166,7 @@ class Repository(object):
 
         # keep them closed, but trigger schema updates
         self._entropy.close_repositories()
-        self._entropy._validate_repositories()
+        self._entropy._validate_repositories(full = True)
         self._entropy.reopen_installed_repository()
         self._entropy.close_repositories()
 
@@ -238,7 +238,9 @@ class ClientSystemSettingsPlugin(SystemSettingsPlugin):
 
     def masking_validation_parser(self, system_settings_instance):
         data = {
-            'cache': {}, # package masking validation cache
+            # package masking validation cache, maps repository
+            # identifiers to their package mask status map
+            'cache': {},
         }
         return data
 
@@ -9,7 +9,29 @@
     B{Entropy Package Manager Client Download Mirrors Interface}.
 
 """
+import socket
+import threading
+import time
+try:
+    import httplib
+except ImportError:
+    # python 3.x
+    import http.client as httplib
+
+from entropy.const import const_is_python3
+
+if const_is_python3():
+    import urllib.request as urlmod
+    import urllib.error as urlmod_error
+else:
+    import urllib2 as urlmod
+    import urllib2 as urlmod_error
+
+from entropy.cache import EntropyCacher
 from entropy.core import Singleton
+from entropy.core.settings.base import SystemSettings
+from entropy.misc import ParallelTask
+from entropy.tools import spliturl
 
 class StatusInterface(Singleton, dict):
 
@@ -38,4 +60,391 @@ class StatusInterface(Singleton, dict):
 
     def clear(self):
         self.__last_mirrorname = None
-        return dict.clear(self)
\ No newline at end of file
+        return dict.clear(self)
+
+
+class MirrorScores(Singleton):
+
+    """
+    Persistent, per-mirror quality scores. Each mirror, identified by
+    scheme, host, port and base path, keeps an exponentially decaying
+    average of the connect latency, the time to first byte and the
+    throughput measured by MirrorProber, as well as a decaying failure
+    counter. URLs below a scored mirror (repository database or package
+    URLs) share its score. Scores are stored through EntropyCacher so
+    that mirrors can be ranked without benchmarking them again.
+    """
+
+    CACHE_KEY = "mirror_scores/v2"
+    # default ports, so that "http://host/" and "http://host:80/" match
+    DEFAULT_PORTS = {
+        'http': 80,
+        'https': 443,
+        'ftp': 21,
+    }
+    # a sample loses half of its weight every HALF_LIFE seconds
+    HALF_LIFE = 3 * 24 * 3600
+    # scores older than this (in seconds) are ignored
+    MAX_AGE = 30 * 24 * 3600
+    # weight of a fresh score when averaged with a new sample
+    HISTORY_WEIGHT = 0.5
+    # size of the download used to turn scores into an estimated time
+    REFERENCE_SIZE = 1024000
+
+    def init_singleton(self):
+        self._scores = None
+        self._scores_lock = threading.Lock()
+
+    def _get_scores(self):
+        """
+        Return the scores dict, loading it from cache if needed.
+        Must be called with _scores_lock held.
+        """
+        if self._scores is None:
+            scores = EntropyCacher().pop(self.CACHE_KEY)
+            if not isinstance(scores, dict):
+                scores = {}
+            self._scores = scores
+        return self._scores
+
+    def _key(self, url):
+        """
+        Return the key used to score the given mirror URL, in the
+        "scheme://host:port/base/path" form, or None if the URL is invalid.
+        """
+        try:
+            url_data = spliturl(url)
+            hostname = url_data.hostname
+            port = url_data.port
+        except ValueError:
+            return None
+        if not hostname:
+            return None
+        scheme = url_data.scheme.lower()
+        if port is None:
+            port = self.DEFAULT_PORTS.get(scheme)
+        path = "/".join(x for x in url_data.path.split("/") if x)
+        return "%s://%s:%s/%s" % (scheme, hostname, port, path)
+
+    @staticmethod
+    def _lookup(scores, key):
+        """
+        Return the score of the given key or of the closest mirror
+        containing it (longest base path prefix), if any.
+        Must be called with _scores_lock held.
+        """
+        scheme, _empty, netloc, path = key.split("/", 3)
+        root = "%s//%s/" % (scheme, netloc)
+        path = path.split("/") if path else []
+        for count in range(len(path), -1, -1):
+            entry = scores.get(root + "/".join(path[:count]))
+            if entry is not None:
+                return entry
+        return None
+
+    def _decay(self, entry, now):
+        return 0.5 ** (max(0.0, now - entry['mtime']) / float(self.HALF_LIFE))
+
+    def update(self, url, sample):
+        """
+        Account a new probe result for the given mirror URL.
+
+        @param url: mirror URL
+        @type url: string
+        @param sample: dict containing the "latency", "ttfb" and "rate"
+            keys (as returned by MirrorProber), or None if the probe failed
+        @type sample: dict or None
+        """
+        mirror_key = self._key(url)
+        if mirror_key is None:
+            return
+        now = time.time()
+
+        with self._scores_lock:
+            scores = self._get_scores()
+            entry = scores.get(mirror_key)
+            if entry is not None and (now - entry['mtime']) > self.MAX_AGE:
+                entry = None
+
+            if entry is None:
+                weight = 0.0
+                failures = 0.0
+                entry = {'latency': None, 'ttfb': None, 'rate': None}
+            else:
+                decay = self._decay(entry, now)
+                weight = self.HISTORY_WEIGHT * decay
+                failures = entry['failures'] * decay
+
+            new_entry = {
+                'failures': failures,
+                'mtime': now,
+            }
+            for key in ("latency", "ttfb", "rate"):
+                old = entry[key]
+                new = None
+                if sample is not None:
+                    new = sample.get(key)
+                if new is None:
+                    new_entry[key] = old
+                elif old is None:
+                    new_entry[key] = new
+                else:
+                    new_entry[key] = (old * weight) + (new * (1.0 - weight))
+            if sample is None:
+                new_entry['failures'] += 1.0
+
+            scores[mirror_key] = new_entry
+
+    def estimate(self, url):
+        """
+        Return the estimated time, in seconds, needed to download
+        REFERENCE_SIZE bytes from the given mirror URL, or None if the
+        mirror has no valid score. Failing mirrors are estimated at
+        float("inf").
+
+        @param url: mirror URL
+        @type url: string
+        @return: estimated download time or None
+        @rtype: float or None
+        """
+        mirror_key = self._key(url)
+        if mirror_key is None:
+            return None
+        now = time.time()
+
+        with self._scores_lock:
+            entry = self._lookup(self._get_scores(), mirror_key)
+        if entry is None:
+            return None
+        if (now - entry['mtime']) > self.MAX_AGE:
+            return None
+
+        rate = entry['rate']
+        if not rate:
+            return float("inf")
+        ttfb = entry['ttfb'] or entry['latency'] or 0.0
+        failures = entry['failures'] * self._decay(entry, now)
+        return (ttfb + self.REFERENCE_SIZE / rate) * (1.0 + failures)
+
+    def sort(self, urls, key = None):
+        """
+        Sort the given mirrors, best first. Mirrors without a score keep
+        their relative order and are placed after the scored ones, but
+        before the failing ones.
+
+        @param urls: list of mirror URLs (or objects, see key)
+        @type urls: list
+        @keyword key: callable returning the mirror URL of each object
+        @type key: callable
+        @return: new sorted list
+        @rtype: list
+        """
+        if key is None:
+            key = lambda x: x
+
+        scored = []
+        unknown = []
+        failing = []
+        for url in urls:
+            estimate = self.estimate(key(url))
+            if estimate is None:
+                unknown.append(url)
+            elif estimate == float("inf"):
+                failing.append(url)
+            else:
+                scored.append((estimate, len(scored), url))
+
+        scored.sort()
+        return [x[2] for x in scored] + unknown + failing
+
+    def save(self):
+        """
+        Persist the scores. Errors are silently ignored, scores are just
+        a cache.
+        """
+        with self._scores_lock:
+            scores = self._get_scores().copy()
+        try:
+            EntropyCacher().save(self.CACHE_KEY, scores)
+        except (IOError, OSError):
+            pass
+
+    def clear(self):
+        """
+        Forget the in-memory scores, they will be reloaded from cache.
+        """
+        with self._scores_lock:
+            self._scores = None
+
+
+class MirrorProber(object):
+
+    """
+    Concurrently probe a list of mirrors, measuring the connect latency,
+    the time to first byte and the throughput of each one of them. All the
+    probes share a global deadline.
+    """
+
+    # default number of mirrors probed at the same time
+    WORKERS = 8
+    # default global deadline, in seconds
+    DEADLINE = 15
+    # maximum time spent on a single mirror, in seconds
+    PROBE_TIMEOUT = 6
+    # read size used to measure the throughput
+    CHUNK_SIZE = 16384
+    # probe result of mirrors that could not be probed before the
+    # global deadline, they are neither working nor failing
+    NOT_PROBED = "not-probed"
+
+    _DEFAULT_PORTS = {
+        "http": 80,
+        "https": 443,
+        "ftp": 21,
+    }
+
+    def __init__(self, workers = None, deadline = None):
+        """
+        MirrorProber constructor.
+
+        @keyword workers: number of concurrent probes
+        @type workers: int
+        @keyword deadline: global deadline in seconds
+        @type deadline: float
+        """
+        if workers is None:
+            workers = self.WORKERS
+        if deadline is None:
+            deadline = self.DEADLINE
+        self._workers = max(1, workers)
+        self._deadline = deadline
+        self._settings = SystemSettings()
+
+    def _build_opener(self):
+        """
+        Return a urllib opener honouring the configured proxies.
+        """
+        proxy_data = self._settings['system']['proxy']
+        proxies = {}
+        for protocol in ("http", "ftp"):
+            if proxy_data.get(protocol):
+                proxies[protocol] = proxy_data[protocol]
+        if proxies:
+            return urlmod.build_opener(urlmod.ProxyHandler(proxies))
+        return urlmod.build_opener()
+
+    def _connect_latency(self, url_data, timeout):
+        """
+        Return the time needed to open a TCP connection to the mirror, or
+        None if it cannot be measured (unknown port or proxy in use).
+        Raise socket.error if the mirror is unreachable.
+        """
+        port = url_data.port
+        if port is None:
+            port = self._DEFAULT_PORTS.get(url_data.scheme)
+        if port is None:
+            return None
+        proxy_data = self._settings['system']['proxy']
+        if proxy_data.get(url_data.scheme):
+            return None
+
+        start = time.time()
+        sock = socket.create_connection((url_data.hostname, port), timeout)
+        latency = time.time() - start
+        sock.close()
+        return latency
+
+    def _probe(self, opener, url, deadline):
+        """
+        Probe a single mirror URL. Return a dict with "latency", "ttfb"
+        and "rate" keys, None if the mirror is not working or NOT_PROBED
+        if the global deadline did not leave enough time to probe it.
+        """
+        timeout = min(self.PROBE_TIMEOUT, deadline - time.time())
+        if timeout <= 0:
+            return self.NOT_PROBED
+        try:
+            url_data = spliturl(url)
+        except ValueError:
+            return None
+
+        remote = None
+        try:
+            latency = self._connect_latency(url_data, timeout)
+
+            start = time.time()
+            remote = opener.open(url, None, timeout)
+            chunk = remote.read(self.CHUNK_SIZE)
+            first_byte = time.time()
+            ttfb = first_byte - start
+
+            size = len(chunk)
+            probe_deadline = min(deadline, start + self.PROBE_TIMEOUT)
+            while chunk and time.time() < probe_deadline:
+                chunk = remote.read(self.CHUNK_SIZE)
+                size += len(chunk)
+            elapsed = max(time.time() - first_byte, 0.001)
+
+        except (socket.error, socket.timeout, urlmod_error.URLError,
+                httplib.HTTPException, ValueError, IOError):
+            if timeout < self.PROBE_TIMEOUT and time.time() >= deadline:
+                # cut short by the global deadline, not a mirror failure
+                return self.NOT_PROBED
+            return None
+        finally:
+            if remote is not None:
+                try:
+                    remote.close()
+                except (socket.error, IOError):
+                    pass
+
+        if not size:
+            return None
+        return {
+            'latency': latency,
+            'ttfb': ttfb,
+            'rate': size / elapsed,
+        }
+
+    def probe(self, urls):
+        """
+        Probe the given mirror URLs. Mirrors that could not be probed
+        within the global deadline get NOT_PROBED as result.
+
+        @param urls: list of URLs to probe
+        @type urls: list
+        @return: dict mapping each URL to its probe result (a dict with
+            "latency", "ttfb" and "rate" keys), None if it failed or
+            NOT_PROBED
+        @rtype: dict
+        """
+        deadline = time.time() + self._deadline
+        opener = self._build_opener()
+        queue = list(urls)
+        queue_lock = threading.Lock()
+        results = {}
+
+        def _worker():
+            while True:
+                with queue_lock:
+                    if not queue:
+                        return
+                    url = queue.pop(0)
+                sample = self._probe(opener, url, deadline)
+                with queue_lock:
+                    results[url] = sample
+
+        tasks = []
+        for _idx in range(min(self._workers, len(queue))):
+            task = ParallelTask(_worker)
+            task.daemon = True
+            task.start()
+            tasks.append(task)
+        for task in tasks:
+            task.join(max(0.0, deadline - time.time()) + 1.0)
+
+        with queue_lock:
+            del queue[:]
+            outcome = dict(
+                (url, results.get(url, self.NOT_PROBED)) for url in urls)
+        return outcome
@@ -10,16 +10,19 @@
 
 """
 
+import collections
 import os
+import re
 import sys
 import shutil
-import subprocess
+import threading
 
 from entropy.core.settings.base import SystemSettings
 from entropy.const import etpConst, const_convert_to_rawstring, \
     const_convert_to_unicode, const_debug_write
+from entropy.misc import ParallelTask
 from entropy.output import darkred, darkgreen, brown
-from entropy.tools import getstatusoutput, rename_keep_permissions
+from entropy.tools import rename_keep_permissions
 from entropy.i18n import _
 
 
@@ -73,6 +76,14 @@ class ConfigurationFiles(dict):
     Packages Repository. There is no need to do external locking on it.
     """
 
+    # number of threads comparing configuration files
+    AUTOMERGE_WORKERS = 4
+
+    _AUTOMERGE_COMMENT_RE = re.compile(
+        const_convert_to_rawstring("^[\t ]*#"))
+    _AUTOMERGE_SPACES_RE = re.compile(
+        const_convert_to_rawstring("\\s+"))
+
     def __init__(self, entropy_client, quiet=False):
         self._quiet = quiet
         self._entropy = entropy_client
@@ -167,10 +178,28 @@ class ConfigurationFiles(dict):
         new_path = path[len(root):]
         return os.path.normpath(new_path)
 
+    def _automerge_lines(self, path):
+        """
+        Return an iterator over the lines of path that are relevant when
+        comparing configuration files, with whitespace runs collapsed and
+        trailing whitespace removed. Blank and comment lines are skipped.
+        """
+        with open(path, "rb") as path_f:
+            for line in path_f:
+                line = line.rstrip()
+                if not line:
+                    continue
+                if self._AUTOMERGE_COMMENT_RE.match(line):
+                    continue
+                yield self._AUTOMERGE_SPACES_RE.sub(
+                    const_convert_to_rawstring(" "), line)
+
     def _load_can_automerge(self, source, destination):
         """
         Determine if source file path equals destination file path,
         thus it can be automerged.
+        Files are considered equal if they only differ in whitespace,
+        blank lines and comments (including the "# $Header:" one).
         """
         def _vanished():
             # file went away? not really needed, but...
@@ -184,41 +213,71 @@ class ConfigurationFiles(dict):
         if _vanished():
             return True
 
-        # first diff test
+        source_lines = self._automerge_lines(source)
+        destination_lines = self._automerge_lines(destination)
         try:
-            exit_st = getstatusoutput(
-                'diff -Nua "%s" "%s" | grep '
-                '"^[+-][^+-]" | grep -v \'# .Header:.*\'' % (
-                    source, destination,))[1]
-        except (OSError, IOError):
-            exit_st = 1
-        if exit_st == os.EX_OK:
-            return True
-        elif _vanished():
+            while True:
+                source_line = next(source_lines, None)
+                destination_line = next(destination_lines, None)
+                if source_line != destination_line:
+                    break
+                if source_line is None:
+                    return True
+        except (IOError, OSError) as err:
+            # missing or unreadable destination, like diff
+            # returning no differences at all.
+            const_debug_write(
+                __name__, "_load_can_automerge, error: "
+                "%s, locals: %s" % (
+                    repr(err), locals()))
             return True
-
-        # second diff test
-        try:
-            exit_st = subprocess.call(
-                'diff -Bbua "%s" "%s" | '
-                'egrep \'^[+-]\' | '
-                'egrep -v \'^[+-][\t ]*#|^--- |^\+\+\+ \' | '
-                'egrep -qv \'^[-+][\t ]*$\'' % (
-                    source, destination,), shell = True)
-        except (IOError, OSError,):
-            exit_st = 0
-        if exit_st == 1:
             return True
+        finally:
+            source_lines.close()
+            destination_lines.close()
 
         if _vanished():
             return True
         # requires manual merge
         return False
 
-    def _load_maybe_add(self, currentdir, item, filepath, number):
+    def _load_can_automerge_many(self, paths):
+        """
+        Run _load_can_automerge() against the given list of
+        (source, destination) tuples using a pool of threads.
+        Return a dict mapping each tuple to its result.
+        """
+        work = collections.deque(paths)
+        results = {}
+        results_lock = threading.Lock()
+
+        def _worker():
+            while True:
+                try:
+                    source, destination = work.popleft()
+                except IndexError:
+                    break
+                automerge = self._load_can_automerge(source, destination)
+                with results_lock:
+                    results[(source, destination)] = automerge
+
+        workers = []
+        for _idx in range(min(self.AUTOMERGE_WORKERS, len(work))):
+            worker = ParallelTask(_worker)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        for worker in workers:
+            worker.join()
+
+        return results
+
+    def _load_maybe_add(self, currentdir, item, filepath, number,
+                        can_automerge = None):
         """
         Scan given path and store config file update information
-        if needed.
+        if needed. If can_automerge is None, it is determined through
+        _load_can_automerge().
         """
         try:
             tofile = item[10:]
@@ -243,7 +302,9 @@ class ConfigurationFiles(dict):
         tofilepath = os.path.join(currentdir, tofile)
         # tofile is the target filename now
         # before adding, determine if we should automerge it
-        if self._load_can_automerge(filepath, tofilepath):
+        if can_automerge is None:
+            can_automerge = self._load_can_automerge(filepath, tofilepath)
+        if can_automerge:
             if not self._quiet:
                 self._entropy.output(
                     darkred("%s: %s") % (
@@ -293,6 +354,7 @@ class ConfigurationFiles(dict):
         Load configuration file updates reading from disk.
         """
         name_cache = set()
+        candidates = []
         client_conf_protect = self._get_config_protect()
         # NOTE: with Python 3.x we can remove const_convert...
         # and avoid using _encode_path.
@@ -331,8 +393,18 @@ class ConfigurationFiles(dict):
                         continue # skip, already done
                     name_cache.add(filepath)
 
-                    self._load_maybe_add(
-                        currentdir, item, filepath, number)
+                    candidates.append((currentdir, item, filepath, number))
+
+        # file comparisons are independent, run them in parallel
+        automerge_map = self._load_can_automerge_many(
+            [(filepath, os.path.join(currentdir, item[10:]))
+             for currentdir, item, filepath, _number in candidates])
+
+        for currentdir, item, filepath, number in candidates:
+            tofilepath = os.path.join(currentdir, item[10:])
+            self._load_maybe_add(
+                currentdir, item, filepath, number,
+                can_automerge = automerge_map[(filepath, tofilepath)])
 
     def _backup(self, dest_path):
         """
@@ -403,6 +403,10 @@ def const_default_settings(rootdir):
         'etpdatabasedumplighthashfilebz2': default_etp_dbfile+".dumplight.bz2.md5",
         'etpdatabasedumplighthashfilegzip': default_etp_dbfile+".dumplight.gz.md5",
         'etpdatabasedumplight': default_etp_dbfile+".dumplight",
+        # chunk index of the dump file above, used by delta updates
+        'etpdatabasedumplightdelta': default_etp_dbfile+".dumplight.delta",
+        # client-side copy of the last dump file, basis of delta updates
+        'etpdatabasedumplightbasis': default_etp_dbfile+".dumplight.basis",
         # expiration based server-side packages removal
 
         'etpdatabaseexpbasedpkgsrm': default_etp_dbfile+".fatscope",
@@ -490,6 +494,9 @@ def const_default_settings(rootdir):
         'packagesweakfileext': ".weak",
         # number of days after a package will be removed from mirrors
         'packagesexpirationdays': 15,
+        # per-branch manifest listing the md5 of the package files
+        # stored on mirrors, in md5sum(1) format
+        'packagesmanifestfile': "packages.md5sums",
         # name of the trigger file that would be executed
         # by equo inside triggerTools
         'triggername': "trigger",
@@ -612,6 +619,10 @@ def const_default_settings(rootdir):
 
         # entropy client packages download speed limit (in kb/sec)
         'downloadspeedlimit': None,
+        # maximum number of concurrent downloads (MultipleUrlFetcher)
+        'downloadworkers': 8,
+        # maximum number of concurrent connections to the same mirror
+        'downloadconnectionspermirror': 4,
 
         # data storage directory, useful to speed up
         # entropy client across multiple issued commands
@@ -1825,6 +1825,9 @@ class SystemSettings(Singleton, EntropyPluginStore):
             'default_repository': etpConst['officialrepositoryid'],
             'transfer_limit': etpConst['downloadspeedlimit'],
             'timeout': etpConst['default_download_timeout'],
+            'download_workers': etpConst['downloadworkers'],
+            'download_connections_per_mirror': \
+                etpConst['downloadconnectionspermirror'],
             'security_advisories_url': etpConst['securityurl'],
             'developer_repo': False,
             'differential_update': True,
@@ -1929,6 +1932,22 @@ class SystemSettings(Singleton, EntropyPluginStore):
             except ValueError:
                 return
 
+        def _down_workers(line, setting):
+            try:
+                myval = int(setting)
+            except ValueError:
+                return
+            if myval > 0:
+                data['download_workers'] = myval
+
+        def _down_connections_per_mirror(line, setting):
+            try:
+                myval = int(setting)
+            except ValueError:
+                return
+            if myval > 0:
+                data['download_connections_per_mirror'] = myval
+
         def _security_url(setting):
             data['security_advisories_url'] = setting
 
@@ -1948,6 +1967,8 @@ class SystemSettings(Singleton, EntropyPluginStore):
             # backward compatibility
             'downloadtimeout': _down_timeout,
             'download-timeout': _down_timeout,
+            'download-workers': _down_workers,
+            'download-connections-per-mirror': _down_connections_per_mirror,
             # backward compatibility
             'securityurl': _security_url,
             'security-url': _security_url,
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+
+    @author: Fabio Erculiani <lxnay@sabayon.org>
+    @contact: lxnay@sabayon.org
+    @copyright: Fabio Erculiani
+    @license: GPL-2
+
+    B{Entropy Framework repository delta update module}.
+
+    Repository dumps are split into content-defined chunks: chunks end at
+    newline bytes whose line checksum matches a mask, thus boundaries only
+    depend on the surrounding data and resynchronize right after a change,
+    no matter if bytes were inserted or removed. The server publishes the
+    chunk index of the uncompressed dump next to it, the client chunks its
+    copy of the previous dump (the basis) the same way and only fetches
+    the chunks it does not have, using byte ranges.
+
+    Index file format (text):
+
+        entropy-delta <version>
+        <file size> <file md5> <compressed file size>
+        <chunk size> <chunk digest>
+        ...
+
+    Chunk digests are truncated md5 hex digests, the whole rebuilt file is
+    verified against its full md5 anyway. The compressed file size is the
+    size of the compressed dump published next to it, so that clients can
+    tell whether fetching the changed chunks is actually cheaper.
+
+"""
+import codecs
+import hashlib
+import os
+import zlib
+
+from entropy.const import etpConst, const_convert_to_rawstring
+
+DELTA_INDEX_VERSION = 2
+# chunk boundaries are only placed after CHUNK_MIN_SIZE bytes,
+# chunks are always cut at CHUNK_MAX_SIZE bytes. Every table touched by a
+# package update costs at least a whole chunk, thus chunks must be small:
+# with CHUNK_MASK = 0xf, they average about 2KB on repository dumps.
+CHUNK_MIN_SIZE = 512
+CHUNK_MAX_SIZE = 131072
+CHUNK_MASK = 0xf
+# length of the chunk digests stored in the index (hex digits)
+CHUNK_DIGEST_LEN = 16
+
+_NEWLINE = const_convert_to_rawstring("\n")
+_EMPTY = const_convert_to_rawstring("")
+_HEADER = "entropy-delta"
+
+
+def _iter_chunks(fileobj):
+    """
+    Split the content of fileobj into content-defined chunks, yielding
+    (offset, data) tuples.
+    """
+    offset = 0
+    parts = []
+    size = 0
+    for line in iter(lambda: fileobj.readline(CHUNK_MAX_SIZE), _EMPTY):
+        parts.append(line)
+        size += len(line)
+        boundary = size >= CHUNK_MAX_SIZE
+        if not boundary and size >= CHUNK_MIN_SIZE and \
+                line.endswith(_NEWLINE):
+            boundary = (zlib.crc32(line) & CHUNK_MASK) == 0
+        if boundary:
+            yield offset, _EMPTY.join(parts)
+            offset += size
+            parts = []
+            size = 0
+    if parts:
+        yield offset, _EMPTY.join(parts)
+
+
+def build_index(path):
+    """
+    Build the chunk index of the given file.
+
+    @param path: path to file
+    @type path: string
+    @return: index dict, containing "size", "md5" and "chunks" (list of
+        (offset, size, md5) tuples)
+    @rtype: dict
+    """
+    chunks = []
+    file_md5 = hashlib.md5()
+    size = 0
+    with open(path, "rb") as path_f:
+        for offset, data in _iter_chunks(path_f):
+            file_md5.update(data)
+            chunks.append((offset, len(data),
+                hashlib.md5(data).hexdigest()[:CHUNK_DIGEST_LEN]))
+            size += len(data)
+    return {
+        'size': size,
+        'md5': file_md5.hexdigest(),
+        'chunks': chunks,
+    }
+
+
+def write_index(index, path, compressed_size):
+    """
+    Write a chunk index, as returned by build_index(), to file.
+
+    @param index: chunk index
+    @type index: dict
+    @param path: path to index file
+    @type path: string
+    @param compressed_size: size of the compressed file published
+        together with the indexed one
+    @type compressed_size: int
+    """
+    enc = etpConst['conf_encoding']
+    tmp_path = path + ".tmp"
+    with codecs.open(tmp_path, "w", encoding=enc) as index_f:
+        index_f.write("%s %d\n" % (_HEADER, DELTA_INDEX_VERSION))
+        index_f.write("%d %s %d\n" % (
+            index['size'], index['md5'], compressed_size))
+        for offset, size, digest in index['chunks']:
+            index_f.write("%d %s\n" % (size, digest))
+    os.rename(tmp_path, path)
+
+
+def read_index(path):
+    """
+    Read a chunk index file.
+
+    @param path: path to index file
+    @type path: string
+    @return: chunk index (see build_index()), also containing
+        "compressed_size"
+    @rtype: dict
+    @raise ValueError: if the index file is malformed or unsupported
+    """
+    enc = etpConst['conf_encoding']
+    with codecs.open(path, "r", encoding=enc) as index_f:
+        header = index_f.readline().split()
+        if len(header) != 2 or header[0] != _HEADER:
+            raise ValueError("invalid delta index")
+        if int(header[1]) != DELTA_INDEX_VERSION:
+            raise ValueError("unsupported delta index version")
+        size, digest, compressed_size = index_f.readline().split()
+        index = {
+            'size': int(size),
+            'md5': digest,
+            'compressed_size': int(compressed_size),
+            'chunks': [],
+        }
+        offset = 0
+        for line in index_f:
+            chunk_size, chunk_digest = line.split()
+            chunk_size = int(chunk_size)
+            index['chunks'].append((offset, chunk_size, chunk_digest))
+            offset += chunk_size
+    if offset != index['size']:
+        raise ValueError("delta index size mismatch")
+    return index
+
+
+def missing_ranges(index, basis_index):
+    """
+    Compute the byte ranges of the file described by index that are not
+    available in the basis, adjacent chunks are merged together.
+
+    @param index: chunk index of the wanted file
+    @type index: dict
+    @param basis_index: chunk index of the local basis file
+    @type basis_index: dict
+    @return: list of (offset, size) tuples
+    @rtype: list
+    """
+    available = set(x[2] for x in basis_index['chunks'])
+    ranges = []
+    for offset, size, digest in index['chunks']:
+        if digest in available:
+            continue
+        if ranges and (sum(ranges[-1]) == offset):
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + size)
+        else:
+            ranges.append((offset, size))
+    return ranges
+
+
+def reconstruct(index, basis_path, basis_index, ranges_path, out_path):
+    """
+    Rebuild the file described by index, taking chunks from the basis
+    file and from ranges_path, which contains the data of the ranges
+    returned by missing_ranges(), one after the other.
+
+    @param index: chunk index of the wanted file
+    @type index: dict
+    @param basis_path: path to the local basis file
+    @type basis_path: string
+    @param basis_index: chunk index of the local basis file
+    @type basis_index: dict
+    @param ranges_path: path to the fetched ranges data, can be None if
+        there are no missing ranges
+    @type ranges_path: string
+    @param out_path: path to the rebuilt file
+    @type out_path: string
+    @return: True, if the rebuilt file matches the index checksum
+    @rtype: bool
+    """
+    local = {}
+    for offset, size, digest in basis_index['chunks']:
+        local.setdefault(digest, (offset, size))
+
+    file_md5 = hashlib.md5()
+    ranges_f = None
+    try:
+        if ranges_path is not None:
+            ranges_f = open(ranges_path, "rb")
+        with open(basis_path, "rb") as basis_f:
+            with open(out_path, "wb") as out_f:
+                for offset, size, digest in index['chunks']:
+                    basis_chunk = local.get(digest)
+                    if basis_chunk is not None:
+                        basis_f.seek(basis_chunk[0])
+                        data = basis_f.read(basis_chunk[1])
+                    elif ranges_f is not None:
+                        data = ranges_f.read(size)
+                    else:
+                        return False
+                    if len(data) != size:
+                        return False
+                    file_md5.update(data)
+                    out_f.write(data)
+    finally:
+        if ranges_f is not None:
+            ranges_f.close()
+
+    return file_md5.hexdigest() == index['md5']
@@ -508,6 +508,12 @@ class EntropyMySQLRepository(EntropySQLRepository):
                     PRIMARY KEY(setting_name)
                 );
 
+                CREATE TABLE reversedependencies (
+                    idpackage INTEGER(10) UNSIGNED NOT NULL,
+                    iddependency INTEGER(10) UNSIGNED NOT NULL,
+                    PRIMARY KEY(idpackage, iddependency)
+                );
+
             """
             return data
 
@@ -1980,6 +1980,48 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
 
         return data
 
+    def getPackageDataMany(self, package_ids, get_content = True,
+            content_insert_formatted = False, get_changelog = True,
+            get_content_safety = True, fields = None):
+        """
+        Reconstruct all the package metadata belonging to the provided
+        package identifiers. This is the batched version of
+        getPackageData(), subclasses can reimplement it in order to
+        retrieve metadata for several packages at once.
+
+        @param package_ids: list of package indentifiers
+        @type package_ids: list
+        @keyword get_content:
+        @type get_content: bool
+        @keyword content_insert_formatted:
+        @type content_insert_formatted: bool
+        @keyword get_changelog:  return ChangeLog text metadatum or None
+        @type get_changelog: bool
+        @keyword get_content_safety: return content_safety metadata or {}
+        @type get_content_safety: bool
+        @keyword fields: if not None, only return the given metadata keys
+            (see getPackageData() for the list of available keys)
+        @type fields: iterable
+        @return: dict mapping package identifiers to the package metadata
+            in getPackageData() dict() form, or None if the package is
+            not available
+        @rtype: dict
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+
+        result = {}
+        for package_id in package_ids:
+            data = self.getPackageData(
+                package_id, get_content = get_content,
+                content_insert_formatted = content_insert_formatted,
+                get_changelog = get_changelog,
+                get_content_safety = get_content_safety)
+            if data is not None and fields is not None:
+                data = dict((k, v) for k, v in data.items() if k in fields)
+            result[package_id] = data
+        return result
+
     def getPackageXmlData(self, package_ids, get_content=True,
                           get_changelog=True, get_content_safety=True):
         """
@@ -2010,11 +2052,13 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
         package_changelogs_id = 1
         package_changelogs = {}
 
+        package_data = self.getPackageDataMany(
+            package_ids, get_content = get_content,
+            get_changelog = get_changelog,
+            get_content_safety = get_content_safety)
+
         for package_id in package_ids:
-            data = self.getPackageData(
-                package_id, get_content = get_content,
-                get_changelog = get_changelog,
-                get_content_safety = get_content_safety)
+            data = package_data[package_id]
 
             package = doc.createElement("package")
             package.setAttribute("id", "id-%d" % (package_id,))
@@ -3848,6 +3892,27 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
         """
         raise NotImplementedError()
 
+    def isFileAvailableMany(self, paths):
+        """
+        Return the packages owning the given file paths. This is the
+        batched version of isFileAvailable(path, get_id = True),
+        subclasses can reimplement it in order to look up all the paths
+        at once.
+
+        @param paths: iterable of paths to files or directories
+        @type paths: iterable
+        @return: dict mapping owned paths to a frozenset of the package
+            identifiers owning them. Paths not owned by any package are
+            not part of the dict.
+        @rtype: dict
+        """
+        owners = {}
+        for path in paths:
+            package_ids = self.isFileAvailable(path, get_id = True)
+            if package_ids:
+                owners[path] = package_ids
+        return owners
+
     def resolveNeeded(self, needed, elfclass = -1, extended = False):
         """
         Resolve NEEDED ELF entry (a library name) to package_ids owning given
@@ -4482,6 +4547,17 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
         """
         raise NotImplementedError()
 
+    def listAllFilesIter(self):
+        """
+        Return an iterator over all the file paths owned by packages stored
+        in repository, sorted by path. Duplicates are not removed. Unlike
+        listAllFiles(), the whole list is never kept in memory.
+
+        @return: iterator of file paths
+        @rtype: iterator
+        """
+        raise NotImplementedError()
+
     def listAllCategories(self, order_by = None):
         """
         List all categories available in repository.
@@ -4696,6 +4772,17 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
         """
         raise NotImplementedError()
 
+    def exportRepositorySnapshot(self, dumpfile):
+        """
+        Export running database to file, using the binary snapshot format
+        (see entropy.db.snapshot). Snapshots can be loaded back through
+        importRepository().
+
+        @param dumpfile: dump file object to write to
+        @type dumpfile: file object (hint: open(path, "wb"))
+        """
+        raise NotImplementedError()
+
     def checksum(self, do_order = False, strict = True,
                  include_signatures = False, include_dependencies = False):
         """
@@ -5046,71 +5133,29 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
                 if rc == 0:
                     return data, rc
 
-        matchTag = entropy.dep.dep_gettag(atom)
-        try:
-            matchUse = entropy.dep.dep_getusedeps(atom)
-        except InvalidAtom:
-            matchUse = ()
-        atomSlot = entropy.dep.dep_getslot(atom)
-        matchRevision = entropy.dep.dep_get_entropy_revision(atom)
+        parsed_atom = entropy.dep.parse_atom(atom)
+        matchTag = parsed_atom.tag
+        matchUse = parsed_atom.use
+        atomSlot = parsed_atom.slot
+        matchRevision = parsed_atom.revision
         if isinstance(matchRevision, int):
             if matchRevision < 0:
                 matchRevision = None
 
-        # use match
-        scan_atom = entropy.dep.remove_usedeps(atom)
-        # tag match
-        scan_atom = entropy.dep.remove_tag(scan_atom)
-
-        # slot match
-        scan_atom = entropy.dep.remove_slot(scan_atom)
         if (matchSlot is None) and (atomSlot is not None):
             matchSlot = atomSlot
 
-        # revision match
-        scan_atom = entropy.dep.remove_entropy_revision(scan_atom)
-
-        direction = ''
-        justname = True
-        pkgkey = ''
-        pkgname = ''
-        pkgcat = ''
-        pkgversion = ''
-        stripped_atom = ''
+        direction = parsed_atom.direction
+        justname = parsed_atom.justname
+        pkgkey = parsed_atom.match_key
+        pkgname = parsed_atom.name
+        pkgcat = parsed_atom.category
+        pkgversion = parsed_atom.version
+        stripped_atom = parsed_atom.stripped_atom
         found_ids = []
         default_package_ids = None
 
-        if scan_atom:
-
-            while True:
-                # check for direction
-                scan_cpv = entropy.dep.dep_getcpv(scan_atom)
-                stripped_atom = scan_cpv
-                if scan_atom.endswith("*"):
-                    stripped_atom += "*"
-                direction = scan_atom[0:-len(stripped_atom)]
-
-                justname = entropy.dep.isjustname(scan_cpv)
-                pkgkey = stripped_atom
-                if justname == 0:
-                    # get version
-                    data = entropy.dep.catpkgsplit(scan_cpv)
-                    if data is None:
-                        break # badly formatted
-                    wildcard = ""
-                    if scan_atom.endswith("*"):
-                        wildcard = "*"
-                    pkgversion = data[2]+wildcard+"-"+data[3]
-                    pkgkey = entropy.dep.dep_getkey(stripped_atom)
-
-                splitkey = pkgkey.split("/")
-                if (len(splitkey) == 2):
-                    pkgcat, pkgname = splitkey
-                else:
-                    pkgcat, pkgname = "null", splitkey[0]
-
-                break
-
+        if parsed_atom.scan_atom:
 
             # IDs found in the database that match our search
             try:
@@ -5513,7 +5558,7 @@ class EntropyRepositoryBase(TextInterface, EntropyRepositoryPluginStore):
         if self._caching:
             ck_sum = self.checksum(strict = False)
             hash_str = self.__atomMatch_gen_hash_str(args)
-            cached = entropy.dump.loadobj(
+            cached = self._cacher.pop(
                 "%s/%s/%s_%s_%s" % (
                     self.__db_match_cache_key,
                     self.name,
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+
+    @author: Fabio Erculiani <lxnay@sabayon.org>
+    @contact: lxnay@sabayon.org
+    @copyright: Fabio Erculiani
+    @license: GPL-2
+
+    B{Entropy Framework repository binary snapshot module}.
+
+    A repository snapshot is a versioned, binary alternative to the SQL text
+    dump used by EAPI2 repository updates. After a fixed header, the
+    snapshot is a sequence of length-prefixed, zlib compressed records:
+
+        - "S": table schema statement (CREATE TABLE ...)
+        - "C": table name and columns, rows records that follow belong
+               to this table
+        - "R": block of rows, stored column by column
+        - "X": deferred schema statement (indexes, triggers, views), to be
+               executed after all the data has been loaded
+        - "E": end of snapshot, tables and rows counters
+
+    Column values are typed (NULL, integer, float, text, blob), so that
+    the SQLite storage class of every value is preserved. Columns made of
+    integers only or of text only are packed without per-value tags.
+    Text is stored as raw UTF-8, exactly as found in the database, and it
+    is preserved byte by byte, even when it is not valid UTF-8.
+
+"""
+import struct
+import zlib
+
+from entropy.const import const_is_python3, const_convert_to_rawstring, \
+    const_get_buffer, const_get_int
+from entropy.db.exceptions import DataError
+
+SNAPSHOT_MAGIC = const_convert_to_rawstring("ETPSNAP\0")
+SNAPSHOT_VERSION = 1
+# rows per "R" record
+SNAPSHOT_BLOCK_ROWS = 4096
+
+_HEADER = struct.Struct(">H")
+_RECORD = struct.Struct(">cI")
+_COUNT = struct.Struct(">I")
+_END = struct.Struct(">IQ")
+_INT = struct.Struct(">q")
+_FLOAT = struct.Struct(">d")
+
+_REC_SCHEMA = const_convert_to_rawstring("S")
+_REC_COLUMNS = const_convert_to_rawstring("C")
+_REC_ROWS = const_convert_to_rawstring("R")
+_REC_DEFERRED = const_convert_to_rawstring("X")
+_REC_END = const_convert_to_rawstring("E")
+
+_VAL_NULL = const_convert_to_rawstring("N")
+_VAL_INT = const_convert_to_rawstring("I")
+_VAL_FLOAT = const_convert_to_rawstring("F")
+_VAL_TEXT = const_convert_to_rawstring("T")
+_VAL_BLOB = const_convert_to_rawstring("B")
+
+_SEP = const_convert_to_rawstring("\0")
+_EMPTY = const_convert_to_rawstring("")
+
+if const_is_python3():
+    _TEXT_TYPES = (str,)
+else:
+    _TEXT_TYPES = (unicode,)
+_INT_TYPES = const_get_int()
+
+# column block kinds
+_COL_INT = const_convert_to_rawstring("i")
+_COL_TEXT = const_convert_to_rawstring("t")
+_COL_MIXED = const_convert_to_rawstring("m")
+
+
+class SnapshotText(bytes):
+
+    """
+    Raw, UTF-8 encoded, SQLite TEXT value. Used as connection text_factory
+    while exporting, so that text is stored in snapshots without being
+    decoded and encoded again, and it is not mistaken for a BLOB.
+    When reading, it wraps text that cannot be decoded (Python 3.x only),
+    see SnapshotReader.
+    """
+
+
+def is_snapshot(path):
+    """
+    Return whether the given file is a repository binary snapshot.
+
+    @param path: path to file
+    @type path: string
+    @return: True, if file starts with the snapshot magic
+    @rtype: bool
+    """
+    with open(path, "rb") as snap_f:
+        return snap_f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+
+
+def _encode_column(values):
+    """
+    Encode a list of column values into a bytes string. Columns made of
+    integers only or of text only are packed at once, the others are
+    encoded value by value, together with their type.
+    """
+    count = len(values)
+    kinds = set(x.__class__ for x in values)
+
+    if all(issubclass(x, _INT_TYPES) for x in kinds) and \
+            bool not in kinds:
+        return _COL_INT + struct.pack(">%dq" % (count,), *values)
+
+    if kinds == set([SnapshotText]):
+        return _COL_TEXT + struct.pack(">%dI" % (count,),
+            *[len(x) for x in values]) + _EMPTY.join(values)
+
+    parts = [_COL_MIXED]
+    append = parts.append
+    for value in values:
+        if value is None:
+            append(_VAL_NULL)
+        elif isinstance(value, bool) or isinstance(value, _INT_TYPES):
+            append(_VAL_INT)
+            append(_INT.pack(value))
+        elif isinstance(value, float):
+            append(_VAL_FLOAT)
+            append(_FLOAT.pack(value))
+        elif isinstance(value, (SnapshotText,) + _TEXT_TYPES):
+            if not isinstance(value, SnapshotText):
+                value = value.encode("utf-8")
+            append(_VAL_TEXT)
+            append(_COUNT.pack(len(value)))
+            append(value)
+        else:
+            # buffer, memoryview, bytes
+            data = bytes(value)
+            append(_VAL_BLOB)
+            append(_COUNT.pack(len(data)))
+            append(data)
+    return _EMPTY.join(parts)
+
+
+def _text_value(value):
+    """
+    Return a value that sqlite3 binds as TEXT, given raw UTF-8 text.
+    Text that is not valid UTF-8 is returned as SnapshotText, it must be
+    bound through "CAST(? AS TEXT)".
+    """
+    if const_is_python3():
+        try:
+            return value.decode("utf-8")
+        except UnicodeDecodeError:
+            return SnapshotText(value)
+    # Python 2.x str objects are bound as TEXT, byte by byte
+    return value
+
+
+def _decode_column(data, offset, count):
+    """
+    Decode count column values from data, starting at offset.
+    Return the list of values, the new offset and whether any of the
+    values is a SnapshotText.
+    """
+    kind = data[offset:offset + 1]
+    offset += 1
+
+    if kind == _COL_INT:
+        values = list(struct.unpack_from(">%dq" % (count,), data, offset))
+        return values, offset + (_INT.size * count), False
+
+    if kind == _COL_TEXT:
+        lengths = struct.unpack_from(">%dI" % (count,), data, offset)
+        offset += _COUNT.size * count
+        values = []
+        append = values.append
+        for length in lengths:
+            append(_text_value(data[offset:offset + length]))
+            offset += length
+        return values, offset, SnapshotText in set(
+            x.__class__ for x in values)
+
+    if kind != _COL_MIXED:
+        raise DataError("invalid snapshot column kind: %r" % (kind,))
+
+    buf = const_get_buffer()
+    values = []
+    append = values.append
+    for _idx in range(count):
+        tag = data[offset:offset + 1]
+        offset += 1
+        if tag == _VAL_NULL:
+            append(None)
+        elif tag == _VAL_INT:
+            append(_INT.unpack_from(data, offset)[0])
+            offset += _INT.size
+        elif tag == _VAL_FLOAT:
+            append(_FLOAT.unpack_from(data, offset)[0])
+            offset += _FLOAT.size
+        elif tag in (_VAL_TEXT, _VAL_BLOB):
+            length = _COUNT.unpack_from(data, offset)[0]
+            offset += _COUNT.size
+            value = data[offset:offset + length]
+            offset += length
+            if tag == _VAL_TEXT:
+                append(_text_value(value))
+            else:
+                append(buf(value))
+        else:
+            raise DataError("invalid snapshot value type: %r" % (tag,))
+    return values, offset, SnapshotText in set(x.__class__ for x in values)
+
+
+class SnapshotWriter(object):
+
+    """
+    Streaming repository snapshot writer. Rows are buffered in blocks of
+    SNAPSHOT_BLOCK_ROWS and written to the file object as soon as a block
+    is complete, so memory usage does not depend on the table size.
+    """
+
+    def __init__(self, fileobj, block_rows = SNAPSHOT_BLOCK_ROWS,
+                 compress_level = 1):
+        """
+        SnapshotWriter constructor.
+
+        @param fileobj: file object to write to (opened in binary mode)
+        @type fileobj: file object
+        @keyword block_rows: number of rows per rows record
+        @type block_rows: int
+        @keyword compress_level: zlib compression level of records
+        @type compress_level: int
+        """
+        self._file = fileobj
+        self._block_rows = block_rows
+        self._compress_level = compress_level
+        self._columns = None
+        self._rows = []
+        self._tables = 0
+        self._total_rows = 0
+        self._file.write(SNAPSHOT_MAGIC + _HEADER.pack(SNAPSHOT_VERSION))
+
+    def _write_record(self, rec_type, payload):
+        data = zlib.compress(payload, self._compress_level)
+        self._file.write(_RECORD.pack(rec_type, len(data)))
+        self._file.write(data)
+
+    def _flush_rows(self):
+        if not self._rows:
+            return
+        payload = [_COUNT.pack(len(self._rows))]
+        payload.extend(_encode_column(list(x)) for x in zip(*self._rows))
+        self._write_record(_REC_ROWS, _EMPTY.join(payload))
+        self._rows = []
+
+    def add_schema(self, sql):
+        """
+        Add a table schema statement.
+
+        @param sql: CREATE TABLE statement
+        @type sql: string
+        """
+        self._flush_rows()
+        self._write_record(_REC_SCHEMA, sql.encode("utf-8"))
+
+    def add_table(self, name, columns):
+        """
+        Start the data section of a table, rows added afterwards belong
+        to this table.
+
+        @param name: table name
+        @type name: string
+        @param columns: table column names
+        @type columns: list
+        """
+        self._flush_rows()
+        self._columns = list(columns)
+        self._tables += 1
+        payload = _SEP.join(x.encode("utf-8") for x in [name] + self._columns)
+        self._write_record(_REC_COLUMNS, payload)
+
+    def add_rows(self, rows):
+        """
+        Add rows to the current table.
+
+        @param rows: iterable of row tuples
+        @type rows: iterable
+        """
+        if self._columns is None:
+            raise AttributeError("add_table() must be called first")
+        for row in rows:
+            self._rows.append(row)
+            self._total_rows += 1
+            if len(self._rows) >= self._block_rows:
+                self._flush_rows()
+
+    def add_deferred(self, sql):
+        """
+        Add a schema statement that must be executed after all the data
+        has been loaded (indexes, triggers, views).
+
+        @param sql: SQL statement
+        @type sql: string
+        """
+        self._flush_rows()
+        self._write_record(_REC_DEFERRED, sql.encode("utf-8"))
+
+    def close(self):
+        """
+        Terminate the snapshot. The underlying file object is not closed.
+        """
+        self._flush_rows()
+        self._write_record(_REC_END,
+            _END.pack(self._tables, self._total_rows))
+        if hasattr(self._file, 'flush'):
+            self._file.flush()
+
+
+class SnapshotReader(object):
+
+    """
+    Streaming repository snapshot reader. Iterating over it yields
+    (kind, data) tuples, where kind is one of "schema", "table", "rows",
+    "rawrows", "deferred". For "table", data is a (name, columns) tuple,
+    for "rows" and "rawrows" a list of row tuples, for the others the SQL
+    statement. "rawrows" blocks contain SnapshotText values (text that is
+    not valid UTF-8, Python 3.x only), which must be bound through
+    "CAST(? AS TEXT)" to be stored as they were.
+    DataError is raised if the snapshot is corrupted or truncated.
+    """
+
+    def __init__(self, fileobj):
+        """
+        SnapshotReader constructor.
+
+        @param fileobj: file object to read from (opened in binary mode)
+        @type fileobj: file object
+        @raise DataError: if fileobj is not a supported snapshot
+        """
+        self._file = fileobj
+        magic = self._file.read(len(SNAPSHOT_MAGIC))
+        if magic != SNAPSHOT_MAGIC:
+            raise DataError("not a repository snapshot")
+        version = self._read_exactly(_HEADER.size)
+        version = _HEADER.unpack(version)[0]
+        if version != SNAPSHOT_VERSION:
+            raise DataError(
+                "unsupported repository snapshot version: %s" % (version,))
+
+    def _read_exactly(self, size):
+        data = self._file.read(size)
+        if len(data) != size:
+            raise DataError("repository snapshot is truncated")
+        return data
+
+    def __iter__(self):
+        columns = None
+        tables = 0
+        total_rows = 0
+
+        while True:
+            rec_type, length = _RECORD.unpack(
+                self._read_exactly(_RECORD.size))
+            try:
+                payload = zlib.decompress(self._read_exactly(length))
+            except zlib.error as err:
+                raise DataError("repository snapshot is corrupted: %s" % (
+                    err,))
+
+            if rec_type == _REC_SCHEMA:
+                yield "schema", payload.decode("utf-8")
+
+            elif rec_type == _REC_COLUMNS:
+                items = [x.decode("utf-8") for x in payload.split(_SEP)]
+                columns = items[1:]
+                tables += 1
+                yield "table", (items[0], columns)
+
+            elif rec_type == _REC_ROWS:
+                if columns is None:
+                    raise DataError("repository snapshot rows without table")
+                count = _COUNT.unpack_from(payload, 0)[0]
+                offset = _COUNT.size
+                data = []
+                raw = False
+                for _col in columns:
+                    values, offset, raw_col = _decode_column(
+                        payload, offset, count)
+                    data.append(values)
+                    raw = raw or raw_col
+                total_rows += count
+                if raw:
+                    yield "rawrows", list(zip(*data))
+                else:
+                    yield "rows", list(zip(*data))
+
+            elif rec_type == _REC_DEFERRED:
+                yield "deferred", payload.decode("utf-8")
+
+            elif rec_type == _REC_END:
+                if _END.unpack(payload) != (tables, total_rows):
+                    raise DataError("repository snapshot counters mismatch")
+                return
+
+            else:
+                raise DataError("invalid snapshot record type: %r" % (
+                    rec_type,))
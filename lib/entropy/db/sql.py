@@ -590,6 +590,12 @@ class EntropySQLRepository(EntropyRepositoryBase):
                     PRIMARY KEY(setting_name)
                 );
 
+                CREATE TABLE reversedependencies (
+                    idpackage INTEGER,
+                    iddependency INTEGER,
+                    PRIMARY KEY(idpackage, iddependency)
+                );
+
             """
             return data
 
@@ -615,6 +621,18 @@ class EntropySQLRepository(EntropyRepositoryBase):
     # Generic repository name to use when none is given.
     GENERIC_NAME = "__generic__"
 
+    # settings table key storing the stamp of a valid
+    # "reversedependencies" index. Bump the version string
+    # whenever the index semantics change.
+    _REVERSE_DEPENDENCIES_SETTING = "_reverse_dependencies_index"
+    _REVERSE_DEPENDENCIES_VERSION = "1"
+
+    # settings table keys storing the repository generation counter
+    # and the rolling digest returned by checksum(), see
+    # _bumpChecksumGeneration().
+    _CHECKSUM_GENERATION_SETTING = "_checksum_generation"
+    _CHECKSUM_DIGEST_SETTING = "_checksum_digest"
+
     def __init__(self, db, read_only, skip_checks, indexing,
                  xcache, temporary, name, direct=False, cache_policy=None):
         # connection and cursor automatic cleanup support
@@ -1023,6 +1041,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         Reimplemented from EntropyRepositoryBase.
         """
         self._connection().rollback()
+        # settings may have been changed by the rolled back transaction
+        self._settings_cache.clear()
 
     def initializeRepository(self):
         """
@@ -1387,6 +1407,17 @@ class EntropySQLRepository(EntropyRepositoryBase):
         # ensure that cache is clear even here
         self.clearCache()
 
+        checksum_data = [package_id]
+        for table in ("baseinfo", "extrainfo"):
+            cur = self._cursor().execute("""
+            SELECT * FROM %s WHERE idpackage = ?
+            """ % (table,), (package_id,))
+            checksum_data.append(cur.fetchone())
+        if pkg_data.get('signatures'):
+            checksum_data.append(pkg_data['signatures'].get('sha1'))
+            checksum_data.append(pkg_data['signatures'].get('gpg'))
+        self._bumpChecksumGeneration("addPackage", *checksum_data)
+
         return package_id
 
     def addPackage(self, pkg_data, revision = -1, package_id = None,
@@ -1396,16 +1427,18 @@ class EntropySQLRepository(EntropyRepositoryBase):
         Needs to call superclass method.
         """
         try:
+            index_valid = self._isReverseDependenciesIndexValid()
             package_id = self._addPackage(pkg_data, revision = revision,
                 package_id = package_id,
                 formatted_content = formatted_content)
+            self._addPackageReverseDependencies(package_id, index_valid)
             super(EntropySQLRepository, self).addPackage(
                 pkg_data, revision = revision,
                 package_id = package_id,
                 formatted_content = formatted_content)
             return package_id
         except:
-            self._connection().rollback()
+            self.rollback()
             raise
 
     def removePackage(self, package_id, from_add_package = False):
@@ -1419,10 +1452,33 @@ class EntropySQLRepository(EntropyRepositoryBase):
                 package_id, from_add_package = from_add_package)
             self.clearCache()
 
-            return self._removePackage(package_id,
+            index_valid = self._isReverseDependenciesIndexValid()
+            affected_ids = None
+            if index_valid:
+                affected_ids = self._retrieveReverseDependencyIds(
+                    package_id)
+                cur = self._cursor().execute("""
+                SELECT iddependency FROM dependencies WHERE idpackage = ?
+                """, (package_id,))
+                affected_ids |= self._cur2frozenset(cur)
+
+            outcome = self._removePackage(package_id,
                 from_add_package = from_add_package)
+            self._bumpChecksumGeneration("removePackage", package_id)
+
+            if index_valid:
+                self._cursor().execute("""
+                DELETE FROM reversedependencies WHERE idpackage = ?
+                """, (package_id,))
+                self._updateReverseDependencies(affected_ids)
+                self._setReverseDependenciesIndexValid()
+            elif not from_add_package:
+                # addPackage() takes care of it otherwise
+                self._generateReverseDependenciesIndex()
+
+            return outcome
         except:
-            self._connection().rollback()
+            self.rollback()
             raise
 
     def _removePackage(self, package_id, from_add_package = False):
@@ -1563,6 +1619,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE extrainfo SET datecreation = ? WHERE idpackage = ?
         """, (str(date), package_id,))
+        self._bumpChecksumGeneration(
+            "setCreationDate", package_id, str(date))
 
     def setDigest(self, package_id, digest):
         """
@@ -1571,6 +1629,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE extrainfo SET digest = ? WHERE idpackage = ?
         """, (digest, package_id,))
+        self._bumpChecksumGeneration("setDigest", package_id, digest)
 
     def setSignatures(self, package_id, sha1, sha256, sha512, gpg = None):
         """
@@ -1580,6 +1639,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
         UPDATE packagesignatures SET sha1 = ?, sha256 = ?, sha512 = ?,
         gpg = ? WHERE idpackage = ?
         """, (sha1, sha256, sha512, gpg, package_id))
+        self._bumpChecksumGeneration("setSignatures", package_id, sha1, gpg)
 
     def setDownloadURL(self, package_id, url):
         """
@@ -1593,6 +1653,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE extrainfo SET download = ? WHERE idpackage = ?
         """, (url, package_id,))
+        self._bumpChecksumGeneration("setDownloadURL", package_id, url)
 
     def setCategory(self, package_id, category):
         """
@@ -1601,6 +1662,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE baseinfo SET category = ? WHERE idpackage = ?
         """, (category, package_id,))
+        self._bumpChecksumGeneration("setCategory", package_id, category)
+        self._invalidateReverseDependenciesIndex()
 
     def setCategoryDescription(self, category, description_data):
         """
@@ -1622,6 +1685,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE baseinfo SET name = ? WHERE idpackage = ?
         """, (name, package_id,))
+        self._bumpChecksumGeneration("setName", package_id, name)
+        self._invalidateReverseDependenciesIndex()
 
     def setDependency(self, iddependency, dependency):
         """
@@ -1631,6 +1696,9 @@ class EntropySQLRepository(EntropyRepositoryBase):
         UPDATE dependenciesreference SET dependency = ?
         WHERE iddependency = ?
         """, (dependency, iddependency,))
+        self._bumpChecksumGeneration(
+            "setDependency", iddependency, dependency)
+        self._invalidateReverseDependenciesIndex()
 
     def setAtom(self, package_id, atom):
         """
@@ -1639,6 +1707,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE baseinfo SET atom = ? WHERE idpackage = ?
         """, (atom, package_id,))
+        self._bumpChecksumGeneration("setAtom", package_id, atom)
+        self._invalidateReverseDependenciesIndex()
 
     def setSlot(self, package_id, slot):
         """
@@ -1647,6 +1717,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE baseinfo SET slot = ? WHERE idpackage = ?
         """, (slot, package_id,))
+        self._bumpChecksumGeneration("setSlot", package_id, slot)
+        self._invalidateReverseDependenciesIndex()
 
     def setRevision(self, package_id, revision):
         """
@@ -1655,6 +1727,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE baseinfo SET revision = ? WHERE idpackage = ?
         """, (revision, package_id,))
+        self._bumpChecksumGeneration("setRevision", package_id, revision)
+        self._invalidateReverseDependenciesIndex()
 
     def removeDependencies(self, package_id):
         """
@@ -1663,6 +1737,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         DELETE FROM dependencies WHERE idpackage = ?
         """, (package_id,))
+        self._bumpChecksumGeneration("removeDependencies", package_id)
+        self._invalidateReverseDependenciesIndex()
 
     def insertDependencies(self, package_id, depdata):
         """
@@ -1688,9 +1764,12 @@ class EntropySQLRepository(EntropyRepositoryBase):
 
             return deps
 
+        deps = insert_list()
         self._cursor().executemany("""
         INSERT INTO dependencies VALUES (?, ?, ?)
-        """, insert_list())
+        """, deps)
+        self._bumpChecksumGeneration("insertDependencies", package_id, deps)
+        self._invalidateReverseDependenciesIndex()
 
     def removeConflicts(self, package_id):
         """
@@ -2416,10 +2495,12 @@ class EntropySQLRepository(EntropyRepositoryBase):
         """
         Cleanup "dependencies" metadata unused references to save space.
         """
-        self._cursor().execute("""
+        cur = self._cursor().execute("""
         DELETE FROM dependenciesreference
         WHERE iddependency NOT IN (SELECT iddependency FROM dependencies)
         """)
+        if cur.rowcount:
+            self._bumpChecksumGeneration("cleanupDependencies")
 
     def getFakeSpmUid(self):
         """
@@ -2582,6 +2663,480 @@ class EntropySQLRepository(EntropyRepositoryBase):
         cur = self._cursor().execute(sql, (package_id,))
         return cur.fetchone()
 
+    # Maximum number of values bound to a single "IN (...)" clause
+    _IN_CLAUSE_CHUNK = 256
+
+    def _fetchMany(self, sql, values):
+        """
+        Execute the given query for every chunk of values and return
+        all the fetched rows. The query must contain a single %s
+        placeholder, used for the "IN (...)" clause values.
+
+        @param sql: SQL query
+        @type sql: string
+        @param values: list of values
+        @type values: list
+        @return: list of rows
+        @rtype: list
+        """
+        rows = []
+        chunk_size = self._IN_CLAUSE_CHUNK
+        for index in range(0, len(values), chunk_size):
+            chunk = values[index:index + chunk_size]
+            cur = self._cursor().execute(
+                sql % (", ".join(["?"] * len(chunk)),), chunk)
+            rows.extend(cur)
+        return rows
+
+    def getPackageDataMany(self, package_ids, get_content = True,
+            content_insert_formatted = False, get_changelog = True,
+            get_content_safety = True, fields = None):
+        """
+        Reimplemented from EntropyRepositoryBase.
+        Every table is read once per chunk of package identifiers.
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+
+        def _want(*keys):
+            if fields is None:
+                return True
+            for key in keys:
+                if key in fields:
+                    return True
+            return False
+
+        def _first(sql, default = None):
+            # emulate the "LIMIT 1" of the single package queries
+            mapping = {}
+            for row in self._fetchMany(sql, pkg_ids):
+                if row[0] not in mapping:
+                    mapping[row[0]] = row[1]
+            return dict((x, mapping.get(x, default)) for x in pkg_ids)
+
+        def _set(sql, row_size = 1):
+            mapping = dict((x, set()) for x in pkg_ids)
+            if row_size == 1:
+                for row in self._fetchMany(sql, pkg_ids):
+                    mapping[row[0]].add(row[1])
+            else:
+                for row in self._fetchMany(sql, pkg_ids):
+                    mapping[row[0]].add(tuple(row[1:]))
+            return dict((x, frozenset(y)) for x, y in mapping.items())
+
+        def _list(sql):
+            mapping = dict((x, []) for x in pkg_ids)
+            for row in self._fetchMany(sql, pkg_ids):
+                mapping[row[0]].append(tuple(row[1:]))
+            return mapping
+
+        def _has_table(table):
+            try:
+                return self._doesTableExist(table)
+            except NotImplementedError:
+                return True
+
+        result = dict((x, None) for x in package_ids)
+        base_data = {}
+        for row in self._fetchMany("""
+        SELECT
+            baseinfo.idpackage,
+            baseinfo.atom,
+            baseinfo.name,
+            baseinfo.version,
+            baseinfo.versiontag,
+            extrainfo.description,
+            baseinfo.category,
+            extrainfo.chost,
+            extrainfo.cflags,
+            extrainfo.cxxflags,
+            extrainfo.homepage,
+            baseinfo.license,
+            baseinfo.branch,
+            extrainfo.download,
+            extrainfo.digest,
+            baseinfo.slot,
+            baseinfo.etpapi,
+            extrainfo.datecreation,
+            extrainfo.size,
+            baseinfo.revision
+        FROM
+            baseinfo,
+            extrainfo
+        WHERE
+            baseinfo.idpackage IN (%s)
+            AND baseinfo.idpackage = extrainfo.idpackage
+        """, list(set(package_ids))):
+            base_data.setdefault(row[0], row[1:])
+
+        pkg_ids = list(base_data.keys())
+        if not pkg_ids:
+            return result
+
+        content = dict((x, {}) for x in pkg_ids)
+        if get_content and _want("content"):
+            if content_insert_formatted:
+                content = _list("""
+                SELECT idpackage, idpackage, file, type FROM content
+                WHERE idpackage IN (%s)""")
+                content = dict((x, tuple(y)) for x, y in content.items())
+            else:
+                for package_id, path, ftype in self._fetchMany("""
+                SELECT idpackage, file, type FROM content
+                WHERE idpackage IN (%s)""", pkg_ids):
+                    content[package_id][path] = ftype
+
+        sources = {}
+        if _want("sources", "mirrorlinks"):
+            sources = _set("""
+            SELECT sources.idpackage, sourcesreference.source
+            FROM sources, sourcesreference
+            WHERE sources.idpackage IN (%s) AND
+            sources.idsource = sourcesreference.idsource""")
+
+        mirror_data = {}
+        if _want("mirrorlinks"):
+            mirrornames = set()
+            for package_sources in sources.values():
+                for x in package_sources:
+                    if x.startswith("mirror://"):
+                        mirrornames.add(x.split("/")[2])
+            mirror_data = dict((x, set()) for x in mirrornames)
+            for mirrorname, mirrorlink in self._fetchMany("""
+            SELECT mirrorname, mirrorlink FROM mirrorlinks
+            WHERE mirrorname IN (%s)""", sorted(mirrornames)):
+                mirror_data[mirrorname].add(mirrorlink)
+
+        signatures = {}
+        if _want("signatures"):
+            for row in self._fetchMany("""
+            SELECT idpackage, sha1, sha256, sha512, gpg
+            FROM packagesignatures WHERE idpackage IN (%s)""", pkg_ids):
+                signatures.setdefault(row[0], row[1:])
+
+        changelogs = {}
+        if get_changelog and _want("changelog"):
+            changelogs = _first("""
+            SELECT baseinfo.idpackage, packagechangelogs.changelog
+            FROM packagechangelogs, baseinfo
+            WHERE baseinfo.idpackage IN (%s) AND
+            packagechangelogs.category = baseinfo.category AND
+            packagechangelogs.name = baseinfo.name""")
+
+        content_safety = dict((x, {}) for x in pkg_ids)
+        if get_content_safety and _want("content_safety") and \
+                _has_table("contentsafety"):
+            for package_id, path, sha256, mtime in self._fetchMany("""
+            SELECT idpackage, file, sha256, mtime FROM contentsafety
+            WHERE idpackage IN (%s)""", pkg_ids):
+                content_safety[package_id][path] = {
+                    'sha256': sha256, 'mtime': mtime}
+
+        deps = {}
+        if _want("pkg_dependencies"):
+            deps = _list("""
+            SELECT dependencies.idpackage, dependenciesreference.dependency,
+                dependencies.type
+            FROM dependencies, dependenciesreference
+            WHERE dependencies.idpackage IN (%s) AND
+            dependencies.iddependency = dependenciesreference.iddependency
+            """)
+
+        needed_libs = {}
+        if _want("needed", "needed_libs"):
+            needed_libs = _set("""
+            SELECT idpackage, lib_user_path, lib_user_soname, soname,
+                elfclass, rpath
+            FROM needed_libs WHERE idpackage IN (%s)""", row_size = 5)
+
+        counters = {}
+        if _want("counter"):
+            counters = _first("""
+            SELECT counters.idpackage, counters.counter
+            FROM counters, baseinfo
+            WHERE counters.idpackage IN (%s) AND
+            baseinfo.idpackage = counters.idpackage AND
+            baseinfo.branch = counters.branch""", default = -1)
+
+        triggers = {}
+        if _want("trigger"):
+            triggers = _first("""
+            SELECT idpackage, data FROM triggers
+            WHERE idpackage IN (%s)""", default = '')
+
+        disksizes = {}
+        if _want("disksize"):
+            disksizes = _first("""
+            SELECT idpackage, size FROM sizes
+            WHERE idpackage IN (%s)""", default = 0)
+
+        injected = frozenset()
+        if _want("injected"):
+            injected = frozenset([x for x, in self._fetchMany("""
+            SELECT idpackage FROM injected
+            WHERE idpackage IN (%s)""", pkg_ids)])
+
+        system_packages = frozenset()
+        if _want("systempackage"):
+            system_packages = frozenset([x for x, in self._fetchMany("""
+            SELECT idpackage FROM systempackages
+            WHERE idpackage IN (%s)""", pkg_ids)])
+
+        protect = {}
+        if _want("config_protect"):
+            protect = _first("""
+            SELECT configprotect.idpackage, configprotectreference.protect
+            FROM configprotect, configprotectreference
+            WHERE configprotect.idpackage IN (%s) AND
+            configprotect.idprotect = configprotectreference.idprotect
+            """, default = '')
+
+        protect_mask = {}
+        if _want("config_protect_mask"):
+            protect_mask = _first("""
+            SELECT configprotectmask.idpackage,
+                configprotectreference.protect
+            FROM configprotectmask, configprotectreference
+            WHERE configprotectmask.idpackage IN (%s) AND
+            configprotectmask.idprotect = configprotectreference.idprotect
+            """, default = '')
+
+        useflags = {}
+        if _want("useflags"):
+            useflags = _set("""
+            SELECT useflags.idpackage, useflagsreference.flagname
+            FROM useflags, useflagsreference
+            WHERE useflags.idpackage IN (%s)
+            AND useflags.idflag = useflagsreference.idflag""")
+
+        keywords = {}
+        if _want("keywords"):
+            keywords = _set("""
+            SELECT keywords.idpackage, keywordsreference.keywordname
+            FROM keywords, keywordsreference
+            WHERE keywords.idpackage IN (%s) AND
+            keywords.idkeyword = keywordsreference.idkeyword""")
+
+        provided_libs = {}
+        if _want("provided_libs"):
+            provided_libs = _set("""
+            SELECT idpackage, library, path, elfclass FROM provided_libs
+            WHERE idpackage IN (%s)""", row_size = 3)
+
+        provide = {}
+        if _want("provide_extended"):
+            provide = _set("""
+            SELECT idpackage, atom, is_default FROM provide
+            WHERE idpackage IN (%s)""", row_size = 2)
+
+        conflicts = {}
+        if _want("conflicts"):
+            conflicts = _set("""
+            SELECT idpackage, conflict FROM conflicts
+            WHERE idpackage IN (%s)""")
+
+        license_texts = {}
+        if _want("licensedata"):
+            license_names = set()
+            for package_id in pkg_ids:
+                licenses = base_data[package_id][10]
+                if licenses is None:
+                    continue
+                for licname in licenses.split():
+                    if not licname.strip():
+                        continue
+                    if not entropy.tools.is_valid_string(licname):
+                        continue
+                    license_names.add(licname)
+            for licname, lictext in self._fetchMany("""
+            SELECT licensename, text FROM licensedata
+            WHERE licensename IN (%s)""", sorted(license_names)):
+                if licname in license_texts:
+                    continue
+                try:
+                    license_texts[licname] = const_convert_to_unicode(
+                        lictext)
+                except UnicodeDecodeError:
+                    license_texts[licname] = const_convert_to_unicode(
+                        lictext, enctype = 'utf-8')
+
+        spm_phases = {}
+        if _want("spm_phases"):
+            spm_phases = _first("""
+            SELECT idpackage, phases FROM packagespmphases
+            WHERE idpackage IN (%s)""")
+
+        spm_repositories = {}
+        if _want("spm_repository"):
+            spm_repositories = _first("""
+            SELECT idpackage, repository FROM packagespmrepository
+            WHERE idpackage IN (%s)""")
+
+        desktop_mime = dict((x, []) for x in pkg_ids)
+        if _want("desktop_mime") and _has_table("packagedesktopmime"):
+            for package_id, name, mimetype, executable, icon in \
+                    self._fetchMany("""
+            SELECT idpackage, name, mimetype, executable, icon
+            FROM packagedesktopmime WHERE idpackage IN (%s)""", pkg_ids):
+                desktop_mime[package_id].append({
+                    'name': name,
+                    'mimetype': mimetype,
+                    'executable': executable,
+                    'icon': icon,
+                })
+
+        provided_mime = dict((x, frozenset()) for x in pkg_ids)
+        if _want("provided_mime") and _has_table("provided_mime"):
+            provided_mime = _set("""
+            SELECT idpackage, mimetype FROM provided_mime
+            WHERE idpackage IN (%s)""")
+
+        original_repositories = {}
+        if _want("original_repository"):
+            original_repositories = _first("""
+            SELECT idpackage, repositoryname FROM installedtable
+            WHERE idpackage IN (%s)""")
+
+        extra_downloads = dict((x, []) for x in pkg_ids)
+        if _want("extra_download") and _has_table("packagedownloads"):
+            for package_id, download, d_type, size, d_size, md5, sha1, \
+                    sha256, sha512, gpg in self._fetchMany("""
+            SELECT idpackage, download, type, size, disksize, md5, sha1,
+                sha256, sha512, gpg
+            FROM packagedownloads WHERE idpackage IN (%s)""", pkg_ids):
+                extra_downloads[package_id].append({
+                    "download": download,
+                    "type": d_type,
+                    "size": size,
+                    "disksize": d_size,
+                    "md5": md5,
+                    "sha1": sha1,
+                    "sha256": sha256,
+                    "sha512": sha512,
+                    "gpg": gpg,
+                })
+
+        for package_id in pkg_ids:
+            atom, name, version, versiontag, \
+            description, category, chost, \
+            cflags, cxxflags, homepage, \
+            mylicense, branch, download, \
+            digest, slot, etpapi, \
+            datecreation, size, revision = base_data[package_id]
+
+            data = {
+                'atom': atom,
+                'name': name,
+                'version': version,
+                'versiontag': versiontag,
+                'description': description,
+                'category': category,
+                'chost': chost,
+                'cflags': cflags,
+                'cxxflags': cxxflags,
+                'homepage': homepage,
+                'license': mylicense,
+                'branch': branch,
+                'download': download,
+                'digest': digest,
+                'slot': slot,
+                'etpapi': etpapi,
+                'datecreation': datecreation,
+                'size': size,
+                'revision': revision,
+            }
+
+            if _want("counter"):
+                data['counter'] = counters[package_id]
+            if _want("trigger"):
+                data['trigger'] = const_convert_to_rawstring(
+                    triggers[package_id])
+            if _want("disksize"):
+                data['disksize'] = disksizes[package_id]
+            if _want("changelog"):
+                changelog = changelogs.get(package_id)
+                if changelog is not None:
+                    try:
+                        changelog = const_convert_to_unicode(changelog)
+                    except UnicodeDecodeError:
+                        changelog = const_convert_to_unicode(
+                            changelog, enctype = 'utf-8')
+                data['changelog'] = changelog
+            if _want("injected"):
+                data['injected'] = package_id in injected
+            if _want("systempackage"):
+                data['systempackage'] = package_id in system_packages
+            if _want("config_protect"):
+                data['config_protect'] = protect[package_id]
+            if _want("config_protect_mask"):
+                data['config_protect_mask'] = protect_mask[package_id]
+            if _want("useflags"):
+                data['useflags'] = useflags[package_id]
+            if _want("keywords"):
+                data['keywords'] = keywords[package_id]
+            if _want("sources"):
+                data['sources'] = sources[package_id]
+            if _want("needed", "needed_libs"):
+                package_needed_libs = needed_libs[package_id]
+                data['needed'] = tuple(
+                    sorted((soname, elfclass) for _x, _x, soname, elfclass, _x
+                           in package_needed_libs))
+                data['needed_libs'] = package_needed_libs
+            if _want("provided_libs"):
+                data['provided_libs'] = provided_libs[package_id]
+            if _want("provide_extended"):
+                data['provide_extended'] = provide[package_id]
+            if _want("conflicts"):
+                data['conflicts'] = conflicts[package_id]
+            if _want("licensedata"):
+                licdata = {}
+                if mylicense is not None:
+                    for licname in mylicense.split():
+                        if licname in license_texts:
+                            licdata[licname] = license_texts[licname]
+                data['licensedata'] = licdata
+            if _want("content"):
+                data['content'] = content[package_id]
+            if _want("content_safety"):
+                data['content_safety'] = content_safety[package_id]
+            if _want("pkg_dependencies"):
+                data['pkg_dependencies'] = tuple(deps[package_id])
+            if _want("mirrorlinks"):
+                mirrornames = set()
+                for x in sources[package_id]:
+                    if x.startswith("mirror://"):
+                        mirrornames.add(x.split("/")[2])
+                data['mirrorlinks'] = [
+                    [x, frozenset(mirror_data[x])] for x in mirrornames]
+            if _want("signatures"):
+                sha1, sha256, sha512, gpg = signatures.get(
+                    package_id, (None, None, None, None))
+                data['signatures'] = {
+                    'sha1': sha1,
+                    'sha256': sha256,
+                    'sha512': sha512,
+                    'gpg': gpg,
+                }
+            if _want("spm_phases"):
+                data['spm_phases'] = spm_phases[package_id]
+            if _want("spm_repository"):
+                data['spm_repository'] = spm_repositories[package_id]
+            if _want("desktop_mime"):
+                data['desktop_mime'] = desktop_mime[package_id]
+            if _want("provided_mime"):
+                data['provided_mime'] = provided_mime[package_id]
+            if _want("original_repository"):
+                data['original_repository'] = \
+                    original_repositories[package_id]
+            if _want("extra_download"):
+                data['extra_download'] = tuple(extra_downloads[package_id])
+
+            if fields is not None:
+                data = dict((k, v) for k, v in data.items() if k in fields)
+            result[package_id] = data
+
+        return result
+
     def retrieveRepositoryUpdatesDigest(self, repository):
         """
         Reimplemented from EntropyRepositoryBase.
@@ -3703,14 +4258,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
         """
         Reimplemented from EntropyRepositoryBase.
         """
-        cached = self._getLiveCache("reverseDependenciesMetadata")
-        if cached is None:
-            cached = self._generateReverseDependenciesMetadata()
-
-        dep_ids = set((k for k, v in cached.items() if package_id in v))
+        dep_ids = self._retrieveReverseDependencyIds(package_id)
         if not dep_ids:
-            # avoid python3.x memleak
-            del cached
             if key_slot:
                 return tuple()
             return frozenset()
@@ -3818,24 +4367,34 @@ class EntropySQLRepository(EntropyRepositoryBase):
                 WHERE dependencies.iddependency IN ( %s )""" % (dep_ids_str,))
                 result = self._cur2frozenset(cur)
 
-        # avoid python3.x memleak
-        del cached
         return result
 
     def retrieveUnusedPackageIds(self):
         """
         Reimplemented from EntropyRepositoryBase.
         """
+        if self._isReverseDependenciesIndexValid():
+            cur = self._cursor().execute("""
+            SELECT idpackage FROM reversedependencies LIMIT 1
+            """)
+            if cur.fetchone() is None:
+                return tuple()
+            cur = self._cursor().execute("""
+            SELECT idpackage FROM baseinfo
+            WHERE idpackage NOT IN (
+                SELECT idpackage FROM reversedependencies)
+            ORDER BY atom
+            """)
+            return self._cur2tuple(cur)
+
         cached = self._getLiveCache("reverseDependenciesMetadata")
         if cached is None:
             cached = self._generateReverseDependenciesMetadata()
 
-        pkg_ids = set()
-        for v in cached.values():
-            pkg_ids |= v
+        pkg_ids = set(cached.keys())
+        # avoid python3.x memleak
+        del cached
         if not pkg_ids:
-            # avoid python3.x memleak
-            del cached
             return tuple()
         pkg_ids_str = ', '.join((str(x) for x in pkg_ids))
 
@@ -3844,8 +4403,6 @@ class EntropySQLRepository(EntropyRepositoryBase):
         WHERE idpackage NOT IN ( %s )
         ORDER BY atom
         """ % (pkg_ids_str,))
-        # avoid python3.x memleak
-        del cached
         return self._cur2tuple(cur)
 
     def arePackageIdsAvailable(self, package_ids):
@@ -3907,6 +4464,37 @@ class EntropySQLRepository(EntropyRepositoryBase):
             return True
         return False
 
+    def isFileAvailableMany(self, paths):
+        """
+        Reimplemented from EntropyRepositoryBase.
+        Paths are joined against the content table through a temporary
+        table, using a single query.
+        """
+        self._cursor().executescript("""
+            DROP TABLE IF EXISTS fileownerslookup;
+            CREATE TEMPORARY TABLE fileownerslookup ( file VARCHAR );
+            """)
+
+        try:
+            self._cursor().executemany("""
+            INSERT INTO fileownerslookup VALUES (?)""",
+                ((x,) for x in set(paths)))
+
+            cur = self._cursor().execute("""
+            SELECT content.file, content.idpackage
+            FROM fileownerslookup, content
+            WHERE content.file = fileownerslookup.file""")
+
+            owners = {}
+            for path, package_id in cur:
+                obj = owners.setdefault(path, set())
+                obj.add(package_id)
+            return dict((x, frozenset(y)) for x, y in owners.items())
+
+        finally:
+            self._cursor().execute(
+                'DROP TABLE IF EXISTS fileownerslookup')
+
     def resolveNeeded(self, needed, elfclass = -1, extended = False):
         """
         Reimplemented from EntropyRepositoryBase.
@@ -4343,6 +4931,26 @@ class EntropySQLRepository(EntropyRepositoryBase):
 
         return self._cur2tuple(cur)
 
+    def _searchIndexFilter(self, columns, keyword):
+        """
+        Return an SQL subquery selecting the package identifiers whose
+        full-text index columns match the given LIKE pattern, to be used
+        as "idpackage IN (subquery)" candidate filter in front of the
+        regular search conditions. Results are never changed by the
+        filter, which can return a superset of the matching packages.
+        Subclasses providing a full-text index must reimplement this.
+
+        @param columns: full-text index columns to match, any of "atom",
+            "name", "description", "provide"
+        @type columns: tuple
+        @param keyword: LIKE pattern
+        @type keyword: string
+        @return: tuple composed by the subquery and its arguments,
+            or None if no usable index is available
+        @rtype: tuple or None
+        """
+        return None
+
     def searchPackages(self, keyword, sensitive = False, slot = None,
             tag = None, order_by = None, just_id = False):
         """
@@ -4351,7 +4959,21 @@ class EntropySQLRepository(EntropyRepositoryBase):
         like_keyword = "%"+keyword+"%"
         if not sensitive:
             like_keyword = like_keyword.lower()
-        searchkeywords = (like_keyword, like_keyword)
+
+        atomindexstring = ''
+        provideindexstring = ''
+        atom_index = self._searchIndexFilter(("atom",), like_keyword)
+        provide_index = self._searchIndexFilter(("provide",), like_keyword)
+        if atom_index is not None and provide_index is not None:
+            atom_index_sql, atom_index_args = atom_index
+            provide_index_sql, provide_index_args = provide_index
+            atomindexstring = ' AND t.idpackage IN (%s)' % (atom_index_sql,)
+            provideindexstring = ' AND p.idpackage IN (%s)' % (
+                provide_index_sql,)
+            searchkeywords = (like_keyword,) + atom_index_args + \
+                (like_keyword,) + provide_index_args
+        else:
+            searchkeywords = (like_keyword, like_keyword)
 
         slotstring = ''
         if slot:
@@ -4392,28 +5014,28 @@ class EntropySQLRepository(EntropyRepositoryBase):
             cur = self._cursor().execute("""
             SELECT DISTINCT %s FROM (
                 SELECT %s FROM baseinfo t
-                    WHERE t.atom LIKE ?
+                    WHERE t.atom LIKE ? %s
                 UNION ALL
                 SELECT %s FROM baseinfo d, provide as p
                     WHERE d.idpackage = p.idpackage
-                    AND p.atom LIKE ?
+                    AND p.atom LIKE ? %s
             ) WHERE 1=1 %s %s %s
-            """ % (search_elements, search_elements_all,
-                search_elements_provide_all, slotstring, tagstring,
-                order_by_string), searchkeywords)
+            """ % (search_elements, search_elements_all, atomindexstring,
+                search_elements_provide_all, provideindexstring,
+                slotstring, tagstring, order_by_string), searchkeywords)
         else:
             cur = self._cursor().execute("""
             SELECT DISTINCT %s FROM (
                 SELECT %s FROM baseinfo t
-                    WHERE LOWER(t.atom) LIKE ?
+                    WHERE LOWER(t.atom) LIKE ? %s
                 UNION ALL
                 SELECT %s FROM baseinfo d, provide as p
                     WHERE d.idpackage = p.idpackage
-                    AND LOWER(p.atom) LIKE ?
+                    AND LOWER(p.atom) LIKE ? %s
             ) WHERE 1=1 %s %s %s
-            """ % (search_elements, search_elements_all,
-                search_elements_provide_all, slotstring, tagstring,
-                order_by_string), searchkeywords)
+            """ % (search_elements, search_elements_all, atomindexstring,
+                search_elements_provide_all, provideindexstring,
+                slotstring, tagstring, order_by_string), searchkeywords)
 
         if just_id:
             return self._cur2tuple(cur)
@@ -4445,8 +5067,16 @@ class EntropySQLRepository(EntropyRepositoryBase):
         query_str_list = []
         query_args = []
         for sub_keyword in keyword_split:
+            like_keyword = "%" + sub_keyword + "%"
             query_str_list.append("LOWER(extrainfo.description) LIKE ?")
-            query_args.append("%" + sub_keyword + "%")
+            query_args.append(like_keyword)
+            desc_index = self._searchIndexFilter(
+                ("description",), like_keyword)
+            if desc_index is not None:
+                desc_index_sql, desc_index_args = desc_index
+                query_str_list.append("baseinfo.idpackage IN (%s)" % (
+                        desc_index_sql,))
+                query_args.extend(desc_index_args)
         query_str = " AND ".join(query_str_list)
         if just_id:
             cur = self._cursor().execute("""
@@ -4517,10 +5147,18 @@ class EntropySQLRepository(EntropyRepositoryBase):
             WHERE name = ?
             """ % (atomstring,), (keyword,))
         else:
+            indexstring = ''
+            searchkeywords = (keyword.lower(),)
+            name_index = self._searchIndexFilter(("name",), keyword.lower())
+            if name_index is not None:
+                name_index_sql, name_index_args = name_index
+                indexstring = ' AND idpackage IN (%s)' % (name_index_sql,)
+                searchkeywords += name_index_args
+
             cur = self._cursor().execute("""
             SELECT %s idpackage FROM baseinfo
-            WHERE LOWER(name) = ?
-            """ % (atomstring,), (keyword.lower(),))
+            WHERE LOWER(name) = ? %s
+            """ % (atomstring, indexstring), searchkeywords)
 
         if just_id:
             return self._cur2tuple(cur)
@@ -4771,6 +5409,19 @@ class EntropySQLRepository(EntropyRepositoryBase):
             return self._cur2frozenset(cur)
         return self._cur2tuple(cur)
 
+    def listAllFilesIter(self):
+        """
+        Reimplemented from EntropyRepositoryBase.
+        """
+        self._connection().unicode()
+
+        # ordering is served by contentindex_file
+        cur = self._cursor().execute("""
+        SELECT file FROM content ORDER BY file
+        """)
+        for (path,) in cur:
+            yield path
+
     def listAllCategories(self, order_by = None):
         """
         Reimplemented from EntropyRepositoryBase.
@@ -4813,6 +5464,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._cursor().execute("""
         UPDATE baseinfo SET branch = ?
         WHERE idpackage = ?""", (tobranch, package_id,))
+        self._bumpChecksumGeneration("switchBranch", package_id, tobranch)
         self.clearCache()
 
     def getSetting(self, setting_name):
@@ -4917,6 +5569,12 @@ class EntropySQLRepository(EntropyRepositoryBase):
         """
         raise NotImplementedError()
 
+    def exportRepositorySnapshot(self, dumpfile):
+        """
+        Not implemented, subclasses must implement this.
+        """
+        raise NotImplementedError()
+
     def _listAllTables(self):
         """
         Not implemented, subclasses must implement this.
@@ -4929,11 +5587,69 @@ class EntropySQLRepository(EntropyRepositoryBase):
         """
         raise NotImplementedError()
 
+    def _bumpChecksumGeneration(self, *data):
+        """
+        Bump the repository generation counter and fold the given
+        mutation data into the rolling digest used by checksum().
+        Repositories without a digest are seeded with their full
+        content checksum, this happens only once.
+
+        @param data: mutation data (must support repr())
+        @type data: tuple
+        """
+        try:
+            generation = int(self.getSetting(
+                self._CHECKSUM_GENERATION_SETTING))
+            digest = self.getSetting(self._CHECKSUM_DIGEST_SETTING)
+        except (KeyError, ValueError):
+            generation = 0
+            digest = self._contentChecksum(
+                include_signatures = True,
+                include_dependencies = True)
+
+        sha = hashlib.sha1()
+        sha.update(const_convert_to_rawstring(digest))
+        sha.update(const_convert_to_rawstring(repr(data)))
+        self._setSetting(self._CHECKSUM_GENERATION_SETTING,
+                         generation + 1)
+        self._setSetting(self._CHECKSUM_DIGEST_SETTING, sha.hexdigest())
+
     def checksum(self, do_order = False, strict = True,
                  include_signatures = False,
                  include_dependencies = False):
         """
         Reimplemented from EntropyRepositoryBase.
+        If do_order is False, the checksum is derived from the
+        repository generation counter and rolling digest, when
+        available. Ordered checksums are always computed out of the
+        repository content, since they are compared across repositories.
+        """
+        if not do_order:
+            try:
+                generation = self.getSetting(
+                    self._CHECKSUM_GENERATION_SETTING)
+                digest = self.getSetting(self._CHECKSUM_DIGEST_SETTING)
+            except KeyError:
+                pass
+            else:
+                hash_str = "%s|%s|%s|%s|%s" % (
+                    generation, digest, strict,
+                    include_signatures, include_dependencies)
+                sha = hashlib.sha1()
+                sha.update(const_convert_to_rawstring(hash_str))
+                return sha.hexdigest()
+
+        return self._contentChecksum(
+            do_order = do_order, strict = strict,
+            include_signatures = include_signatures,
+            include_dependencies = include_dependencies)
+
+    def _contentChecksum(self, do_order = False, strict = True,
+                         include_signatures = False,
+                         include_dependencies = False):
+        """
+        Compute the repository checksum out of its content.
+        See checksum() for the arguments meaning.
         """
         cache_key = "checksum_%s_%s_True_%s_%s" % (
             do_order, strict, include_signatures, include_dependencies)
@@ -5125,6 +5841,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
         Reimplemented from EntropyRepositoryBase.
         """
         self._cursor().execute('UPDATE packagesignatures set gpg = NULL')
+        self._bumpChecksumGeneration("dropGpgSignatures")
 
     def dropAllIndexes(self):
         """
@@ -5160,6 +5877,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
         self._createDesktopMimeIndex()
         self._createProvidedMimeIndex()
         self._createPackageDownloadsIndex()
+        self._createReverseDependenciesIndex()
 
     def _createTrashedCountersIndex(self):
         try:
@@ -5398,6 +6116,15 @@ class EntropySQLRepository(EntropyRepositoryBase):
         except OperationalError:
             pass
 
+    def _createReverseDependenciesIndex(self):
+        try:
+            self._cursor().execute("""
+            CREATE INDEX reversedependenciesindex_iddependency
+                ON reversedependencies ( iddependency );
+            """)
+        except OperationalError:
+            pass
+
     def _createCountersIndex(self):
         try:
             self._cursor().execute("""
@@ -5533,10 +6260,226 @@ class EntropySQLRepository(EntropyRepositoryBase):
         UPDATE treeupdates SET digest = '-1'
         """)
 
-    def _generateReverseDependenciesMetadata(self):
+    def _matchReverseDependency(self, dependency):
+        """
+        Return the package identifiers satisfying the given dependency
+        string, "or" dependencies included.
+
+        @param dependency: dependency string
+        @type dependency: string
+        @return: set of package identifiers
+        @rtype: set
+        """
+        if dependency.endswith(etpConst['entropyordepquestion']):
+            atoms = dependency[:-1].split(etpConst['entropyordepsep'])
+        else:
+            atoms = (dependency,)
+
+        package_ids = set()
+        for atom in atoms:
+            # not safe to use cache here, people messing with multiple
+            # instances can make this crash
+            package_id, rc = self.atomMatch(atom, useCache = False)
+            if package_id != -1:
+                package_ids.add(package_id)
+        return package_ids
+
+    def _reverseDependenciesIndexStamp(self):
+        """
+        Return the stamp identifying a valid "reversedependencies" index.
+        atomMatch() results depend on the repository configuration
+        (package masking, for instance), so it must be part of the stamp.
+        """
+        hash_str = "%s|%s" % (
+            self._REVERSE_DEPENDENCIES_VERSION,
+            self.atomMatchCacheKey(),)
+        if const_is_python3():
+            hash_str = hash_str.encode("utf-8")
+        sha = hashlib.sha1()
+        sha.update(hash_str)
+        return sha.hexdigest()
+
+    def _isReverseDependenciesIndexValid(self):
+        """
+        Return whether the "reversedependencies" index is in sync with
+        the repository content and can be used for lookups.
+        """
+        try:
+            stamp = self.getSetting(self._REVERSE_DEPENDENCIES_SETTING)
+        except KeyError:
+            return False
+        return stamp == self._reverseDependenciesIndexStamp()
+
+    def _setReverseDependenciesIndexValid(self):
+        """
+        Mark the "reversedependencies" index as in sync with the
+        repository content.
+        """
+        self._setSetting(self._REVERSE_DEPENDENCIES_SETTING,
+                         self._reverseDependenciesIndexStamp())
+
+    def _invalidateReverseDependenciesIndex(self):
+        """
+        Mark the "reversedependencies" index as stale. It will be
+        regenerated at the next addPackage() or removePackage() call,
+        in-memory metadata is used in the meantime.
+        """
+        try:
+            self.getSetting(self._REVERSE_DEPENDENCIES_SETTING)
+        except KeyError:
+            return
+        self._cursor().execute("""
+        DELETE FROM settings WHERE setting_name = ?
+        """, (self._REVERSE_DEPENDENCIES_SETTING,))
+        self._settings_cache.clear()
+
+    def _retrieveReverseDependencyIds(self, package_id):
+        """
+        Return the dependency identifiers (iddependency) satisfied
+        by the given package.
+
+        @param package_id: package identifier
+        @type package_id: int
+        @return: dependency identifiers
+        @rtype: frozenset
+        """
+        if self._isReverseDependenciesIndexValid():
+            cur = self._cursor().execute("""
+            SELECT iddependency FROM reversedependencies
+            WHERE idpackage = ?
+            """, (package_id,))
+            return self._cur2frozenset(cur)
+
+        cached = self._getLiveCache("reverseDependenciesMetadata")
+        if cached is None:
+            cached = self._generateReverseDependenciesMetadata()
+        dep_ids = cached.get(package_id, frozenset())
+        # avoid python3.x memleak
+        del cached
+        return frozenset(dep_ids)
+
+    def _updateReverseDependencies(self, dep_ids):
+        """
+        Match again the given dependency identifiers and refresh their
+        "reversedependencies" index entries. Dependencies no longer
+        referenced by any package are dropped.
+
+        @param dep_ids: dependency identifiers
+        @type dep_ids: iterable
+        """
+        if not dep_ids:
+            return
+        dep_ids_str = ', '.join((str(x) for x in dep_ids))
+
+        self._cursor().execute("""
+        DELETE FROM reversedependencies WHERE iddependency IN ( %s )
+        """ % (dep_ids_str,))
+
+        cur = self._cursor().execute("""
+        SELECT iddependency, dependency FROM dependenciesreference
+        WHERE iddependency IN ( %s ) AND
+        iddependency IN (SELECT iddependency FROM dependencies)
+        """ % (dep_ids_str,))
+
+        entries = []
+        for iddep, dependency in cur.fetchall():
+            for package_id in self._matchReverseDependency(dependency):
+                entries.append((package_id, iddep))
+
+        self._cursor().executemany("""
+        INSERT INTO reversedependencies VALUES (?, ?)
+        """, entries)
+
+    def _addPackageReverseDependencies(self, package_id, index_valid):
+        """
+        Update the "reversedependencies" index after the given package
+        has been added. Only the package dependencies and the
+        dependencies mentioning its key (or its provides) are matched
+        again, unless the index was not valid before addPackage().
+
+        @param package_id: package identifier
+        @type package_id: int
+        @param index_valid: whether the index was valid before the
+            package was added
+        @type index_valid: bool
+        """
+        if not index_valid:
+            self._generateReverseDependenciesIndex()
+            return
+
+        cur = self._cursor().execute("""
+        SELECT iddependency FROM dependencies WHERE idpackage = ?
+        """, (package_id,))
+        dep_ids = set(self._cur2frozenset(cur))
+
+        keys = set()
+        category, name = self.retrieveKeySplit(package_id)
+        keys.add("%s/%s" % (category, name))
+        for provide, _is_default in self.retrieveProvide(package_id):
+            keys.add(entropy.dep.dep_getkey(provide))
+
+        for key in keys:
+            cur = self._cursor().execute("""
+            SELECT iddependency FROM dependenciesreference
+            WHERE dependency LIKE ?
+            """, ("%" + key + "%",))
+            dep_ids.update(self._cur2frozenset(cur))
+
+        self._updateReverseDependencies(dep_ids)
+        self._setReverseDependenciesIndexValid()
+
+    def _generateReverseDependenciesIndex(self):
+        """
+        Regenerate the whole "reversedependencies" index, if the
+        repository supports it.
+
+        @return: True, if the index has been generated
+        @rtype: bool
+        """
+        if not self._doesTableExist("reversedependencies"):
+            return False
+
+        self._cursor().execute("DELETE FROM reversedependencies")
+        dep_data = self._generateReverseDependenciesMetadata(
+            use_cache = False)
+
+        def _entries():
+            for package_id, dep_ids in dep_data.items():
+                for iddep in dep_ids:
+                    yield package_id, iddep
+
+        self._cursor().executemany("""
+        INSERT INTO reversedependencies VALUES (?, ?)
+        """, _entries())
+        self._setReverseDependenciesIndexValid()
+        return True
+
+    def _generateReverseDependenciesMetadata(self, use_cache = True):
         """
         Reverse dependencies dynamic metadata generation.
+        Return a mapping of package identifiers to the set of dependency
+        identifiers they satisfy.
+
+        @keyword use_cache: use the on-disk and in-memory caches
+        @type use_cache: bool
+        @return: package identifier -> dependency identifiers map
+        @rtype: dict
         """
+        if not use_cache:
+            # skip dependencies not referenced by any package
+            cur = self._cursor().execute("""
+            SELECT iddependency, dependency FROM dependenciesreference
+            WHERE iddependency IN (SELECT iddependency FROM dependencies)
+            """)
+            dep_data = {}
+            for iddep, atom in cur.fetchall():
+                if iddep == -1:
+                    continue
+                for package_id in self._matchReverseDependency(atom):
+                    obj = dep_data.setdefault(package_id, set())
+                    obj.add(iddep)
+            return dep_data
+
         checksum = self.checksum()
         try:
             mtime = repr(self.mtime())
@@ -5553,7 +6496,7 @@ class EntropySQLRepository(EntropyRepositoryBase):
             hash_str = hash_str.encode("utf-8")
         sha = hashlib.sha1()
         sha.update(hash_str)
-        cache_key = "__generateReverseDependenciesMetadata2_" + \
+        cache_key = "__generateReverseDependenciesMetadata3_" + \
             sha.hexdigest()
         rev_deps_data = self._cacher.pop(cache_key)
         if rev_deps_data is not None:
@@ -5561,28 +6504,8 @@ class EntropySQLRepository(EntropyRepositoryBase):
                 rev_deps_data)
             return rev_deps_data
 
-        dep_data = {}
-        for iddep, atom in self.listAllDependencies():
-
-            if iddep == -1:
-                continue
-
-            if atom.endswith(etpConst['entropyordepquestion']):
-                or_atoms = atom[:-1].split(etpConst['entropyordepsep'])
-                for or_atom in or_atoms:
-                    # not safe to use cache here, people messing with multiple
-                    # instances can make this crash
-                    package_id, rc = self.atomMatch(or_atom, useCache = False)
-                    if package_id != -1:
-                        obj = dep_data.setdefault(iddep, set())
-                        obj.add(package_id)
-            else:
-                # not safe to use cache here, people messing with multiple
-                # instances can make this crash
-                package_id, rc = self.atomMatch(atom, useCache = False)
-                if package_id != -1:
-                    obj = dep_data.setdefault(iddep, set())
-                    obj.add(package_id)
+        dep_data = self._generateReverseDependenciesMetadata(
+            use_cache = False)
 
         self._setLiveCache("reverseDependenciesMetadata", dep_data)
         try:
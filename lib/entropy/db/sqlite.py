@@ -13,7 +13,9 @@
 import collections
 import errno
 import os
+import re
 import hashlib
+import struct
 import time
 try:
     import thread
@@ -33,8 +35,11 @@ from entropy.locks import ResourceLock
 from entropy.db.exceptions import Warning, Error, InterfaceError, \
     DatabaseError, DataError, OperationalError, IntegrityError, \
     InternalError, ProgrammingError, NotSupportedError, LockAcquireError
+from entropy.db.skel import EntropyRepositoryBase
 from entropy.db.sql import EntropySQLRepository, SQLConnectionWrapper, \
     SQLCursorWrapper
+from entropy.db.snapshot import SnapshotReader, SnapshotWriter, \
+    SnapshotText, is_snapshot
 
 from entropy.i18n import _
 
@@ -113,6 +118,9 @@ class SQLiteConnectionWrapper(SQLConnectionWrapper):
     def rawstring(self):
         self._con.text_factory = const_convert_to_rawstring
 
+    def snapshottext(self):
+        self._con.text_factory = SnapshotText
+
     def interrupt(self):
         return self._proxy_call(self._excs, self._con.interrupt)
 
@@ -133,7 +141,7 @@ class EntropySQLiteRepository(EntropySQLRepository):
 
     # bump this every time schema changes and databaseStructureUpdate
     # should be triggered
-    _SCHEMA_REVISION = 6
+    _SCHEMA_REVISION = 7
 
     _INSERT_OR_REPLACE = "INSERT OR REPLACE"
     _INSERT_OR_IGNORE = "INSERT OR IGNORE"
@@ -143,6 +151,16 @@ class EntropySQLiteRepository(EntropySQLRepository):
     SETTING_KEYS = ("arch", "on_delete_cascade", "schema_revision",
         "_baseinfo_extrainfo_2010")
 
+    # settings table key storing the version of a valid "packagesearch"
+    # full-text index. Bump the version string whenever its layout
+    # changes.
+    _PACKAGE_SEARCH_SETTING = "_package_search_index"
+    _PACKAGE_SEARCH_VERSION = "1"
+    # trigram lookups need at least this many consecutive
+    # non-wildcard characters, SQLite scans the whole index otherwise.
+    _PACKAGE_SEARCH_MIN_LITERAL = 3
+    _LIKE_WILDCARDS_RE = re.compile("[%_]")
+
     class SQLiteProxy(object):
 
         _mod = None
@@ -736,11 +754,27 @@ class EntropySQLiteRepository(EntropySQLRepository):
         """
         raise NotImplementedError()
 
+    def _addPackage(self, pkg_data, revision = -1, package_id = None,
+        formatted_content = False):
+        """
+        Reimplemented from EntropySQLRepository.
+        We must keep the package search index in sync.
+        """
+        package_id = super(EntropySQLiteRepository, self)._addPackage(
+            pkg_data, revision = revision, package_id = package_id,
+            formatted_content = formatted_content)
+        self._updatePackageSearchIndex(package_id)
+        return package_id
+
     def _removePackage(self, package_id, from_add_package = False):
         """
         Reimplemented from EntropySQLRepository.
         We must handle on_delete_cascade.
         """
+        if self._isPackageSearchIndexValid():
+            self._cursor().execute(
+                "DELETE FROM packagesearch WHERE rowid = (?)", (package_id,))
+
         try:
             new_way = self.getSetting("on_delete_cascade")
         except KeyError:
@@ -829,6 +863,8 @@ class EntropySQLiteRepository(EntropySQLRepository):
             self._cursor().execute("""
             UPDATE baseinfo SET idcategory = (?) WHERE idpackage = (?)
             """, (catid, package_id,))
+        self._invalidateReverseDependenciesIndex()
+        self._bumpChecksumGeneration("setCategory", package_id, category)
 
         self._clearLiveCache("retrieveCategory")
         self._clearLiveCache("searchNameCategory")
@@ -845,6 +881,7 @@ class EntropySQLiteRepository(EntropySQLRepository):
         We must handle live cache.
         """
         super(EntropySQLiteRepository, self).setName(package_id, name)
+        self._updatePackageSearchIndex(package_id)
         self._clearLiveCache("searchNameCategory")
         self._clearLiveCache("retrieveKeySlot")
         self._clearLiveCache("retrieveKeySplit")
@@ -868,6 +905,7 @@ class EntropySQLiteRepository(EntropySQLRepository):
         We must handle live cache.
         """
         super(EntropySQLiteRepository, self).setAtom(package_id, atom)
+        self._updatePackageSearchIndex(package_id)
         self._clearLiveCache("searchNameCategory")
         self._clearLiveCache("getStrictScopeData")
         self._clearLiveCache("getStrictData")
@@ -1183,6 +1221,29 @@ class EntropySQLiteRepository(EntropySQLRepository):
         cur = self._cursor().execute(sql, (package_id,))
         return cur.fetchone()
 
+    def getPackageDataMany(self, package_ids, get_content = True,
+            content_insert_formatted = False, get_changelog = True,
+            get_content_safety = True, fields = None):
+        """
+        Reimplemented from EntropySQLRepository.
+        We must handle backward compatibility.
+        """
+        if self._isBaseinfoExtrainfo2010():
+            return super(EntropySQLiteRepository, self).getPackageDataMany(
+                package_ids, get_content = get_content,
+                content_insert_formatted = content_insert_formatted,
+                get_changelog = get_changelog,
+                get_content_safety = get_content_safety,
+                fields = fields)
+
+        # the batched queries only support the current schema
+        return EntropyRepositoryBase.getPackageDataMany(
+            self, package_ids, get_content = get_content,
+            content_insert_formatted = content_insert_formatted,
+            get_changelog = get_changelog,
+            get_content_safety = get_content_safety,
+            fields = fields)
+
     def retrieveDigest(self, package_id):
         """
         Reimplemented from EntropySQLRepository.
@@ -2000,6 +2061,10 @@ class EntropySQLiteRepository(EntropySQLRepository):
         if not self._doesColumnInTableExist("preserved_libs", "atom"):
             self._createPreservedLibsAtomColumn()
 
+        # added on Oct. 2026
+        if not self._doesTableExist("reversedependencies"):
+            self._createReverseDependenciesTable()
+
         # added on Sept. 2014, keep forever? ;-)
         self._migrateNeededLibs()
 
@@ -2035,6 +2100,8 @@ class EntropySQLiteRepository(EntropySQLRepository):
     def importRepository(dumpfile, db, data = None):
         """
         Reimplemented from EntropyRepositoryBase.
+        Binary snapshots (see exportRepositorySnapshot()) are bulk loaded
+        in-process, SQL text dumps are still fed to /usr/bin/sqlite3.
         @todo: remove /usr/bin/sqlite3 dependency
         """
         dbfile = os.path.realpath(db)
@@ -2044,6 +2111,9 @@ class EntropySQLiteRepository(EntropySQLRepository):
             raise AttributeError("dbfile value is invalid")
         if not entropy.tools.is_valid_path_string(dumpfile):
             raise AttributeError("dumpfile value is invalid")
+        if is_snapshot(dumpfile):
+            return EntropySQLiteRepository._importRepositorySnapshot(
+                dumpfile, dbfile, tmp_dbfile)
         with open(dumpfile, "rb") as in_f:
             try:
                 proc = subprocess.Popen(("/usr/bin/sqlite3", tmp_dbfile,),
@@ -2056,6 +2126,174 @@ class EntropySQLiteRepository(EntropySQLRepository):
                 os.rename(tmp_dbfile, dbfile)
         return rc
 
+    # rows inserted per transaction by _importRepositorySnapshot()
+    _SNAPSHOT_IMPORT_TRANSACTION_ROWS = 200000
+
+    @staticmethod
+    def _importRepositorySnapshot(dumpfile, dbfile, tmp_dbfile):
+        """
+        Bulk load a binary repository snapshot into dbfile. Data is
+        inserted through executemany() in large transactions, indexes and
+        triggers are created only once all the data is in place.
+        The new database is built at tmp_dbfile and atomically moved over
+        dbfile on success.
+
+        @return: import return code (0 = OK)
+        @rtype: int
+        """
+        dbapi2 = EntropySQLiteRepository.SQLiteProxy.get()
+        try:
+            os.remove(tmp_dbfile)
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+
+        conn = dbapi2.connect(tmp_dbfile, isolation_level = None)
+        conn.text_factory = const_convert_to_unicode
+        rc = 0
+        try:
+            cur = conn.cursor()
+            cur.execute("PRAGMA journal_mode = OFF")
+            cur.execute("PRAGMA synchronous = OFF")
+            cur.execute("BEGIN TRANSACTION")
+
+            deferred = []
+            insert_sql = None
+            pending_rows = 0
+            max_rows = \
+                EntropySQLiteRepository._SNAPSHOT_IMPORT_TRANSACTION_ROWS
+            with open(dumpfile, "rb") as in_f:
+                for kind, data in SnapshotReader(in_f):
+                    if kind == "schema":
+                        cur.execute(data)
+                    elif kind == "table":
+                        name, columns = data
+                        insert_sql = "INSERT INTO \"%s\" VALUES (%s)" % (
+                            name, ", ".join(["?"] * len(columns)))
+                    elif kind == "rows":
+                        cur.executemany(insert_sql, data)
+                        pending_rows += len(data)
+                    elif kind == "rawrows":
+                        EntropySQLiteRepository._importSnapshotRawRows(
+                            cur, name, insert_sql, data)
+                        pending_rows += len(data)
+                    elif kind == "deferred":
+                        deferred.append(data)
+
+                    if pending_rows >= max_rows:
+                        cur.execute("COMMIT")
+                        cur.execute("BEGIN TRANSACTION")
+                        pending_rows = 0
+
+            for sql in deferred:
+                cur.execute(sql)
+            cur.execute("COMMIT")
+
+        except (DataError, dbapi2.Error, struct.error,
+                UnicodeDecodeError) as err:
+            const_debug_write(__name__,
+                "_importRepositorySnapshot: error: %s" % (repr(err),))
+            rc = 1
+        finally:
+            conn.close()
+
+        if rc == 0:
+            os.rename(tmp_dbfile, dbfile)
+        else:
+            try:
+                os.remove(tmp_dbfile)
+            except OSError:
+                pass
+        return rc
+
+    @staticmethod
+    def _importSnapshotRawRows(cur, name, insert_sql, rows):
+        """
+        Insert snapshot rows containing SnapshotText values (text that
+        is not valid UTF-8) into the given table, binding them as TEXT.
+        """
+        clean_rows = []
+        for row in rows:
+            if SnapshotText not in set(x.__class__ for x in row):
+                clean_rows.append(row)
+                continue
+            # keep the insertion order, implicit rowids depend on it
+            if clean_rows:
+                cur.executemany(insert_sql, clean_rows)
+                clean_rows = []
+            placeholders = []
+            values = []
+            for value in row:
+                if isinstance(value, SnapshotText):
+                    placeholders.append("CAST(? AS TEXT)")
+                    values.append(bytes(value))
+                else:
+                    placeholders.append("?")
+                    values.append(value)
+            cur.execute("INSERT INTO \"%s\" VALUES (%s)" % (
+                name, ", ".join(placeholders)), values)
+        if clean_rows:
+            cur.executemany(insert_sql, clean_rows)
+
+    def exportRepositorySnapshot(self, dumpfile):
+        """
+        Reimplemented from EntropyRepositoryBase.
+        """
+        writer = SnapshotWriter(dumpfile)
+
+        self._connection().unicode()
+        cur = self._cursor().execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE sql NOT NULL AND type=='table'
+        """)
+        tables = cur.fetchall()
+        cur = self._cursor().execute("""
+        SELECT sql FROM sqlite_master
+        WHERE sql NOT NULL AND type!='table' AND type!='meta'
+        """)
+        deferred = self._cur2tuple(cur)
+
+        for name, sql in tables:
+
+            self.output(
+                red("%s " % (
+                    _("Exporting database table"),
+                ) ) + "["+blue(str(name))+"]",
+                importance = 0,
+                level = "info",
+                back = True,
+                header = "   "
+            )
+            if name.startswith("sqlite_"):
+                continue
+            if name == "packagesearch" or name.startswith("packagesearch_"):
+                # local full-text index, rebuilt by createAllIndexes()
+                continue
+
+            writer.add_schema(sql)
+            cur2 = self._cursor().execute("PRAGMA table_info('%s')" % name)
+            writer.add_table(name, [r[1] for r in cur2.fetchall()])
+            # text is exported as raw UTF-8, see SnapshotText
+            self._connection().snapshottext()
+            try:
+                writer.add_rows(
+                    self._cursor().execute("SELECT * FROM '%s'" % (name,)))
+            finally:
+                self._connection().unicode()
+
+        for sql in deferred:
+            writer.add_deferred(sql)
+
+        writer.close()
+
+        self.output(
+            red(_("Database Export complete.")),
+            importance = 0,
+            level = "info",
+            header = "   "
+        )
+        # remember to close the file
+
     def exportRepository(self, dumpfile):
         """
         Reimplemented from EntropyRepositoryBase.
@@ -2082,6 +2320,9 @@ class EntropySQLiteRepository(EntropySQLRepository):
             )
             if name.startswith("sqlite_"):
                 continue
+            if name == "packagesearch" or name.startswith("packagesearch_"):
+                # local full-text index, rebuilt by createAllIndexes()
+                continue
 
             t_cmd = "CREATE TABLE"
             if sql.startswith(t_cmd) and gentle_with_tables:
@@ -2143,8 +2384,9 @@ class EntropySQLiteRepository(EntropySQLRepository):
             return 0.0
         return os.path.getmtime(self._db)
 
-    def checksum(self, do_order = False, strict = True,
-                 include_signatures = False, include_dependencies = False):
+    def _contentChecksum(self, do_order = False, strict = True,
+                         include_signatures = False,
+                         include_dependencies = False):
         """
         Reimplemented from EntropySQLRepository.
         We have to handle _baseinfo_extrainfo_2010.
@@ -2153,7 +2395,7 @@ class EntropySQLiteRepository(EntropySQLRepository):
         _baseinfo_extrainfo_2010 = self._isBaseinfoExtrainfo2010()
         if _baseinfo_extrainfo_2010:
             return super(EntropySQLiteRepository,
-                         self).checksum(
+                         self)._contentChecksum(
                 do_order = do_order,
                 strict = strict,
                 include_signatures = include_signatures)
@@ -2394,6 +2636,7 @@ class EntropySQLiteRepository(EntropySQLRepository):
                 self._cursor().execute('DROP INDEX IF EXISTS %s' % (index,))
             except OperationalError:
                 continue
+        self._dropPackageSearchIndex()
 
     def createAllIndexes(self):
         """
@@ -2405,6 +2648,133 @@ class EntropySQLiteRepository(EntropySQLRepository):
             self.__createLicensesIndex()
             self.__createCategoriesIndex()
             self.__createCompileFlagsIndex()
+        if self._indexing:
+            self._createPackageSearchIndex()
+
+    def _createPackageSearchIndex(self):
+        """
+        Build the "packagesearch" full-text index, a FTS5 table using the
+        trigram tokenizer, holding atom, name, description and provides
+        of every package (rowid is the package identifier). The index is
+        optional: if FTS5 or the trigram tokenizer (SQLite >= 3.34) are
+        not available, searches keep scanning the regular tables.
+        """
+        if self._isPackageSearchIndexValid():
+            return
+        try:
+            self._cursor().executescript("""
+            DROP TABLE IF EXISTS packagesearch;
+            CREATE VIRTUAL TABLE packagesearch USING fts5(
+                atom, name, description, provide,
+                tokenize = 'trigram'
+            );
+            """)
+        except OperationalError as err:
+            const_debug_write(
+                __name__,
+                "_createPackageSearchIndex: unsupported: %s" % (err,))
+            self._clearLiveCache("_doesTableExist")
+            return
+
+        self._clearLiveCache("_doesTableExist")
+        self._insertPackageSearchIndex()
+        self._setSetting(self._PACKAGE_SEARCH_SETTING,
+                         self._PACKAGE_SEARCH_VERSION)
+
+    def _dropPackageSearchIndex(self):
+        """
+        Drop the "packagesearch" full-text index, together with its
+        shadow tables and its settings table key.
+        """
+        try:
+            self._cursor().execute("DROP TABLE IF EXISTS packagesearch")
+        except OperationalError as err:
+            # FTS5 not available, the table cannot be used anyway
+            const_debug_write(
+                __name__,
+                "_dropPackageSearchIndex: cannot drop: %s" % (err,))
+        self._clearLiveCache("_doesTableExist")
+
+        if self._doesTableExist("settings"):
+            self._cursor().execute("""
+            DELETE FROM settings WHERE setting_name = ?
+            """, (self._PACKAGE_SEARCH_SETTING,))
+            self._settings_cache.clear()
+
+    def _insertPackageSearchIndex(self, package_id = None):
+        """
+        Fill the "packagesearch" full-text index with the metadata of
+        the given package, or of all the packages if None.
+
+        @keyword package_id: package identifier
+        @type package_id: int
+        """
+        where_str = ''
+        args = ()
+        if package_id is not None:
+            where_str = 'WHERE baseinfo.idpackage = (?)'
+            args = (package_id,)
+
+        self._cursor().execute("""
+        INSERT INTO packagesearch (rowid, atom, name, description, provide)
+        SELECT baseinfo.idpackage, baseinfo.atom, baseinfo.name,
+            extrainfo.description,
+            (SELECT group_concat(provide.atom, ' ') FROM provide
+                WHERE provide.idpackage = baseinfo.idpackage)
+        FROM baseinfo LEFT OUTER JOIN extrainfo
+            ON extrainfo.idpackage = baseinfo.idpackage
+        %s
+        """ % (where_str,), args)
+
+    def _updatePackageSearchIndex(self, package_id):
+        """
+        Refresh the "packagesearch" full-text index entry of the given
+        package, if the index is in use.
+
+        @param package_id: package identifier
+        @type package_id: int
+        """
+        if not self._isPackageSearchIndexValid():
+            return
+        self._cursor().execute(
+            "DELETE FROM packagesearch WHERE rowid = (?)", (package_id,))
+        self._insertPackageSearchIndex(package_id = package_id)
+
+    def _isPackageSearchIndexValid(self):
+        """
+        Return whether the "packagesearch" full-text index is available
+        and in sync with the repository content.
+        """
+        try:
+            version = self.getSetting(self._PACKAGE_SEARCH_SETTING)
+        except KeyError:
+            return False
+        if version != self._PACKAGE_SEARCH_VERSION:
+            return False
+        # the setting survives exportRepository(), the index does not.
+        # The table may also exist but be unusable, if this SQLite
+        # lacks FTS5 or the trigram tokenizer.
+        try:
+            self._cursor().execute(
+                "SELECT rowid FROM packagesearch LIMIT 0").fetchall()
+        except OperationalError:
+            return False
+        return True
+
+    def _searchIndexFilter(self, columns, keyword):
+        """
+        Reimplemented from EntropySQLRepository.
+        Trigram LIKE lookups are served by the "packagesearch" index.
+        """
+        literals = self._LIKE_WILDCARDS_RE.split(keyword)
+        if max(len(x) for x in literals) < self._PACKAGE_SEARCH_MIN_LITERAL:
+            return None
+        if not self._isPackageSearchIndexValid():
+            return None
+
+        where_str = " OR ".join("%s LIKE ?" % (x,) for x in columns)
+        return ("SELECT rowid FROM packagesearch WHERE %s" % (where_str,),
+                (keyword,) * len(columns))
 
     def __createCompileFlagsIndex(self):
         try:
@@ -2762,6 +3132,17 @@ class EntropySQLiteRepository(EntropySQLRepository):
         self._clearLiveCache("_doesTableExist")
         self._clearLiveCache("_doesColumnInTableExist")
 
+    def _createReverseDependenciesTable(self):
+        self._cursor().executescript("""
+            CREATE TABLE reversedependencies (
+                idpackage INTEGER,
+                iddependency INTEGER,
+                PRIMARY KEY(idpackage, iddependency)
+            );
+        """)
+        self._clearLiveCache("_doesTableExist")
+        self._clearLiveCache("_doesColumnInTableExist")
+
     def _createPreservedLibsAtomColumn(self):
         self._cursor().execute("""
         ALTER TABLE preserved_libs ADD atom VARCHAR;
@@ -880,6 +880,164 @@ def create_package_atom_string(category, name, version, package_tag):
     package_name += package_tag
     return package_name
 
+class _GenerationalCache(object):
+
+    """
+    Bounded cache approximating a LRU policy using two generations of
+    dicts: when the young generation is full, it becomes the old one and
+    the previous old generation is dropped. Items found in the old
+    generation are promoted back to the young one. Lookups and insertions
+    are plain dict operations, hence thread-safe under the GIL.
+    """
+
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._young = {}
+        self._old = {}
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None.
+        """
+        value = self._young.get(key)
+        if value is None:
+            value = self._old.get(key)
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """
+        Cache the given value for key.
+        """
+        young = self._young
+        if len(young) >= self._max_size:
+            self._old = young
+            young = self._young = {}
+        young[key] = value
+
+    def clear(self):
+        """
+        Drop all the cached values.
+        """
+        self._young = {}
+        self._old = {}
+
+
+class Atom(object):
+
+    """
+    Parsed Entropy package atom (or dependency) string. All the metadata
+    used by the package matching code is extracted once, at construction
+    time, and exposed through read-only attributes. Do not instantiate
+    this class directly but use parse_atom(), which returns interned
+    objects from a bounded cache.
+
+    Example usage:
+        >>> atom = parse_atom(">=app-misc/foo-1.0:2[bar]")
+        >>> atom.key, atom.slot, atom.use, atom.direction, atom.version
+        ('app-misc/foo', '2', ('bar',), '>=', '1.0-r0')
+    """
+
+    __slots__ = ("atom", "tag", "use", "slot", "revision", "scan_atom",
+                 "direction", "justname", "stripped_atom", "match_key",
+                 "category", "name", "version", "_key")
+
+    def __init__(self, atom):
+        """
+        Atom constructor.
+
+        @param atom: atom or dependency string
+        @type atom: string
+        """
+        self.atom = atom
+        self.tag = dep_gettag(atom)
+        try:
+            self.use = dep_getusedeps(atom)
+        except InvalidAtom:
+            self.use = ()
+        self.slot = dep_getslot(atom)
+        self.revision = dep_get_entropy_revision(atom)
+        self._key = None
+
+        scan_atom = remove_usedeps(atom)
+        scan_atom = remove_tag(scan_atom)
+        scan_atom = remove_slot(scan_atom)
+        scan_atom = remove_entropy_revision(scan_atom)
+        self.scan_atom = scan_atom
+
+        self.direction = ""
+        self.justname = True
+        self.stripped_atom = ""
+        self.match_key = ""
+        self.category = ""
+        self.name = ""
+        self.version = ""
+        if not scan_atom:
+            return
+
+        scan_cpv = dep_getcpv(scan_atom)
+        wildcard = ""
+        if scan_atom.endswith("*"):
+            wildcard = "*"
+        stripped_atom = scan_cpv + wildcard
+        self.stripped_atom = stripped_atom
+        self.direction = scan_atom[0:-len(stripped_atom)]
+
+        self.justname = isjustname(scan_cpv)
+        pkgkey = stripped_atom
+        if not self.justname:
+            data = catpkgsplit(scan_cpv)
+            if data is None:
+                # badly formatted
+                self.match_key = pkgkey
+                return
+            self.version = data[2] + wildcard + "-" + data[3]
+            pkgkey = dep_getkey(stripped_atom)
+        self.match_key = pkgkey
+
+        splitkey = pkgkey.split("/")
+        if len(splitkey) == 2:
+            self.category, self.name = splitkey
+        else:
+            self.category, self.name = "null", splitkey[0]
+
+    @property
+    def key(self):
+        """
+        Return the category/package-name of the atom, like dep_getkey().
+        """
+        key = self._key
+        if key is None:
+            key = dep_getkey(self.atom)
+            self._key = key
+        return key
+
+    def __repr__(self):
+        return "<Atom %r>" % (self.atom,)
+
+
+_ATOM_CACHE = _GenerationalCache(16384)
+# DependencyStringParser parsed (boolean) dependency strings
+_DEPENDENCY_STRING_CACHE = _GenerationalCache(4096)
+
+def parse_atom(atom):
+    """
+    Return the parsed Atom object of the given atom (or dependency) string.
+    Objects are cached, so parsing the same string again is cheap.
+
+    @param atom: atom or dependency string
+    @type atom: string
+    @return: the Atom object
+    @rtype: Atom
+    """
+    obj = _ATOM_CACHE.get(atom)
+    if obj is None:
+        obj = Atom(atom)
+        _ATOM_CACHE.set(atom, obj)
+    return obj
+
+
 class Dependency(object):
 
     """
@@ -1154,8 +1312,11 @@ class DependencyStringParser(object):
         self.__clear_cache()
         matched = False
         try:
-            matched_deps = self.__evaluate_subs(
-                self.__encode_sub("(" + self.__dep + ")"))
+            subs = _DEPENDENCY_STRING_CACHE.get(self.__dep)
+            if subs is None:
+                subs = self.__encode_sub("(" + self.__dep + ")")
+                _DEPENDENCY_STRING_CACHE.set(self.__dep, subs)
+            matched_deps = self.__evaluate_subs(subs)
             if matched_deps:
                 matched = True
         except DependencyStringParser.MalformedDependency:
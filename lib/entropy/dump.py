@@ -219,7 +219,7 @@ def serialize_string(myobj):
     """
     if const_is_python3():
         return pickle.dumps(myobj, protocol = COMPAT_PICKLE_PROTOCOL,
-            fix_imports = True, encoding = etpConst['conf_raw_encoding'])
+            fix_imports = True)
     else:
         return pickle.dumps(myobj)
 
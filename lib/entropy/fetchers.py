@@ -19,6 +19,7 @@ except ImportError:
     # python 3.x
     import http.client as httplib
 import hashlib
+import select
 import socket
 import pty
 import subprocess
@@ -44,9 +45,275 @@ from entropy.output import TextInterface, darkblue, darkred, purple, blue, \
 
 from entropy.i18n import _, ngettext
 from entropy.misc import ParallelTask
+from entropy.core import Singleton
 from entropy.core.settings.base import SystemSettings
 
 
+class HTTPConnectionPool(Singleton):
+
+    """
+    Process-wide pool of idle HTTP/1.1 keep-alive connections, indexed by
+    protocol and host. Connections are handed out to one user at a time
+    and must be given back through release() once the response has been
+    fully read, so that subsequent requests to the same host can skip the
+    TCP (and TLS) handshake.
+    """
+
+    # maximum number of idle connections kept for each host
+    MAX_IDLE_PER_HOST = 8
+    # idle connections older than this (in seconds) are not reused
+    IDLE_TIMEOUT = 30
+
+    def init_singleton(self):
+        self._pool = {}
+        self._pool_lock = threading.Lock()
+
+    @staticmethod
+    def _is_connection_alive(connection):
+        """
+        Return whether the idle connection socket is still usable. An
+        idle socket that is readable has either been closed by the server
+        or contains unexpected data, in both cases it must be dropped.
+        """
+        sock = connection.sock
+        if sock is None:
+            return False
+        try:
+            readable, _wr, _ex = select.select([sock], [], [], 0)
+        except (select.error, socket.error, ValueError):
+            return False
+        return not readable
+
+    def acquire(self, protocol, host, timeout):
+        """
+        Return a connection to the given host, reusing an idle one if
+        available.
+
+        @param protocol: either "http" or "https"
+        @type protocol: string
+        @param host: host (and optional port) to connect to
+        @type host: string
+        @param timeout: socket timeout, in seconds
+        @type timeout: float
+        @return: tuple composed by the connection object and a bool stating
+            whether the connection has been reused
+        @rtype: tuple
+        """
+        key = (protocol, host)
+        now = time.time()
+        while True:
+            with self._pool_lock:
+                idle = self._pool.get(key)
+                if not idle:
+                    break
+                connection, idle_since = idle.pop()
+            if (now - idle_since) < self.IDLE_TIMEOUT and \
+                    self._is_connection_alive(connection):
+                connection.timeout = timeout
+                try:
+                    connection.sock.settimeout(timeout)
+                except socket.error:
+                    connection.close()
+                    continue
+                return connection, True
+            connection.close()
+
+        if protocol == "https":
+            connection = httplib.HTTPSConnection(host, timeout = timeout)
+        else:
+            connection = httplib.HTTPConnection(host, timeout = timeout)
+        return connection, False
+
+    def release(self, protocol, host, connection):
+        """
+        Give back a connection whose last response has been fully read.
+        If the pool for the given host is full, the connection is closed.
+
+        @param protocol: either "http" or "https"
+        @type protocol: string
+        @param host: host (and optional port) of the connection
+        @type host: string
+        @param connection: connection object returned by acquire()
+        @type connection: httplib.HTTPConnection
+        """
+        if connection.sock is None:
+            # closed, nothing to keep
+            return
+        key = (protocol, host)
+        with self._pool_lock:
+            idle = self._pool.setdefault(key, [])
+            if len(idle) < self.MAX_IDLE_PER_HOST:
+                idle.append((connection, time.time()))
+                return
+        connection.close()
+
+    def clear(self):
+        """
+        Close all the idle connections.
+        """
+        with self._pool_lock:
+            pool = self._pool
+            self._pool = {}
+        for idle in pool.values():
+            for connection, _idle_since in idle:
+                connection.close()
+
+
+class _KeepAliveResponseFile(object):
+
+    """
+    File object wrapping a HTTPResponse obtained through a pooled
+    connection. The connection is given back to HTTPConnectionPool as soon
+    as the response body has been consumed, or dropped if the response is
+    closed before that.
+    """
+
+    def __init__(self, pool, key, connection, response):
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+
+    def _check_done(self):
+        if self._connection is None:
+            return
+        if self._response.isclosed():
+            connection, self._connection = self._connection, None
+            if self._response.will_close:
+                connection.close()
+            else:
+                self._pool.release(self._key[0], self._key[1], connection)
+
+    def read(self, *args):
+        data = self._response.read(*args)
+        self._check_done()
+        return data
+
+    def readline(self):
+        readline = getattr(self._response, "readline", None)
+        if readline is not None:
+            data = readline()
+        else:
+            # Python 2.x HTTPResponse does not implement readline()
+            chars = []
+            while True:
+                char = self._response.read(1)
+                if not char:
+                    break
+                chars.append(char)
+                if char == b"\n":
+                    break
+            data = b"".join(chars)
+        self._check_done()
+        return data
+
+    def readlines(self, *args):
+        lines = []
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            lines.append(line)
+        return lines
+
+    def close(self):
+        self._check_done()
+        if self._connection is not None:
+            # body not fully read, the connection cannot be reused
+            connection, self._connection = self._connection, None
+            self._response.close()
+            connection.close()
+
+
+class _KeepAliveHandlerMixin(object):
+
+    """
+    urllib handler logic serving HTTP requests through HTTPConnectionPool.
+    """
+
+    _keepalive_protocol = None
+
+    def _keepalive_open(self, req):
+        if getattr(req, "_tunnel_host", None):
+            # CONNECT tunnels through proxies are not pooled
+            return None
+
+        if const_is_python3():
+            host = req.host
+            selector = req.selector
+            data = req.data
+        else:
+            host = req.get_host()
+            selector = req.get_selector()
+            data = req.get_data()
+        if not host:
+            raise urlmod_error.URLError("no host given")
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items()
+                            if k not in headers))
+        headers = dict((name.title(), val) for name, val in headers.items())
+
+        protocol = self._keepalive_protocol
+        pool = HTTPConnectionPool()
+        timeout = getattr(req, "timeout", None)
+        if timeout is None:
+            timeout = socket.getdefaulttimeout()
+
+        while True:
+            connection, reused = pool.acquire(protocol, host, timeout)
+            try:
+                connection.request(req.get_method(), selector, data, headers)
+                response = connection.getresponse()
+            except (socket.error, httplib.HTTPException) as err:
+                connection.close()
+                if reused:
+                    # the server dropped the idle connection, retry
+                    # with a fresh one.
+                    continue
+                if isinstance(err, socket.error):
+                    raise urlmod_error.URLError(err)
+                raise
+            break
+
+        fp = _KeepAliveResponseFile(
+            pool, (protocol, host), connection, response)
+        resp = urlmod.addinfourl(
+            fp, response.msg, req.get_full_url(), response.status)
+        resp.msg = response.reason
+        return resp
+
+
+class KeepAliveHTTPHandler(_KeepAliveHandlerMixin, urlmod.HTTPHandler):
+
+    """
+    urllib HTTP handler reusing keep-alive connections.
+    """
+
+    _keepalive_protocol = "http"
+
+    def http_open(self, req):
+        resp = self._keepalive_open(req)
+        if resp is None:
+            return urlmod.HTTPHandler.http_open(self, req)
+        return resp
+
+
+class KeepAliveHTTPSHandler(_KeepAliveHandlerMixin, urlmod.HTTPSHandler):
+
+    """
+    urllib HTTPS handler reusing keep-alive connections.
+    """
+
+    _keepalive_protocol = "https"
+
+    def https_open(self, req):
+        resp = self._keepalive_open(req)
+        if resp is None:
+            return urlmod.HTTPSHandler.https_open(self, req)
+        return resp
+
+
 class UrlFetcher(TextInterface):
 
     """
@@ -72,6 +339,15 @@ class UrlFetcher(TextInterface):
     TIMEOUT_FETCH_ERROR = "-4"
     GENERIC_FETCH_WARN = "-2"
 
+    _KEEPALIVE_OPENER = None
+    _KEEPALIVE_OPENER_LOCK = threading.Lock()
+
+    # download_ranges(): maximum number of byte ranges asked in a single
+    # HTTP request, and ranges closer than this many bytes are fetched
+    # together (a multipart/byteranges part header is about as big).
+    _RANGES_PER_REQUEST = 64
+    _RANGES_MERGE_GAP = 128
+
     def __init__(self, url, path_to_save, checksum = True,
                  show_speed = True, resume = True,
                  abort_check_func = None, disallow_redirect = False,
@@ -388,6 +664,220 @@ class UrlFetcher(TextInterface):
 
             return status
 
+    def download_ranges(self, ranges):
+        """
+        Download the given byte ranges of the URL given at construction
+        time, writing their data one after the other to path_to_save.
+        Only file, http and https URLs are supported, HTTP servers must
+        honour Range requests. Up to _RANGES_PER_REQUEST ranges are asked
+        in a single HTTP request (multipart/byteranges), servers that do
+        not support multiple ranges are asked one range at a time.
+
+        @param ranges: sorted list of (offset, size) tuples
+        @type ranges: list
+        @return: download status, which can be either one of:
+            UrlFetcher.GENERIC_FETCH_ERROR means error.
+            UrlFetcher.TIMEOUT_FETCH_ERROR means timeout error.
+        Otherwise returns the md5 hash of the downloaded data.
+        @rtype: string
+        """
+        protocol = UrlFetcher._get_url_protocol(self.__url)
+        if protocol not in ("file", "http", "https"):
+            return UrlFetcher.GENERIC_FETCH_ERROR
+
+        const_debug_write(
+            __name__,
+            "UrlFetcher.download_ranges(%s), save: %s, ranges: %d" % (
+                self.__url, self.__path_to_save, len(ranges)))
+
+        # spans are the byte ranges actually requested, each one
+        # covering one or more (close enough) ranges.
+        spans = []
+        for offset, size in ranges:
+            if spans and offset - sum(spans[-1][:2]) <= \
+                    UrlFetcher._RANGES_MERGE_GAP:
+                span = spans[-1]
+                span[1] = offset + size - span[0]
+                span[2].append((offset, size))
+            else:
+                spans.append([offset, size, [(offset, size)]])
+
+        md5 = hashlib.new("md5")
+        try:
+            with open(self.__path_to_save, "wb") as local_f:
+                if protocol == "file":
+                    self._download_file_ranges(ranges, local_f, md5)
+                else:
+                    self._download_http_ranges(spans, local_f, md5)
+
+        except socket.timeout:
+            return UrlFetcher.TIMEOUT_FETCH_ERROR
+        except (urlmod_error.URLError, httplib.HTTPException,
+                socket.error, IOError, OSError, ValueError) as err:
+            const_debug_write(
+                __name__,
+                "UrlFetcher.download_ranges(%s), error: %s" % (
+                    self.__url, repr(err)))
+            return UrlFetcher.GENERIC_FETCH_ERROR
+
+        return md5.hexdigest()
+
+    def _download_ranges_check(self):
+        """
+        Run the abort and thread stop callbacks between download_ranges()
+        requests.
+        """
+        if self.__abort_check_func is not None:
+            self.__abort_check_func()
+        if self.__thread_stop_func is not None:
+            self.__thread_stop_func()
+
+    def _download_file_ranges(self, ranges, local_f, md5):
+        """
+        download_ranges() implementation for file:// URLs.
+        """
+        path = urlmod.url2pathname(self.__url[len("file://"):])
+        with open(path, "rb") as remote_f:
+            for offset, size in ranges:
+                self._download_ranges_check()
+                remote_f.seek(offset)
+                data = remote_f.read(size)
+                if len(data) != size:
+                    raise IOError("short read at offset %d" % (offset,))
+                local_f.write(data)
+                md5.update(data)
+
+    def _download_http_ranges(self, spans, local_f, md5):
+        """
+        download_ranges() implementation for HTTP(S) URLs.
+        Raise ValueError if the server does not honour Range requests.
+        """
+        url = self.__encode_url(self.__url)
+        opener = self._setup_urllib_proxy()
+        if opener is None:
+            urlopen = urlmod.urlopen
+        else:
+            urlopen = opener.open
+
+        per_request = UrlFetcher._RANGES_PER_REQUEST
+        idx = 0
+        while idx < len(spans):
+            self._download_ranges_check()
+
+            batch = spans[idx:idx + per_request]
+            parts = self._http_range_request(urlopen, url, batch)
+            if parts is None:
+                if len(batch) == 1:
+                    raise ValueError("Range requests not supported")
+                # multiple ranges not supported, one at a time then
+                per_request = 1
+                continue
+            idx += len(batch)
+
+            for span in batch:
+                for offset, size in span[2]:
+                    for part_offset, part_data in parts:
+                        start = offset - part_offset
+                        if start >= 0 and \
+                                start + size <= len(part_data):
+                            data = part_data[start:start + size]
+                            break
+                    else:
+                        raise ValueError(
+                            "range %d-%d missing from response" % (
+                                offset, offset + size - 1))
+                    local_f.write(data)
+                    md5.update(data)
+
+    def _http_range_request(self, urlopen, url, spans):
+        """
+        Request the given byte ranges through a single HTTP request.
+        Return a list of (offset, data) tuples, as sent by the server,
+        or None if the server replied with the whole file.
+        """
+        headers = {
+            "Range": "bytes=" + ",".join(
+                ["%d-%d" % (x[0], x[0] + x[1] - 1) for x in spans]),
+        }
+        req = urlmod.Request(url, headers = headers)
+        remote_f = urlopen(req, None, self.__timeout)
+        try:
+            if remote_f.getcode() != 206:
+                # Range not supported, server is sending all the file
+                return None
+            if self.__disallow_redirect and (url != remote_f.geturl()):
+                raise ValueError("redirect not allowed")
+
+            info = remote_f.info()
+            content_type = info.get("Content-Type", "")
+            body = remote_f.read()
+            if content_type.lower().startswith("multipart/byteranges"):
+                return UrlFetcher._parse_byteranges(body, content_type)
+
+            start, end = UrlFetcher._parse_content_range(
+                info.get("Content-Range", ""))
+            if len(body) != end - start + 1:
+                raise ValueError("short range response")
+            return [(start, body)]
+        finally:
+            remote_f.close()
+
+    @staticmethod
+    def _parse_content_range(value):
+        """
+        Parse a "bytes <start>-<end>/<size>" Content-Range header value,
+        return (start, end). Raise ValueError if it is malformed.
+        """
+        unit, _sep, value = value.strip().partition(" ")
+        if unit.lower() != "bytes":
+            raise ValueError("invalid Content-Range unit: %s" % (unit,))
+        start, end = value.split("/")[0].split("-")
+        return int(start), int(end)
+
+    @staticmethod
+    def _parse_byteranges(body, content_type):
+        """
+        Parse a multipart/byteranges response body, return a list of
+        (offset, data) tuples. Raise ValueError if it is malformed.
+        """
+        boundary = None
+        for param in content_type.split(";")[1:]:
+            name, _sep, value = param.partition("=")
+            if name.strip().lower() == "boundary":
+                boundary = value.strip().strip('"')
+        if not boundary:
+            raise ValueError("multipart/byteranges without boundary")
+
+        delimiter = b"--" + boundary.encode("ascii")
+        parts = []
+        pos = body.find(delimiter)
+        while pos != -1:
+            pos += len(delimiter)
+            if body[pos:pos + 2] == b"--":
+                # closing delimiter
+                return parts
+            headers_end = body.find(b"\r\n\r\n", pos)
+            if headers_end == -1:
+                raise ValueError("malformed multipart/byteranges part")
+
+            start, end = None, None
+            headers = body[pos:headers_end].decode("latin-1")
+            for line in headers.split("\r\n"):
+                name, _sep, value = line.partition(":")
+                if name.strip().lower() == "content-range":
+                    start, end = UrlFetcher._parse_content_range(value)
+            if start is None:
+                raise ValueError("multipart/byteranges part without range")
+
+            data_start = headers_end + 4
+            data = body[data_start:data_start + end - start + 1]
+            if len(data) != end - start + 1:
+                raise ValueError("short multipart/byteranges part")
+            parts.append((start, data))
+            pos = body.find(delimiter, data_start + len(data))
+
+        raise ValueError("unterminated multipart/byteranges response")
+
     def _setup_rsync_args(self):
         protocol = UrlFetcher._get_url_protocol(self.__url)
         url = self.__url
@@ -547,6 +1037,9 @@ class UrlFetcher(TextInterface):
     def _setup_urllib_proxy(self):
         """
         Setup urllib proxy data
+
+        @return: the urllib opener to use, None for the global one
+        @rtype: urllib OpenerDirector or None
         """
         mydict = {}
         proxy_data = self.__system_settings['system']['proxy']
@@ -558,15 +1051,35 @@ class UrlFetcher(TextInterface):
             mydict['username'] = proxy_data['username']
             mydict['password'] = proxy_data['password']
             add_proxy_opener(urlmod, mydict)
-        else:
-            # unset
-            urlmod._opener = None
+            return None
+
+        # unset
+        urlmod._opener = None
+        return UrlFetcher._keepalive_opener()
+
+    @staticmethod
+    def _keepalive_opener():
+        """
+        Return the shared urllib opener serving HTTP and HTTPS requests
+        through HTTPConnectionPool.
+        """
+        with UrlFetcher._KEEPALIVE_OPENER_LOCK:
+            opener = UrlFetcher._KEEPALIVE_OPENER
+            if opener is None:
+                opener = urlmod.build_opener(
+                    KeepAliveHTTPHandler(), KeepAliveHTTPSHandler())
+                UrlFetcher._KEEPALIVE_OPENER = opener
+        return opener
 
     def _urllib_download(self):
         """
         urrlib2 based downloader. This is the default for HTTP and FTP urls.
         """
-        self._setup_urllib_proxy()
+        opener = self._setup_urllib_proxy()
+        if opener is None:
+            urlopen = urlmod.urlopen
+        else:
+            urlopen = opener.open
         self.__setup_urllib_resume_support()
         # we're going to feed the md5 digestor on the way.
         self.__use_md5_checksum = True
@@ -594,7 +1107,7 @@ class UrlFetcher(TextInterface):
 
             # get file size if available
             try:
-                self.__remotefile = urlmod.urlopen(req, None, self.__timeout)
+                self.__remotefile = urlopen(req, None, self.__timeout)
             except KeyboardInterrupt:
                 self.__urllib_close(False)
                 raise
@@ -690,7 +1203,7 @@ class UrlFetcher(TextInterface):
                     self.__remotefile.close()
                 except:
                     pass
-                self.__remotefile = urlmod.urlopen(
+                self.__remotefile = urlopen(
                     request, None, self.__timeout)
 
             elif self.__startingposition == self.__remotesize:
@@ -976,7 +1489,8 @@ class MultipleUrlFetcher(TextInterface):
                  abort_check_func = None, disallow_redirect = False,
                  url_fetcher_class = None, timeout = None,
                  download_context_func = None,
-                 pre_download_hook = None, post_download_hook = None):
+                 pre_download_hook = None, post_download_hook = None,
+                 max_workers = None, max_connections_per_mirror = None):
         """
         @param url_path_list: list of tuples composed by url and
             path to save, for eg. [(url,path_to_save,),...]
@@ -1020,6 +1534,13 @@ class MultipleUrlFetcher(TextInterface):
             The function takes a path (the download path) and the download
             status and the download id as arguments.
         @type post_download_hook: callable
+        @keyword max_workers: maximum number of concurrent downloads, if None
+            the value is read from Entropy configuration files.
+        @type max_workers: int
+        @keyword max_connections_per_mirror: maximum number of concurrent
+            downloads from the same host, if None the value is read from
+            Entropy configuration files.
+        @type max_connections_per_mirror: int
         """
         self._progress_data = {}
         self._url_path_list = url_path_list
@@ -1034,6 +1555,8 @@ class MultipleUrlFetcher(TextInterface):
         self.__download_context_func = download_context_func
         self.__pre_download_hook = pre_download_hook
         self.__post_download_hook = post_download_hook
+        self.__max_workers = max_workers
+        self.__max_connections_per_mirror = max_connections_per_mirror
 
         # important to have a declaration here
         self.__data_transfer = 0
@@ -1054,6 +1577,9 @@ class MultipleUrlFetcher(TextInterface):
         self._progress_data_lock = threading.Lock()
         self.__thread_pool = {}
         self.__download_statuses = {}
+        self.__download_queue = []
+        self.__download_queue_cond = threading.Condition()
+        self.__mirror_connections = {}
         self.__show_progress = False
         self.__stop_threads = False
         self.__first_refreshes = 50
@@ -1093,10 +1619,21 @@ class MultipleUrlFetcher(TextInterface):
         """
         self._init_vars()
 
+        repo_settings = self.__system_settings['repositories']
+        max_workers = self.__max_workers
+        if max_workers is None:
+            max_workers = repo_settings['download_workers']
+        max_connections = self.__max_connections_per_mirror
+        if max_connections is None:
+            max_connections = repo_settings['download_connections_per_mirror']
+        max_workers = max(1, min(max_workers, len(self._url_path_list)))
+        max_connections = max(1, max_connections)
+
         speed_limit = 0
-        dsl = self.__system_settings['repositories']['transfer_limit']
+        dsl = repo_settings['transfer_limit']
         if isinstance(dsl, int) and self._url_path_list:
-            speed_limit = dsl/len(self._url_path_list)
+            # bandwidth is shared among the running downloads only
+            speed_limit = dsl/max_workers
 
         class MyFetcher(self.__url_fetcher):
 
@@ -1117,29 +1654,66 @@ class MultipleUrlFetcher(TextInterface):
         th_id = 0
         for url, path_to_save in self._url_path_list:
             th_id += 1
-            downloader = MyFetcher(
-                self.__url_fetcher, self, url, path_to_save,
-                checksum = self.__checksum, show_speed = self.__show_speed,
-                resume = self.__resume,
-                abort_check_func = self.__abort_check_func,
-                disallow_redirect = self.__disallow_redirect,
-                thread_stop_func = self.__handle_threads_stop,
-                speed_limit = speed_limit,
-                timeout = self.__timeout,
-                download_context_func = self.__download_context_func,
-                pre_download_hook = self.__pre_download_hook,
-                post_download_hook = self.__post_download_hook
-            )
-            downloader.set_id(th_id)
-
-            def do_download(ds, dth_id, downloader):
-                ds[dth_id] = downloader.download()
-
-            t = ParallelTask(do_download, self.__download_statuses, th_id,
-                downloader)
-            t.name = "UrlFetcher{%s}" % (url,)
+            self.__download_queue.append(
+                (th_id, url, path_to_save, spliturl(url)[1]))
+
+        def pop_download():
+            """
+            Pop the next queued download whose mirror has a free
+            connection slot, waiting for one if needed. Return None
+            when the queue is empty or the download has been stopped.
+            """
+            cond = self.__download_queue_cond
+            with cond:
+                while self.__download_queue and not self.__stop_threads:
+                    for idx, item in enumerate(self.__download_queue):
+                        host = item[3]
+                        conns = self.__mirror_connections.get(host, 0)
+                        if conns < max_connections:
+                            self.__mirror_connections[host] = conns + 1
+                            del self.__download_queue[idx]
+                            return item
+                    cond.wait(0.3)
+            return None
+
+        def release_download(host):
+            cond = self.__download_queue_cond
+            with cond:
+                self.__mirror_connections[host] -= 1
+                cond.notify_all()
+
+        def do_download(ds):
+            while True:
+                item = pop_download()
+                if item is None:
+                    break
+                dth_id, url, path_to_save, host = item
+                try:
+                    downloader = MyFetcher(
+                        self.__url_fetcher, self, url, path_to_save,
+                        checksum = self.__checksum,
+                        show_speed = self.__show_speed,
+                        resume = self.__resume,
+                        abort_check_func = self.__abort_check_func,
+                        disallow_redirect = self.__disallow_redirect,
+                        thread_stop_func = self.__handle_threads_stop,
+                        speed_limit = speed_limit,
+                        timeout = self.__timeout,
+                        download_context_func = \
+                            self.__download_context_func,
+                        pre_download_hook = self.__pre_download_hook,
+                        post_download_hook = self.__post_download_hook
+                    )
+                    downloader.set_id(dth_id)
+                    ds[dth_id] = downloader.download()
+                finally:
+                    release_download(host)
+
+        for worker_id in range(max_workers):
+            t = ParallelTask(do_download, self.__download_statuses)
+            t.name = "MultipleUrlFetcher{%d}" % (worker_id,)
             t.daemon = True
-            self.__thread_pool[th_id] = t
+            self.__thread_pool[worker_id] = t
             t.start()
 
         self._push_progress_to_output(force = True)
@@ -1166,7 +1740,7 @@ class MultipleUrlFetcher(TextInterface):
         if len(self._url_path_list) != len(self.__download_statuses):
             # there has been an error (exception)
             # complete download_statuses with error info
-            for th_id, th in self.__thread_pool.items():
+            for th_id in range(1, len(self._url_path_list) + 1):
                 if th_id not in self.__download_statuses:
                     self.__download_statuses[th_id] = \
                         UrlFetcher.GENERIC_FETCH_ERROR
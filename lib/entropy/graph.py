@@ -13,7 +13,6 @@
     based on Tarjan's.
 
 """
-from entropy.misc import Lifo
 
 class GraphNode(object):
 
@@ -220,6 +219,11 @@ class TopologicalSorter(object):
     """
     This class implements the topological sorting algorithm presented by
     R. E. Tarjan in 1972.
+
+    Nodes are mapped to integer ids and successors are stored in
+    array-backed adjacency lists. Both the strongly connected components
+    search and the topological sort (Kahn's) are iterative, so deep
+    dependency chains cannot hit the Python recursion limit.
     """
 
     def __init__(self, adjacency_map):
@@ -231,118 +235,191 @@ class TopologicalSorter(object):
         """
         object.__init__(self)
         self.__adjacency_map = adjacency_map
-        self.__stack = Lifo()
-
-    def __topological_sort_visit_node(self, node, low, result):
-        """
-        Internal method, visits a node ad push to stack.
-        """
-        if node in low:
-            return
-
-        num = len(low)
-        low[node] = num
-        stack_pos = len(self.__stack)
-        self.__stack.push(node)
 
-        for successor in self.__adjacency_map[node]:
-            self.__topological_sort_visit_node(successor, low, result)
-            low[node] = min(low[node], low[successor])
+    def __strongly_connected_nodes(self, successors):
+        """
+        Find the strongly connected nodes in an integer adjacency list
+        using Tarjan's algorithm.
+
+        Return the list of components (lists of node ids, in Tarjan
+        completion order) and the component id of every node.
+        """
+        node_count = len(successors)
+        index = [-1] * node_count
+        low = [0] * node_count
+        stack_pos = [0] * node_count
+        component_of = [0] * node_count
+        components = []
+        stack = []
+        # explicit call stack, the n-th element of call_pos is the offset
+        # of the next successor of call_nodes[n] to visit.
+        call_nodes = []
+        call_pos = []
+        counter = 0
+
+        for root in range(node_count):
+            if index[root] != -1:
+                continue
+
+            index[root] = low[root] = counter
+            counter += 1
+            stack_pos[root] = len(stack)
+            stack.append(root)
+            call_nodes.append(root)
+            call_pos.append(0)
+
+            while call_nodes:
+                node = call_nodes[-1]
+                pos = call_pos[-1]
+                node_successors = successors[node]
+
+                if pos < len(node_successors):
+                    call_pos[-1] = pos + 1
+                    successor = node_successors[pos]
+                    if index[successor] == -1:
+                        index[successor] = low[successor] = counter
+                        counter += 1
+                        stack_pos[successor] = len(stack)
+                        stack.append(successor)
+                        call_nodes.append(successor)
+                        call_pos.append(0)
+                    elif low[successor] < low[node]:
+                        low[node] = low[successor]
+                    continue
+
+                call_nodes.pop()
+                call_pos.pop()
+
+                if low[node] == index[node]:
+                    start = stack_pos[node]
+                    component = stack[start:]
+                    del stack[start:]
+                    component.reverse()
+                    component_id = len(components)
+                    for item in component:
+                        # mark as completed, this can't lower anything
+                        low[item] = node_count
+                        component_of[item] = component_id
+                    components.append(component)
+
+                if call_nodes:
+                    parent = call_nodes[-1]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+
+        return components, component_of
+
+    def __condense(self):
+        """
+        Collapse the strongly connected components of the stored adjacency
+        map into an acyclic graph.
+
+        Return the list of components (as tuples of nodes), the component
+        ids in first-appearance order and the component successors lists.
+        """
+        nodes = list(self.__adjacency_map.keys())
+        node_ids = dict((node, node_id) for node_id, node in enumerate(nodes))
+        successors = [[node_ids[x] for x in self.__adjacency_map[node]] \
+                          for node in nodes]
+        del node_ids
+
+        components, component_of = self.__strongly_connected_nodes(
+            successors)
+
+        component_count = len(components)
+        seen = [False] * component_count
+        order = []
+        component_successors = [[] for x in range(component_count)]
+
+        for node_id, node_successors in enumerate(successors):
+            node_c = component_of[node_id]
+            if not seen[node_c]:
+                seen[node_c] = True
+                order.append(node_c)
+            obj = component_successors[node_c]
+            for successor in node_successors:
+                successor_c = component_of[successor]
+                if node_c != successor_c:
+                    obj.append(successor_c)
 
-        if num == low[node]:
-            component = tuple()
-            while len(self.__stack) > stack_pos:
-                component += (self.__stack.pop(),)
-            result.append(component)
-            for item in component:
-                low[item] = len(self.__adjacency_map)
+        components = [tuple([nodes[x] for x in component]) \
+                          for component in components]
+        return components, order, component_successors
 
-    def __strongly_connected_nodes(self):
+    def get_stored_adjacency_map(self):
         """
-        Find the strongly connected nodes in a adjacency_map using
-        Tarjan's algorithm.
+        Return stored adjacency map used for sorting.
 
-        adjacency_map should be a dictionary mapping node names to
-        lists of successor nodes.
+        @return: stored adjacency map
+        @rtype: dict
         """
-        result = []
-        low = {}
-
-        for node in self.__adjacency_map:
-            self.__topological_sort_visit_node(node, low, result)
-
-        return result
-
+        return self.__adjacency_map
 
-    def __topological_sort(self, graph):
-        """
-        Effectively executes topological sorting on given graph.
+    def sort(self):
         """
+        Given an adjacency map, identify strongly connected nodes,
+        then perform a topological sort on them.
 
-        # initialize count map
-        count = dict((node, 0) for node in graph)
+        @return: sorted graph representation
+        @rtype: dict
+        """
+        components, order, component_successors = self.__condense()
 
-        for node in graph:
-            for successor in graph[node]:
+        count = [0] * len(components)
+        for successors in component_successors:
+            for successor in successors:
                 count[successor] += 1
 
-        ready_stack = Lifo()
-        for node in graph:
-            if count[node] == 0:
-                ready_stack.push(node)
+        ready_stack = [x for x in order if count[x] == 0]
 
         dep_level = 1
         result = {}
-        while ready_stack.is_filled():
+        while ready_stack:
 
-            node = ready_stack.pop()
-            result[dep_level] = node
+            component = ready_stack.pop()
+            result[dep_level] = components[component]
             dep_level += 1
 
-            for successor in graph[node]:
+            for successor in component_successors[component]:
                 count[successor] -= 1
                 if count[successor] == 0:
-                    ready_stack.push(successor)
+                    ready_stack.append(successor)
 
         return result
 
-    def get_stored_adjacency_map(self):
-        """
-        Return stored adjacency map used for sorting.
-
-        @return: stored adjacency map
-        @rtype: dict
-        """
-        return self.__adjacency_map
-
-    def sort(self):
+    def sort_levels(self):
         """
         Given an adjacency map, identify strongly connected nodes,
-        then perform a topological sort on them.
+        then group them into scheduling levels. Every strongly connected
+        component only depends (through the adjacency map) on components
+        found at lower levels, so that all the components in the same level
+        can be processed in parallel, level after level.
 
-        @return: sorted graph representation
-        @rtype: dict
+        @return: list of levels, each one being a tuple of strongly
+            connected components (tuples of nodes)
+        @rtype: list
         """
-        # clear stack
-        self.__stack.clear()
-
-        components = self.__strongly_connected_nodes()
+        components, order, component_successors = self.__condense()
 
-        node_component = {}
-        for component in components:
-            for node in component:
-                node_component[node] = component
+        count = [len(x) for x in component_successors]
+        predecessors = [[] for x in range(len(components))]
+        for component, successors in enumerate(component_successors):
+            for successor in successors:
+                predecessors[successor].append(component)
 
-        component_graph = {}
-        for node in self.__adjacency_map:
-            node_c = node_component[node]
-            obj = component_graph.setdefault(node_c, [])
-            for successor in self.__adjacency_map[node]:
-                successor_c = node_component[successor]
-                if node_c != successor_c:
-                    obj.append(successor_c)
+        levels = []
+        current = [x for x in order if count[x] == 0]
+        while current:
+            levels.append(tuple([components[x] for x in current]))
+            upcoming = []
+            for component in current:
+                for predecessor in predecessors[component]:
+                    count[predecessor] -= 1
+                    if count[predecessor] == 0:
+                        upcoming.append(predecessor)
+            current = upcoming
 
-        return self.__topological_sort(component_graph)
+        return levels
 
 
 class Graph(object):
@@ -480,6 +557,24 @@ class Graph(object):
         sorted_data = self.solve_nodes()
         return dict((x, trans_vals(y),) for x, y in sorted_data.items())
 
+    def solve_levels(self):
+        """
+        Serialize the graph into scheduling levels. Items are returned as
+        a list of levels, starting from the items without dependencies:
+        every level only contains items whose dependencies are found at
+        lower levels, so that all the items in the same level can be
+        processed in parallel. Items belonging to the same dependency cycle
+        are returned as one tuple and must be processed together.
+
+        @return: list of levels, each one being a tuple of item tuples
+        @rtype: list
+        """
+        adj_map = self.get_adjacency_map()
+        sorter = TopologicalSorter(adj_map)
+        return [tuple([tuple([x.item() for x in component]) \
+                           for component in level]) \
+                    for level in sorter.sort_levels()]
+
     def raw(self):
         """
         Return all items stored in the graph in raw form (list) without sorting
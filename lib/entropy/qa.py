@@ -721,6 +721,8 @@ class QAInterface(TextInterface, EntropyPluginStore):
         total = len(executables)
         count = 0
         scan_txt = blue("%s ..." % (_("Scanning libraries"),))
+        elfs_metadata = entropy.tools.read_elf_metadata_many(
+            etpConst['systemroot'] + x for x in executables)
         for executable in executables:
 
             # task bombing hook
@@ -753,8 +755,11 @@ class QAInterface(TextInterface, EntropyPluginStore):
 
             real_exec_path = etpConst['systemroot'] + executable
 
-            myelfs = entropy.tools.read_elf_dynamic_libraries(
-                real_exec_path)
+            elf_metadata = elfs_metadata.get(real_exec_path)
+            if elf_metadata is None:
+                myelfs = set()
+            else:
+                myelfs = elf_metadata['needed']
 
             mylibs = set()
             for mylib in myelfs:
@@ -924,13 +929,21 @@ class QAInterface(TextInterface, EntropyPluginStore):
                     return True
             return False
 
-        mylibs = {}
+        elf_files = []
         for myfile in mycontent:
             myfile = const_convert_to_rawstring(myfile)
             if not self._is_elf_executable_or_library(myfile):
                 continue
-            mylibs[myfile] = entropy.tools.read_elf_dynamic_libraries(
-                myfile)
+            elf_files.append(myfile)
+
+        mylibs = {}
+        elfs_metadata = entropy.tools.read_elf_metadata_many(elf_files)
+        for myfile in elf_files:
+            elf_metadata = elfs_metadata[myfile]
+            if elf_metadata is None:
+                mylibs[myfile] = set()
+            else:
+                mylibs[myfile] = elf_metadata['needed']
 
         broken_libs = {}
         for mylib in mylibs:
@@ -34,6 +34,7 @@ from entropy.core.settings.base import SystemSettings
 from entropy.fetchers import UrlFetcher
 from entropy.locks import ResourceLock
 
+import entropy.dep
 import entropy.tools
 
 
@@ -123,6 +124,9 @@ class System(object):
     class UpdateError(EntropyException):
         """Raised when security advisories couldn't be updated correctly"""
 
+    # EntropyCacher key of the compiled advisories store, see _compile()
+    _STORE_CACHE_KEY = "_advstore"
+
     @classmethod
     def _get_xml_metadata(cls, xmlfile):
         """
@@ -323,6 +327,8 @@ class System(object):
         self._entropy = entropy_client
         self.__cacher = None
         self.__settings = None
+        self.__store = None
+        self.__installed = None
 
         self._gpg_enabled = os.getenv("ETP_DISABLE_GPG") is None
         self._gpg_keystore_dir = os.path.join(
@@ -582,7 +588,7 @@ class System(object):
         inst_repo = self._entropy.installed_repository()
         with inst_repo.direct():
             inst_pkgs_cksum = inst_repo.checksum(
-                do_order=True, strict=False)
+                do_order=False, strict=False)
 
         repo_cksum = self._entropy.repositories_checksum()
 
@@ -669,6 +675,208 @@ class System(object):
         ids = [x[:-len(".xml")] for x in xmls]
         return ids
 
+    def _dir_mtime(self):
+        """
+        Return the modification time of the advisories directory or None
+        if it does not exist.
+        """
+        try:
+            return os.path.getmtime(self._dir)
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            return None
+
+    def _parse_advisory(self, advisory_id, quiet=True):
+        """
+        Parse the XML file of the given GLSA advisory id and return its
+        metadata. If the advisory is broken, None is returned.
+        """
+        xml_path = self._id_to_xml(advisory_id)
+        try:
+            return self._get_xml_metadata(xml_path)
+        except Exception as err:
+            if not quiet:
+                txt = "%s, %s, %s: %s" % (
+                    blue(_("Warning")),
+                    bold(xml_path),
+                    blue(_("broken advisory")),
+                    err,
+                )
+                self._entropy.output(
+                    txt,
+                    importance=1,
+                    level="warning",
+                    header=red(" !!! ")
+                )
+        return None
+
+    @staticmethod
+    def _parse_affection(affection):
+        """
+        Pre-parse the vulnerable and unaffected atoms of the given
+        advisory affection metadata (an item of the "affected" lists).
+        Return a tuple composed by the vulnerable (atom, direction, version)
+        tuples and the unaffected (direction, version) tuples.
+        Atoms that could not match anything are dropped.
+        """
+        def _parse(atom):
+            parsed = entropy.dep.parse_atom(atom)
+            if parsed.justname or not parsed.direction:
+                return None
+            version = parsed.version
+            # remove gentoo revision (-r0 if none), like atomMatch()
+            if parsed.direction == "=" and version.split("-")[-1] == "r0":
+                version = entropy.dep.remove_revision(version)
+            return parsed.direction, version
+
+        vulnerable = []
+        for atom in affection['vul_atoms']:
+            parsed = _parse(atom)
+            if parsed is not None:
+                vulnerable.append((atom,) + parsed)
+
+        unaffected = []
+        for atom in affection['unaff_atoms']:
+            parsed = _parse(atom)
+            if parsed is not None:
+                unaffected.append(parsed)
+
+        return tuple(vulnerable), tuple(unaffected)
+
+    def _compile(self, mtime, quiet=True):
+        """
+        Parse all the available advisories and return the compiled store,
+        a dict containing the advisories metadata ("advisories") and an
+        index of the pre-parsed affections keyed by package key
+        ("packages"), each being a list of (advisory id, vulnerable,
+        unaffected) tuples, as returned by _parse_affection().
+        """
+        advisories = {}
+        packages = {}
+
+        for xml_path in self._xml_list():
+            adv_id = self._xml_to_id(xml_path)
+            metadata = self._parse_advisory(adv_id, quiet=quiet)
+            if metadata is None:
+                continue
+            advisories[adv_id] = metadata
+
+            for key, affections in metadata['affected'].items():
+                # like affected(), only the first one is considered
+                vulnerable, unaffected = self._parse_affection(
+                    affections[0])
+                if not vulnerable:
+                    continue
+                obj = packages.setdefault(key, [])
+                obj.append((adv_id, vulnerable, unaffected))
+
+        return {
+            'dir': self._dir,
+            'mtime': mtime,
+            'advisories': advisories,
+            'packages': packages,
+        }
+
+    def _store(self, quiet=True):
+        """
+        Return the compiled advisories store (see _compile()), loading it
+        from disk or compiling it if the advisories directory changed.
+        """
+        mtime = self._dir_mtime()
+        store = self.__store
+        if store is not None and store['mtime'] == mtime:
+            return store
+
+        store = None
+        if mtime is not None:
+            store = self._cacher.pop(self._STORE_CACHE_KEY,
+                                     cache_dir=self._cache_dir)
+        if store is None or store.get('dir') != self._dir or \
+                store.get('mtime') != mtime:
+            store = self._compile(mtime, quiet=quiet)
+            if mtime is not None:
+                try:
+                    self._cacher.save(self._STORE_CACHE_KEY, store,
+                                      cache_dir=self._cache_dir)
+                except (IOError, OSError) as err:
+                    const_debug_write(
+                        __name__, "_store, cannot save: %s" % (err,))
+
+        self.__store = store
+        return store
+
+    def _installed_versions(self):
+        """
+        Return a dict mapping the keys of the installed packages to the
+        list of their installed versions.
+        """
+        inst_repo = self._entropy.installed_repository()
+        with inst_repo.direct():
+            checksum = inst_repo.checksum(do_order=False, strict=False)
+            if self.__installed is not None and \
+                    self.__installed[0] == checksum:
+                return self.__installed[1]
+
+            installed = {}
+            for package_id in inst_repo.listAllPackageIds():
+                data = inst_repo.getStrictData(package_id)
+                if data is None:
+                    continue
+                key, _slot, version = data[:3]
+                installed.setdefault(key, []).append(version)
+
+        self.__installed = (checksum, installed)
+        return installed
+
+    @staticmethod
+    def _version_match(direction, version, installed_version):
+        """
+        Return whether the installed package version satisfies the
+        pre-parsed direction and version (see _parse_affection()), as
+        EntropyRepositoryBase.atomMatch() would do.
+        """
+        if direction == "=":
+            # media-libs/test-1.2* support
+            if version.endswith("*"):
+                return installed_version.startswith(version[:-1])
+            return installed_version == version
+
+        pkgcmp = entropy.dep.compare_versions(version, installed_version)
+        if pkgcmp is None:
+            return False
+        if direction == ">":
+            return pkgcmp < 0
+        if direction == "<":
+            return pkgcmp > 0
+        if direction == ">=":
+            return pkgcmp <= 0
+        if direction == "<=":
+            return pkgcmp >= 0
+        return False
+
+    def _affected_versions(self, versions, vulnerable, unaffected):
+        """
+        Return the set of vulnerable atoms (see _parse_affection())
+        matching any of the given installed versions that are not
+        unaffected.
+        """
+        affected = set()
+        for installed_version in versions:
+            safe = False
+            for direction, version in unaffected:
+                if self._version_match(direction, version, installed_version):
+                    safe = True
+                    break
+            if safe:
+                continue
+
+            for atom, direction, version in vulnerable:
+                if self._version_match(direction, version, installed_version):
+                    affected.add(atom)
+
+        return affected
+
     @systemshared
     def advisories(self):
         """
@@ -681,20 +889,11 @@ class System(object):
         metadata = self._get_cache("all")
         if metadata is None:
 
-            metadata = {}
-            for xml_path in self._xml_list():
-
-                adv_id = self._xml_to_id(xml_path)
-                xml_metadata = self.advisory(adv_id, _quiet=False)
-                if xml_metadata is None:
-                    continue
-
-                metadata.update(
-                    {xml_metadata['__id__']: xml_metadata}
-                )
-
+            store = self._store(quiet=False)
+            applicable_keys = {}
             metadata = dict((x, y) for x, y in
-                            metadata.items() if self._applicable(y))
+                            store['advisories'].items()
+                            if self._applicable(y, applicable_keys))
             self._set_cache("all", metadata)
 
         return metadata
@@ -708,34 +907,9 @@ class System(object):
         @return: the advisory metadata dictionary
         @rtype: dict or None
         """
-        metadata = self._get_cache(advisory_id)
-        if metadata is not None:
-            return metadata
+        return self._store(quiet=_quiet)['advisories'].get(advisory_id)
 
-        xml_path = self._id_to_xml(advisory_id)
-        metadata = None
-        try:
-            metadata = self._get_xml_metadata(xml_path)
-        except Exception as err:
-            if not _quiet:
-                txt = "%s, %s, %s: %s" % (
-                    blue(_("Warning")),
-                    bold(xml_path),
-                    blue(_("broken advisory")),
-                    err,
-                )
-                self._entropy.output(
-                    txt,
-                    importance=1,
-                    level="warning",
-                    header=red(" !!! ")
-                )
-
-        if metadata is not None:
-            self._set_cache(advisory_id, metadata)
-        return metadata
-
-    def _applicable(self, metadata):
+    def _applicable(self, metadata, applicable_keys):
         """
         Return whether the given GLSA advisory is applicable on this system.
         Basically, determine if any of the packages listed in the advisory
@@ -743,18 +917,23 @@ class System(object):
 
         @param metadata: a single advisory metadata dictionary
         @type metadata: dict
+        @param applicable_keys: dict used to memoize the lookup of each
+            package key across advisories
+        @type applicable_keys: dict
         """
         if not metadata['affected']:
             return False
 
-        valid = False
         for dep in metadata['affected'].keys():
-            package_id, _repository_id = self._entropy.atom_match(dep)
-            if package_id != -1:
-                valid = True
-                break
+            valid = applicable_keys.get(dep)
+            if valid is None:
+                package_id, _repository_id = self._entropy.atom_match(dep)
+                valid = package_id != -1
+                applicable_keys[dep] = valid
+            if valid:
+                return True
 
-        return valid
+        return False
 
     @systemshared
     def affected(self, metadata):
@@ -769,31 +948,18 @@ class System(object):
         @rtype: set
         """
         affected = set()
-        inst_repo = self._entropy.installed_repository()
-
         if not metadata['affected']:
             return affected
 
-        for key in metadata['affected']:
-
-            affection = metadata['affected'][key][0]
-
-            vul_atoms = affection['vul_atoms']
-            if not vul_atoms:
+        installed = self._installed_versions()
+        for key, affections in metadata['affected'].items():
+            versions = installed.get(key)
+            if not versions:
                 continue
 
-            unaffected = set()
-
-            with inst_repo.direct():
-                for dep in affection['unaff_atoms']:
-                    package_ids, _inst_rc = inst_repo.atomMatch(
-                        dep, multiMatch=True)
-                    unaffected.update(package_ids)
-
-                for dep in vul_atoms:
-                    package_id, _rc = inst_repo.atomMatch(dep)
-                    if package_id != -1 and package_id not in unaffected:
-                        affected.add(dep)
+            vulnerable, unaffected = self._parse_affection(affections[0])
+            affected.update(
+                self._affected_versions(versions, vulnerable, unaffected))
 
         return affected
 
@@ -813,6 +979,38 @@ class System(object):
             return set()
         return self.affected(metadata)
 
+    @systemshared
+    def affected_all(self):
+        """
+        Return the dependencies currently affected by each advisory the
+        system is vulnerable to. This is much faster than calling
+        affected_id() for every advisory in list().
+
+        @return: dict mapping advisory identifiers to the set of affected
+            package dependencies (see affected())
+        @rtype: dict
+        """
+        return self._affected_all()
+
+    def _affected_all(self):
+        """
+        Lockless version of affected_all(). Installed package keys are
+        joined with the compiled advisories store index.
+        """
+        store_packages = self._store()['packages']
+        affected_map = {}
+
+        for key, versions in self._installed_versions().items():
+            for adv_id, vulnerable, unaffected in store_packages.get(
+                    key, ()):
+                affected = self._affected_versions(
+                    versions, vulnerable, unaffected)
+                if affected:
+                    obj = affected_map.setdefault(adv_id, set())
+                    obj.update(affected)
+
+        return affected_map
+
     @systemshared
     def vulnerabilities(self):
         """
@@ -845,16 +1043,12 @@ class System(object):
         @return: a list (set) of applied or unapplied advisory identifiers.
         @rtype: set
         """
-        advisory_ids = set()
+        advisory_ids = set(self.list())
+        affected_ids = set(self._affected_all())
 
-        for advisory_id in self.list():
-            affected = self.affected_id(advisory_id)
-            if affected and not applied:
-                advisory_ids.add(advisory_id)
-            elif not affected and applied:
-                advisory_ids.add(advisory_id)
-
-        return advisory_ids
+        if applied:
+            return advisory_ids - affected_ids
+        return advisory_ids & affected_ids
 
     @systemshared
     def available(self):
@@ -910,6 +1104,11 @@ class System(object):
             if workdir is not None:
                 shutil.rmtree(workdir, True)
 
+        if rc_lock == 0:
+            # compile the advisories store now rather
+            # than at the first query.
+            self._store(quiet=False)
+
         if rc_lock == 0:
             if updated:
                 advtext = "%s: %s" % (
@@ -42,6 +42,7 @@ from entropy.i18n import _
 
 from entropy.server.interfaces.rss import ServerRssMetadata
 
+import entropy.db.delta
 import entropy.dep
 import entropy.tools
 
@@ -626,6 +627,22 @@ class ServerPackagesRepositoryUpdater(object):
                 critical.append(data['dump_path_digest_light'])
                 gpg_signed_files.append(data['dump_path_digest_light'])
 
+                plg_id = self._entropy.SYSTEM_SETTINGS_PLG_ID
+                srv_set = self._settings[plg_id]['server']
+                if srv_set['database_delta_update']:
+                    # uncompressed dump and its chunk index,
+                    # for delta updates. The dump is verified through
+                    # the checksums in the signed index.
+                    data['dump_path_light_plain'] = os.path.join(
+                        self._entropy._get_local_repository_dir(
+                            self._repository_id),
+                        etpConst['etpdatabasedumplight'])
+                    data['dump_path_light_delta'] = os.path.join(
+                        self._entropy._get_local_repository_dir(
+                            self._repository_id),
+                        etpConst['etpdatabasedumplightdelta'])
+                    gpg_signed_files.append(data['dump_path_light_delta'])
+
         # EAPI 1
         if 1 not in disabled_eapis:
 
@@ -1546,15 +1563,30 @@ Name:    %s
             eapi2_tmp_dbconn.dropChangelog()
             eapi2_tmp_dbconn.commit()
 
-            # opener = cmethod[0]
-            f_out = cmethod[0](upload_data['dump_path_light'], "wb")
+            plain_dump_path = upload_data.get('dump_path_light_plain')
+            if plain_dump_path is not None:
+                # delta updates need the uncompressed dump as well
+                f_out = open(plain_dump_path, "wb")
+            else:
+                # opener = cmethod[0]
+                f_out = cmethod[0](upload_data['dump_path_light'], "wb")
             try:
-                eapi2_tmp_dbconn.exportRepository(f_out)
+                if srv_set['database_dump_format'] == "snapshot":
+                    eapi2_tmp_dbconn.exportRepositorySnapshot(f_out)
+                else:
+                    eapi2_tmp_dbconn.exportRepository(f_out)
             finally:
                 f_out.close()
                 eapi2_tmp_dbconn.close()
 
             os.remove(temp_eapi2_dbfile)
+            if plain_dump_path is not None:
+                self._compress_file(plain_dump_path,
+                    upload_data['dump_path_light'], cmethod[0])
+                entropy.db.delta.write_index(
+                    entropy.db.delta.build_index(plain_dump_path),
+                    upload_data['dump_path_light_delta'],
+                    os.path.getsize(upload_data['dump_path_light']))
             self._create_file_checksum(upload_data['dump_path_light'],
                 upload_data['dump_path_digest_light'])
 
@@ -1616,58 +1648,66 @@ Name:    %s
             self._compress_file(uncompressed_changelog,
                 compressed_changelog, bz2.BZ2File)
 
-        for uri in uris:
-
-            crippled_uri = EntropyTransceiver.get_uri_name(uri)
+        repo_relative = \
+            self._entropy._get_override_remote_repository_relative_path(
+                self._repository_id)
+        if repo_relative is None:
+            repo_relative = \
+                self._entropy._get_remote_repository_relative_path(
+                    self._repository_id)
+        remote_dir = os.path.join(repo_relative,
+            self._settings['repositories']['branch'])
 
-            # EAPI 3
-            if 3 not in disabled_eapis:
+        # EAPI 3
+        if 3 not in disabled_eapis:
+            for uri in uris:
+                crippled_uri = EntropyTransceiver.get_uri_name(uri)
                 self._show_eapi3_upload_messages(crippled_uri, database_path)
 
-            repo_relative = \
-                self._entropy._get_override_remote_repository_relative_path(
-                    self._repository_id)
-            if repo_relative is None:
-                repo_relative = \
-                    self._entropy._get_remote_repository_relative_path(
-                        self._repository_id)
-            remote_dir = os.path.join(repo_relative,
-                self._settings['repositories']['branch'])
+        # push to all the mirrors concurrently
+        uploader = self._mirrors.TransceiverServerHandler(
+            self._entropy, list(uris),
+            [upload_data[x] for x in sorted(upload_data)],
+            critical_files = critical,
+            txc_basedir = remote_dir, repo = self._repository_id
+        )
+        errors, m_fine_uris, m_broken_uris = uploader.go()
 
-            uploader = self._mirrors.TransceiverServerHandler(
-                self._entropy, [uri],
-                [upload_data[x] for x in sorted(upload_data)],
-                critical_files = critical,
-                txc_basedir = remote_dir, repo = self._repository_id
+        # then handle failures following mirrors order
+        for uri in uris:
+
+            uri_broken = sorted(
+                (x_uri, x_uri_rc) for x_uri, x_uri_rc in m_broken_uris \
+                    if x_uri == uri)
+            if not uri_broken:
+                if uri in m_fine_uris:
+                    continue
+                # mirror could not be reached at all
+                uri_broken = [(uri, _("connection error"))]
+
+            crippled_uri = EntropyTransceiver.get_uri_name(uri)
+            self._entropy.output(
+                "[repo:%s|%s|%s] %s" % (
+                    self._repository_id,
+                    crippled_uri,
+                    _("errors"),
+                    _("upload failed, locking and continuing"),
+                ),
+                importance = 0,
+                level = "error",
+                header = darkred(" !!! ")
             )
-            errors, m_fine_uris, m_broken_uris = uploader.go()
-            if errors:
-                self._entropy.output(
-                    "[repo:%s|%s|%s] %s" % (
-                        self._repository_id,
-                        crippled_uri,
-                        _("errors"),
-                        _("upload failed, locking and continuing"),
-                    ),
-                    importance = 0,
-                    level = "error",
-                    header = darkred(" !!! ")
-                )
-                # get reason
-                my_broken_uris = sorted([
-                    (EntropyTransceiver.get_uri_name(x_uri),
-                        x_uri_rc) for x_uri, x_uri_rc in m_broken_uris])
-                reason = my_broken_uris[0][1]
-                self._entropy.output(
-                    blue("%s: %s" % (_("reason"), reason,)),
-                    importance = 0,
-                    level = "error",
-                    header = blue("    # ")
-                )
-                broken_uris |= m_broken_uris
-                self._mirrors.lock_mirrors_for_download(self._repository_id,
-                    True, mirrors = [uri])
-                continue
+            # get reason
+            reason = uri_broken[0][1]
+            self._entropy.output(
+                blue("%s: %s" % (_("reason"), reason,)),
+                importance = 0,
+                level = "error",
+                header = blue("    # ")
+            )
+            broken_uris |= set(uri_broken)
+            self._mirrors.lock_mirrors_for_download(self._repository_id,
+                True, mirrors = [uri])
 
         if copy_back:
             # copy db back
@@ -33,6 +33,7 @@ from entropy.const import etpConst, etpSys, const_setup_perms, \
 from entropy.output import purple, red, darkgreen, \
     bold, brown, blue, darkred, teal
 from entropy.cache import EntropyCacher
+from entropy.misc import ParallelTask
 from entropy.server.interfaces.mirrors import Server as MirrorsServer
 from entropy.i18n import _
 from entropy.core import BaseConfigParser
@@ -1087,6 +1088,8 @@ class ServerSystemSettingsPlugin(SystemSettingsPlugin):
             'database_file_format': const_convert_to_unicode(
                 etpConst['etpdatabasefileformat']),
             'disabled_eapis': set(),
+            'database_dump_format': const_convert_to_unicode("sql"),
+            'database_delta_update': False,
             'broken_revdeps_qa_check': True,
             'exp_based_scope': etpConst['expiration_based_scope'],
             # disabled by default for now
@@ -1195,6 +1198,15 @@ class ServerSystemSettingsPlugin(SystemSettingsPlugin):
             if setting in etpConst['etpdatabasesupportedcformats']:
                 data['database_file_format'] = setting
 
+        def _database_dump_format(line, setting):
+            if setting in ("sql", "snapshot"):
+                data['database_dump_format'] = setting
+
+        def _database_delta_update(line, setting):
+            opt = entropy.tools.setting_to_bool(setting)
+            if opt is not None:
+                data['database_delta_update'] = opt
+
         def _syncspeedlimit(line, setting):
             try:
                 speed_limit = int(setting)
@@ -1263,6 +1275,8 @@ class ServerSystemSettingsPlugin(SystemSettingsPlugin):
             'server-basic-languages': _server_basic_lang,
             'repository': _repository_func,
             'database-format': _database_format,
+            'database-dump-format': _database_dump_format,
+            'database-delta-update': _database_delta_update,
             # backward compatibility
             'sync-speed-limit': _syncspeedlimit,
             'syncspeedlimit': _syncspeedlimit,
@@ -3395,8 +3409,20 @@ class Server(Client):
             if orig_fd is not None:
                 os.close(orig_fd)
 
+        # package metadata is fetched in batches, this bounds memory usage
+        # since it includes the package content.
+        batch_size = 64
+        injection_data = list(injection_data)
+        batch_data = {}
+
         try:
-            for package_id, package_path in injection_data:
+            for index, (package_id, package_path) in enumerate(
+                    injection_data):
+
+                if index % batch_size == 0:
+                    batch_data = dbconn.getPackageDataMany(
+                        [x for x, _y in \
+                             injection_data[index:index + batch_size]])
 
                 tmp_repo_file = None
                 tmp_fd = None
@@ -3419,7 +3445,7 @@ class Server(Client):
                         header = blue(" @@ "),
                         back = True
                     )
-                    data = dbconn.getPackageData(package_id)
+                    data = batch_data[package_id]
                     self._inject_entropy_database_into_package(
                         package_path, data,
                         treeupdates_actions = treeupdates_actions,
@@ -3519,6 +3545,130 @@ class Server(Client):
             header = brown(" @@ ")
         )
 
+    def _verify_remote_packages_mirror(self, repository_id, uri,
+                                       packages_data, mirrors_data):
+        """
+        Verify the package files stored on the given packages mirror.
+        The packages checksum manifest published by the mirror is used
+        first, only package files missing from it or whose checksum does
+        not match get their checksum calculated remotely.
+        Results are stored into mirrors_data, keyed by uri, as a tuple
+        composed by (healthy package ids, broken package ids, broken
+        package files).
+        """
+        crippled_uri = EntropyTransceiver.get_uri_name(uri)
+        self.output(
+            "[%s] %s: %s" % (
+                darkgreen(repository_id),
+                blue(_("Working on mirror")),
+                brown(crippled_uri),
+            ),
+            importance = 1,
+            level = "info",
+            header = red(" @@ ")
+        )
+
+        match = set()
+        not_match = set()
+        broken = []
+        mirrors_data[uri] = (match, not_match, broken)
+
+        txc = self.Transceiver(uri)
+        txc.set_verbosity(False)
+        with txc as handler:
+
+            manifest = self.Mirrors.read_remote_packages_manifest(
+                repository_id, handler)
+
+            remaining = []
+            for item in packages_data:
+                package_id, pkg_rel, pkgfile, pkghash = item
+                if manifest.get(pkg_rel) == pkghash:
+                    match.add(package_id)
+                else:
+                    remaining.append(item)
+
+            self.output(
+                "[%s] %s: %s, %s: %s" % (
+                    brown(crippled_uri),
+                    blue(_("healthy according to the manifest")),
+                    darkgreen(str(len(match))),
+                    blue(_("to be checked")),
+                    darkgreen(str(len(remaining))),
+                ),
+                importance = 1,
+                level = "info",
+                header = blue(" @@ ")
+            )
+
+            totalcounter = len(remaining)
+            currentcounter = 0
+
+            for package_id, pkg_rel, pkgfile, pkghash in remaining:
+
+                currentcounter += 1
+                self.output(
+                    "[%s] %s: %s" % (
+                        brown(crippled_uri),
+                        blue(_("checking hash")),
+                        darkgreen(pkgfile),
+                    ),
+                    importance = 1,
+                    level = "info",
+                    header = blue(" @@ "),
+                    back = True,
+                    count = (currentcounter, totalcounter,)
+                )
+
+                ck_remote = handler.get_md5(pkgfile)
+                if ck_remote is None:
+                    self.output(
+                        "[%s] %s: %s %s" % (
+                            brown(crippled_uri),
+                            blue(_("digest verification of")),
+                            bold(pkgfile),
+                            blue(_("not supported")),
+                        ),
+                        importance = 1,
+                        level = "info",
+                        header = blue(" @@ "),
+                        count = (currentcounter, totalcounter,)
+                    )
+                    continue
+
+                if ck_remote == pkghash:
+                    match.add(package_id)
+                else:
+                    not_match.add(package_id)
+                    self.output(
+                        "[%s] %s: %s %s" % (
+                            brown(crippled_uri),
+                            blue(_("package")),
+                            bold(pkgfile),
+                            red(_("NOT healthy")),
+                        ),
+                        importance = 1,
+                        level = "warning",
+                        header = darkred(" !!! "),
+                        count = (currentcounter, totalcounter,)
+                    )
+                    broken.append(pkgfile)
+
+    def _verify_remote_packages_task(self, repository_id, uri,
+                                     packages_data, mirrors_data, errors):
+        """
+        Thread body of _verify_remote_packages(), run
+        _verify_remote_packages_mirror() against the given uri.
+        Exceptions are recorded into errors, keyed by uri, so that they
+        can be raised again once all the mirrors are done.
+        """
+        try:
+            self._verify_remote_packages_mirror(
+                repository_id, uri, packages_data, mirrors_data)
+        except Exception as err:
+            entropy.tools.print_traceback()
+            errors[uri] = err
+
     def _verify_remote_packages(self, repository_id, packages, ask = True):
 
         self.output(
@@ -3570,90 +3720,49 @@ class Server(Client):
             if rc_question == _("No"):
                 return set(), set(), {}
 
+        # package metadata is shared by all the mirrors
+        packages_data = []
+        for package_id in package_ids:
+            pkg_rel = dbconn.retrieveDownloadURL(package_id)
+            pkgfile = self.complete_remote_package_relative_path(
+                pkg_rel, repository_id)
+            pkghash = dbconn.retrieveDigest(package_id)
+            packages_data.append((package_id, pkg_rel, pkgfile, pkghash))
+
+        mirrors = self.remote_packages_mirrors(repository_id)
+        mirrors_data = {}
+        errors = {}
+        threads = []
+        for uri in mirrors:
+            th = ParallelTask(self._verify_remote_packages_task,
+                repository_id, uri, packages_data, mirrors_data, errors)
+            th.name = "VerifyRemotePackages"
+            th.daemon = True
+            th.start()
+            threads.append(th)
+        for th in threads:
+            th.join()
+
+        for uri in mirrors:
+            err = errors.get(uri)
+            if err is not None:
+                raise err
+
         match = set()
         not_match = set()
         broken_packages = {}
 
-        for uri in self.remote_packages_mirrors(repository_id):
+        for uri in mirrors:
 
             crippled_uri = EntropyTransceiver.get_uri_name(uri)
-            self.output(
-                "[%s] %s: %s" % (
-                    darkgreen(repository_id),
-                    blue(_("Working on mirror")),
-                    brown(crippled_uri),
-                ),
-                importance = 1,
-                level = "info",
-                header = red(" @@ ")
-            )
-
-
-            totalcounter = len(package_ids)
-            currentcounter = 0
-
-            txc = self.Transceiver(uri)
-            txc.set_verbosity(False)
-            with txc as handler:
-
-                for package_id in package_ids:
-
-                    currentcounter += 1
-                    pkgfile = dbconn.retrieveDownloadURL(package_id)
-                    pkgfile = self.complete_remote_package_relative_path(
-                        pkgfile, repository_id)
-                    pkghash = dbconn.retrieveDigest(package_id)
-
-                    self.output(
-                        "[%s] %s: %s" % (
-                            brown(crippled_uri),
-                            blue(_("checking hash")),
-                            darkgreen(pkgfile),
-                        ),
-                        importance = 1,
-                        level = "info",
-                        header = blue(" @@ "),
-                        back = True,
-                        count = (currentcounter, totalcounter,)
-                    )
-
-                    ck_remote = handler.get_md5(pkgfile)
-                    if ck_remote is None:
-                        self.output(
-                            "[%s] %s: %s %s" % (
-                                brown(crippled_uri),
-                                blue(_("digest verification of")),
-                                bold(pkgfile),
-                                blue(_("not supported")),
-                            ),
-                            importance = 1,
-                            level = "info",
-                            header = blue(" @@ "),
-                            count = (currentcounter, totalcounter,)
-                        )
-                        continue
-
-                    if ck_remote == pkghash:
-                        match.add(package_id)
-                    else:
-                        not_match.add(package_id)
-                        self.output(
-                            "[%s] %s: %s %s" % (
-                                brown(crippled_uri),
-                                blue(_("package")),
-                                bold(pkgfile),
-                                red(_("NOT healthy")),
-                            ),
-                            importance = 1,
-                            level = "warning",
-                            header = darkred(" !!! "),
-                            count = (currentcounter, totalcounter,)
-                        )
-                        if crippled_uri not in broken_packages:
-                            broken_packages[crippled_uri] = []
-                        broken_packages[crippled_uri].append(pkgfile)
-
-            if broken_packages:
+            mirror_match, mirror_not_match, mirror_broken = mirrors_data.get(
+                uri, (set(), set(), []))
+            match |= mirror_match
+            not_match |= mirror_not_match
+            if mirror_broken:
+                broken_packages[crippled_uri] = mirror_broken
+
+            if mirror_broken:
                 mytxt = blue("%s:") % (
                     _("This is the list of broken packages"),)
                 self.output(
@@ -3662,24 +3771,23 @@ class Server(Client):
                     level = "info",
                     header = red(" * ")
                 )
-                for mirror in list(broken_packages.keys()):
-                    mytxt = "%s: %s" % (
-                        brown(_("Mirror")),
-                        bold(mirror),
-                    )
+                mytxt = "%s: %s" % (
+                    brown(_("Mirror")),
+                    bold(crippled_uri),
+                )
+                self.output(
+                    mytxt,
+                    importance = 1,
+                    level = "info",
+                    header = red("   <> ")
+                )
+                for broken_package in mirror_broken:
                     self.output(
-                        mytxt,
+                        blue(broken_package),
                         importance = 1,
                         level = "info",
-                        header = red("   <> ")
+                        header = red("      - ")
                     )
-                    for broken_package in broken_packages[mirror]:
-                        self.output(
-                            blue(broken_package),
-                            importance = 1,
-                            level = "info",
-                            header = red("      - ")
-                        )
 
             self.output(
                 "%s:" % (
@@ -3693,7 +3801,7 @@ class Server(Client):
                 "[%s] %s: %s" % (
                     red(crippled_uri),
                     brown(_("Number of checked packages")),
-                    brown(str(len(match) + len(not_match))),
+                    brown(str(len(mirror_match) + len(mirror_not_match))),
                 ),
                 importance = 1,
                 level = "info",
@@ -3703,7 +3811,7 @@ class Server(Client):
                 "[%s] %s: %s" % (
                     red(crippled_uri),
                     darkgreen(_("Number of healthy packages")),
-                    darkgreen(str(len(match))),
+                    darkgreen(str(len(mirror_match))),
                 ),
                 importance = 1,
                 level = "info",
@@ -3713,7 +3821,7 @@ class Server(Client):
                 "[%s] %s: %s" % (
                     red(crippled_uri),
                     darkred(_("Number of broken packages")),
-                    darkred(str(len(not_match))),
+                    darkred(str(len(mirror_not_match))),
                 ),
                 importance = 1,
                 level = "info",
@@ -6082,10 +6190,9 @@ class Server(Client):
 
             size = entropy.tools.get_file_size(path)
             disksize = entropy.tools.get_uncompressed_size(path)
-            md5 = entropy.tools.md5sum(path)
-            sha1 = entropy.tools.sha1(path)
-            sha256 = entropy.tools.sha256(path)
-            sha512 = entropy.tools.sha512(path)
+            hashes = entropy.tools.digests(
+                path, ("md5", "sha1", "sha256", "sha512"),
+                use_mmap = True)
             gpg = None
             if repo_sec is not None:
                 gpg = self._get_gpg_signature(repo_sec, repository_id, path)
@@ -6094,10 +6201,10 @@ class Server(Client):
                 'type': down_type,
                 'size': size,
                 'disksize': disksize,
-                'md5': md5,
-                'sha1': sha1,
-                'sha256': sha256,
-                'sha512': sha512,
+                'md5': hashes['md5'],
+                'sha1': hashes['sha1'],
+                'sha256': hashes['sha256'],
+                'sha512': hashes['sha512'],
                 'gpg': gpg,
             }
             return edw
@@ -1467,7 +1467,8 @@ class Server(object):
                 os.remove(expiration_file)
 
 
-    def _sync_run_upload_queue(self, repository_id, uri, upload_queue):
+    def _sync_run_upload_queue(self, repository_id, uri, upload_queue,
+                               abort = None):
 
         branch = self._settings['repositories']['branch']
         crippled_uri = EntropyTransceiver.get_uri_name(uri)
@@ -1493,7 +1494,8 @@ class Server(object):
             uploader = self.TransceiverServerHandler(self._entropy, [uri],
                 myqueue, critical_files = myqueue,
                 txc_basedir = remote_dir, copy_herustic_support = True,
-                handlers_data = handlers_data, repo = repository_id)
+                handlers_data = handlers_data, repo = repository_id,
+                abort = abort)
 
             xerrors, xm_fine_uris, xm_broken_uris = uploader.go()
             if xerrors:
@@ -1533,7 +1535,8 @@ class Server(object):
         return errors, m_fine_uris, m_broken_uris
 
 
-    def _sync_run_download_queue(self, repository_id, uri, download_queue):
+    def _sync_run_download_queue(self, repository_id, uri, download_queue,
+                                 abort = None):
 
         branch = self._settings['repositories']['branch']
         crippled_uri = EntropyTransceiver.get_uri_name(uri)
@@ -1566,7 +1569,7 @@ class Server(object):
                 critical_files = myqueue,
                 txc_basedir = remote_dir, local_basedir = local_basedir,
                 handlers_data = handlers_data, download = True,
-                repo = repository_id)
+                repo = repository_id, abort = abort)
 
             xerrors, xm_fine_uris, xm_broken_uris = downloader.go()
             if xerrors:
@@ -1609,6 +1612,34 @@ class Server(object):
         )
         return errors, m_fine_uris, m_broken_uris
 
+    def _sync_run_transfer_queues(self, repository_id, uri, upload_queue,
+                                  download_queue, transfer_data, abort):
+        """
+        Run the upload and download queues of a packages mirror, this is
+        executed in parallel for every mirror by sync_packages().
+        The outcome is stored into transfer_data, keyed by URI, as a tuple
+        composed by (upload errors (bool), download errors (bool),
+        exception text (list or None)). Transfers stop before the next
+        file once the abort event is set.
+        """
+        upload_errors = False
+        download_errors = False
+        try:
+            if upload_queue:
+                upload_errors, _fine, _broken = self._sync_run_upload_queue(
+                    repository_id, uri, upload_queue, abort = abort)
+            if download_queue:
+                download_errors, _fine, \
+                    _broken = self._sync_run_download_queue(
+                        repository_id, uri, download_queue, abort = abort)
+        except Exception:
+            entropy.tools.print_traceback()
+            exc_txt = entropy.tools.print_exception(silent = True)
+            transfer_data[uri] = (True, True, exc_txt)
+            return
+
+        transfer_data[uri] = (upload_errors, download_errors, None)
+
     def _run_package_files_qa_checks(self, repository_id, packages_list):
 
         my_qa = self._entropy.QA()
@@ -1709,6 +1740,8 @@ class Server(object):
         broken_mirrors = set()
         check_data = ()
         upload_queue_qa_checked = set()
+        uploaded_packages = set()
+        transfer_queues = []
         mirrors_tainted = False
         mirror_errors = False
         mirrors_errors = False
@@ -1832,25 +1865,12 @@ class Server(object):
                 if upload:
                     mirrors_tainted = True
 
-                if upload:
-                    d_errors, m_fine_uris, \
-                        m_broken_uris = self._sync_run_upload_queue(
-                            repository_id, uri, upload)
-
-                    if d_errors:
-                        mirror_errors = True
-
-                if download:
-                    d_errors, m_fine_uris, \
-                        m_broken_uris = self._sync_run_download_queue(
-                            repository_id, uri, download)
-
-                    if d_errors:
-                        mirror_errors = True
-                if not mirror_errors:
-                    successfull_mirrors.add(uri)
+                if upload or download:
+                    # transfers are run later, against all the mirrors
+                    # at the same time
+                    transfer_queues.append((uri, upload, download))
                 else:
-                    mirrors_errors = True
+                    successfull_mirrors.add(uri)
 
             except KeyboardInterrupt:
                 self._entropy.output(
@@ -1934,9 +1954,89 @@ class Server(object):
                     )
                 continue
 
+        if transfer_queues:
+            transfer_data = {}
+            abort = threading.Event()
+            threads = []
+            for uri, upload, download in transfer_queues:
+                th = ParallelTask(self._sync_run_transfer_queues,
+                    repository_id, uri, upload, download, transfer_data,
+                    abort)
+                th.name = "SyncPackagesMirror"
+                th.daemon = True
+                th.start()
+                threads.append(th)
+            try:
+                # join() with a timeout, to be interruptible on Python 2
+                for th in threads:
+                    while th.is_alive():
+                        th.join(1.0)
+            except KeyboardInterrupt:
+                # interrupted mirrors stop before their next file and
+                # are reported as not in sync below
+                abort.set()
+                self._entropy.output(
+                    "[%s|%s|%s] %s" % (
+                        repository_id,
+                        red(_("sync")),
+                        self._settings['repositories']['branch'],
+                        darkgreen(_("keyboard interrupt !")),
+                    ),
+                    importance = 1,
+                    level = "info",
+                    header = darkgreen(" * ")
+                )
+                for th in threads:
+                    while th.is_alive():
+                        th.join(1.0)
+
+            pkg_ext = etpConst['packagesext']
+            for uri, upload, download in transfer_queues:
+
+                upload_errors, download_errors, exc_txt = transfer_data.get(
+                    uri, (True, True, None))
+
+                if exc_txt is not None:
+                    mirrors_errors = True
+                    broken_mirrors.add(uri)
+                    self._entropy.output(
+                        "[%s|%s|%s] %s: %s" % (
+                            repository_id,
+                            red(_("sync")),
+                            self._settings['repositories']['branch'],
+                            darkred(_("exception caught")),
+                            EntropyTransceiver.get_uri_name(uri),
+                        ),
+                        importance = 1,
+                        level = "error",
+                        header = darkred(" !!! ")
+                    )
+                    for line in exc_txt:
+                        self._entropy.output(
+                            repr(line),
+                            importance = 1,
+                            level = "error",
+                            header = darkred(":  ")
+                        )
+                    continue
+
+                if upload and not upload_errors:
+                    uploaded_packages.update(
+                        x[1] for x in upload if x[1].endswith(pkg_ext))
+
+                if upload_errors or download_errors:
+                    mirrors_errors = True
+                else:
+                    successfull_mirrors.add(uri)
+
         # if at least one server has been synced successfully, move files
         if (len(successfull_mirrors) > 0) and not pretend:
             self._move_files_over_from_upload(repository_id)
+            # mirrors in sync are now carrying the local package files
+            if self._update_packages_manifest(
+                    repository_id, uploaded_packages):
+                self._upload_packages_manifest(
+                    repository_id, sorted(successfull_mirrors))
 
         if packages_check:
             check_data = self._entropy._verify_local_packages(repository_id,
@@ -1945,6 +2045,176 @@ class Server(object):
         return mirrors_tainted, mirrors_errors, successfull_mirrors, \
             broken_mirrors, check_data
 
+    def _get_packages_manifest_relative_path(self):
+        """
+        Return the relative path (to the repository base directory) of the
+        packages checksum manifest of the current branch.
+        """
+        return os.path.join(
+            etpConst['packagesrelativepath_basedir'],
+            etpConst['currentarch'],
+            self._settings['repositories']['branch'],
+            etpConst['packagesmanifestfile'])
+
+    def _read_packages_manifest(self, path):
+        """
+        Parse a packages checksum manifest file.
+
+        @param path: path to the manifest file
+        @type path: string
+        @return: dict mapping package files relative paths to their md5
+        @rtype: dict
+        """
+        manifest = {}
+        enc = etpConst['conf_encoding']
+        try:
+            with codecs.open(path, "r", encoding=enc) as man_f:
+                for line in man_f:
+                    try:
+                        digest, rel_path = line.rstrip("\n").split("  ", 1)
+                    except ValueError:
+                        continue
+                    manifest[rel_path] = digest
+        except (OSError, IOError) as err:
+            if err.errno != errno.ENOENT:
+                raise
+        return manifest
+
+    def _write_packages_manifest(self, path, manifest):
+        """
+        Atomically write a packages checksum manifest file.
+
+        @param path: path to the manifest file
+        @type path: string
+        @param manifest: dict mapping package files relative paths to
+            their md5
+        @type manifest: dict
+        """
+        self._entropy._ensure_dir_path(os.path.dirname(path))
+        tmp_path = path + EntropyUriHandler.TMP_TXC_FILE_EXT
+        enc = etpConst['conf_encoding']
+        with codecs.open(tmp_path, "w", encoding=enc) as man_f:
+            for rel_path in sorted(manifest.keys()):
+                man_f.write("%s  %s\n" % (manifest[rel_path], rel_path))
+        os.rename(tmp_path, path)
+
+    def _update_packages_manifest(self, repository_id, uploaded_packages):
+        """
+        Incrementally update the local packages checksum manifest of the
+        current branch: entries of package files no longer available are
+        dropped, only new or just uploaded package files are hashed.
+
+        @param repository_id: repository identifier
+        @type repository_id: string
+        @param uploaded_packages: relative paths of the package files
+            uploaded to mirrors
+        @type uploaded_packages: set
+        @return: True, if the manifest changed
+        @rtype: bool
+        """
+        manifest_path = self._entropy.complete_local_package_path(
+            self._get_packages_manifest_relative_path(), repository_id)
+        manifest = self._read_packages_manifest(manifest_path)
+        local_packages = self._calculate_local_package_files(repository_id)
+        changed = False
+
+        for rel_path in list(manifest.keys()):
+            if rel_path not in local_packages:
+                del manifest[rel_path]
+                changed = True
+
+        for rel_path in local_packages:
+            if rel_path in manifest and rel_path not in uploaded_packages:
+                continue
+            local_path = self._entropy.complete_local_package_path(
+                rel_path, repository_id)
+            try:
+                digest = entropy.tools.md5sum(local_path)
+            except (OSError, IOError) as err:
+                if err.errno != errno.ENOENT:
+                    raise
+                continue
+            if manifest.get(rel_path) != digest:
+                manifest[rel_path] = digest
+                changed = True
+
+        if changed or not os.path.isfile(manifest_path):
+            self._write_packages_manifest(manifest_path, manifest)
+            changed = True
+        return changed
+
+    def _upload_packages_manifest(self, repository_id, mirrors):
+        """
+        Upload the local packages checksum manifest of the current branch
+        to the given packages mirrors.
+
+        @param repository_id: repository identifier
+        @type repository_id: string
+        @param mirrors: list of packages mirror URIs
+        @type mirrors: list
+        @return: True if upload went successful.
+        @rtype: bool
+        """
+        manifest_rel = self._get_packages_manifest_relative_path()
+        manifest_path = self._entropy.complete_local_package_path(
+            manifest_rel, repository_id)
+        remote_dir = self._entropy.complete_remote_package_relative_path(
+            os.path.dirname(manifest_rel), repository_id)
+
+        uploader = self.TransceiverServerHandler(
+            self._entropy,
+            mirrors,
+            [manifest_path],
+            critical_files = [manifest_path],
+            txc_basedir = remote_dir, repo = repository_id
+        )
+        errors, m_fine_uris, m_broken_uris = uploader.go()
+        if errors:
+            m_broken_uris = sorted(m_broken_uris)
+            m_broken_uris = [EntropyTransceiver.get_uri_name(x_uri) \
+                for x_uri, x_uri_rc in m_broken_uris]
+            self._entropy.output(
+                "[%s] %s %s" % (
+                        brown(repository_id),
+                        blue(_("packages manifest upload failed on")),
+                        red(', '.join(m_broken_uris)),
+                ),
+                importance = 1,
+                level = "warning",
+                header = darkred(" !!! ")
+            )
+            return False
+        return True
+
+    def read_remote_packages_manifest(self, repository_id, txc_handler):
+        """
+        Download and parse the packages checksum manifest of the current
+        branch stored on a packages mirror.
+
+        @param repository_id: repository identifier
+        @type repository_id: string
+        @param txc_handler: transceiver handler connected to the mirror
+        @type txc_handler: EntropyUriHandler
+        @return: dict mapping package files relative paths to their md5,
+            empty if the manifest is not available
+        @rtype: dict
+        """
+        remote_path = self._entropy.complete_remote_package_relative_path(
+            self._get_packages_manifest_relative_path(), repository_id)
+
+        tmp_fd, tmp_path = const_mkstemp(
+            prefix = "entropy.server.manifest")
+        os.close(tmp_fd)
+        try:
+            if not txc_handler.download(remote_path, tmp_path):
+                return {}
+            return self._read_packages_manifest(tmp_path)
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
     def _move_files_over_from_upload(self, repository_id):
 
         upload_dir = self._entropy._get_local_upload_directory(repository_id)
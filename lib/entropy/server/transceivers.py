@@ -10,9 +10,11 @@
 
 """
 import os
+import threading
 
 from entropy.const import const_isstring, const_isnumber, etpConst
 from entropy.output import darkred, blue, brown, darkgreen, red, bold
+from entropy.misc import ParallelTask
 from entropy.transceivers.exceptions import TransceiverConnectionError
 from entropy.i18n import _
 from entropy.client.interfaces.db import InstalledPackagesRepository
@@ -25,7 +27,8 @@ class TransceiverServerHandler:
     def __init__(self, entropy_interface, uris, files_to_upload,
         download = False, remove = False, txc_basedir = None,
         local_basedir = None, critical_files = None,
-        handlers_data = None, repo = None, copy_herustic_support = False):
+        handlers_data = None, repo = None, copy_herustic_support = False,
+        abort = None):
 
         if critical_files is None:
             critical_files = []
@@ -49,7 +52,7 @@ class TransceiverServerHandler:
             etpConst['system_settings_plugins_ids']['server_plugin']
         srv_set = self._settings[self.sys_settings_plugin_id]['server']
 
-        # server-side speed limit
+        # server-side speed limit, applied to every mirror connection
         self.speed_limit = srv_set['sync_speed_limit']
         self.download = download
         self.remove = remove
@@ -76,6 +79,11 @@ class TransceiverServerHandler:
 
         self.critical_files = critical_files
         self.handlers_data = handlers_data.copy()
+        # set to stop the transfers before the next file, shared
+        # with the caller when passed
+        if abort is None:
+            abort = threading.Event()
+        self._abort = abort
 
     def handler_verify_upload(self, local_filepath, uri, counter, maxcount,
         tries, remote_md5 = None):
@@ -162,11 +170,7 @@ class TransceiverServerHandler:
         broken = set()
         fail = False
         crippled_uri = EntropyTransceiver.get_uri_name(uri)
-        action = 'push'
-        if self.download:
-            action = 'pull'
-        elif self.remove:
-            action = 'remove'
+        action = self._action()
 
         try:
             txc = EntropyTransceiver(uri)
@@ -184,6 +188,21 @@ class TransceiverServerHandler:
 
             for mypath in self.myfiles:
 
+                if self._abort.is_set():
+                    self._entropy.output(
+                        "[%s|%s] %s" % (
+                            blue(crippled_uri),
+                            brown(action),
+                            darkred(_("transfer interrupted")),
+                        ),
+                        importance = 1,
+                        level = "warning",
+                        header = darkred(" !!! ")
+                    )
+                    fail = True
+                    broken.add((uri, "interrupted"))
+                    break
+
                 base_dir = self.txc_basedir
 
                 if isinstance(mypath, tuple):
@@ -394,16 +413,68 @@ class TransceiverServerHandler:
 
         return None, None
 
-    def go(self):
+    def _transceive_task(self, uri, results):
+        """
+        Thread body of the concurrent mirrors engine, run _transceive()
+        against the given URI and store its outcome into results.
+        Exceptions are recorded as well, go() will raise them again.
+        """
+        try:
+            results[uri] = (self._transceive(uri), None)
+        except Exception as err:
+            print_traceback()
+            results[uri] = (None, err)
+
+        crippled_uri = EntropyTransceiver.get_uri_name(uri)
+        self._entropy.output(
+            "[%s|%s] %s (%s/%s)" % (
+                blue(crippled_uri),
+                brown(self._action()),
+                blue(_("mirror done")),
+                darkgreen(str(len(results))),
+                bold(str(len(self.uris))),
+            ),
+            importance = 0,
+            level = "info",
+            header = blue(" @@ ")
+        )
+
+    @staticmethod
+    def _join_threads(threads):
+        """
+        Wait for the given threads to terminate. Join with a timeout, so
+        that KeyboardInterrupt is delivered to the main thread (on Python 2
+        a plain join() cannot be interrupted).
+        """
+        for th in threads:
+            while th.is_alive():
+                th.join(1.0)
 
+    def _action(self):
+        """
+        Return the name of the action performed by this handler.
+        """
+        if self.download:
+            return 'pull'
+        elif self.remove:
+            return 'remove'
+        return 'push'
+
+    def go(self):
+        """
+        Run the transfer against all the URIs passed to the constructor.
+        Mirrors are contacted concurrently, one thread per mirror, each
+        with its own connection (and thus its own speed limit).
+        Results are collected following the order of the given URIs.
+
+        @return: tuple composed by (errors (bool), fine uris (set),
+            broken uris (set of (uri, reason) tuples))
+        @rtype: tuple
+        """
         broken_uris = set()
         fine_uris = set()
         errors = False
-        action = 'push'
-        if self.download:
-            action = 'pull'
-        elif self.remove:
-            action = 'remove'
+        action = self._action()
 
         for uri in self.uris:
 
@@ -431,7 +502,41 @@ class TransceiverServerHandler:
                 header = blue(" @@ ")
             )
 
-            fail, fine, broken = self._transceive(uri)
+        results = {}
+        if len(self.uris) > 1:
+            threads = []
+            for uri in self.uris:
+                th = ParallelTask(self._transceive_task, uri, results)
+                th.name = "TransceiverServerHandler"
+                th.daemon = True
+                th.start()
+                threads.append(th)
+            try:
+                self._join_threads(threads)
+            except KeyboardInterrupt:
+                self._abort.set()
+                self._entropy.output(
+                    "[%s] %s, %s..." % (
+                        brown(action),
+                        darkgreen(_("keyboard interrupt !")),
+                        blue(_("waiting for running transfers")),
+                    ),
+                    importance = 1,
+                    level = "info",
+                    header = darkgreen(" * ")
+                )
+                # a second interrupt leaves the daemon threads behind
+                self._join_threads(threads)
+                raise
+        else:
+            for uri in self.uris:
+                results[uri] = (self._transceive(uri), None)
+
+        for uri in self.uris:
+            outcome, err = results[uri]
+            if err is not None:
+                raise err
+            fail, fine, broken = outcome
             fine_uris |= fine
             broken_uris |= broken
             if fail:
@@ -40,6 +40,7 @@ from entropy.const import const_debug_write, const_setup_file, etpConst, \
     const_convert_to_unicode, const_isstring, const_debug_enabled
 from entropy.core.settings.base import SystemSettings
 from entropy.exceptions import EntropyException
+from entropy.fetchers import HTTPConnectionPool
 import entropy.tools
 import entropy.dep
 
@@ -507,16 +508,13 @@ class WebService(object):
             " tx_callback: %s, timeout: %s" % (self._request_host, request_path,
                 params, self._transfer_callback, timeout,))
         connection = None
+        pool = HTTPConnectionPool()
         try:
-            if self._request_protocol == "http":
-                connection = httplib.HTTPConnection(self._request_host,
-                    timeout = timeout)
-            elif self._request_protocol == "https":
-                connection = httplib.HTTPSConnection(self._request_host,
-                    timeout = timeout)
-            else:
+            if self._request_protocol not in ("http", "https"):
                 raise WebService.RequestError("invalid request protocol",
                     method = function_name)
+            connection, _reused = pool.acquire(self._request_protocol,
+                self._request_host, timeout)
 
             headers = {
                 "Accept": "text/plain",
@@ -664,6 +662,12 @@ class WebService(object):
             if self._transfer_callback is not None:
                 self._transfer_callback(total_length, total_length, True)
 
+            if not response.will_close:
+                # response fully read, the connection can be reused
+                pool.release(self._request_protocol, self._request_host,
+                    connection)
+                connection = None
+
             if const_is_python3():
                 outcome = const_convert_to_unicode(outcome)
             if not outcome:
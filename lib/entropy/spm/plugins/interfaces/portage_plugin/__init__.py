@@ -1399,11 +1399,14 @@ class PortagePlugin(SpmPlugin):
         system_settings = SystemSettings()
 
         # fill package name and version
-        data['digest'] = entropy.tools.md5sum(package_file)
+        hashes = entropy.tools.digests(
+            package_file, ("md5", "sha1", "sha256", "sha512"),
+            use_mmap = True)
+        data['digest'] = hashes['md5']
         data['signatures'] = {
-            'sha1': entropy.tools.sha1(package_file),
-            'sha256': entropy.tools.sha256(package_file),
-            'sha512': entropy.tools.sha512(package_file),
+            'sha1': hashes['sha1'],
+            'sha256': hashes['sha256'],
+            'sha512': hashes['sha512'],
             'gpg': None, # GPG signature will be filled later on, if enabled
         }
         data['datecreation'] = str(os.path.getmtime(package_file))
@@ -4683,7 +4686,7 @@ class PortagePlugin(SpmPlugin):
         Generate NEEDED.ELF.2 metadata by scraping the package
         content directly. For: needed_libs metadata.
         """
-        needed_libs = set()
+        elf_objs = []
         for obj, ftype in content.items():
 
             if ftype != "obj":
@@ -4699,20 +4702,27 @@ class PortagePlugin(SpmPlugin):
             try:
                 if not entropy.tools.is_elf_file(unpack_obj):
                     continue
-                elf_class = entropy.tools.read_elf_class(unpack_obj)
             except IOError as err:
                 self.__output.output("%s: %s => %s" % (
                     _("IOError while reading"), unpack_obj, repr(err),),
                     level = "warning")
                 continue
 
-            meta = entropy.tools.read_elf_metadata(unpack_obj)
+            elf_objs.append((obj, unpack_obj))
+
+        needed_libs = set()
+        elfs_meta = entropy.tools.read_elf_metadata_many(
+            unpack_obj for _obj, unpack_obj in elf_objs)
+        for obj, unpack_obj in elf_objs:
+
+            meta = elfs_meta[unpack_obj]
             if meta is None:
                 continue
 
             for soname in meta['needed']:
                 needed_libs.add((
-                    obj, meta['soname'], soname, elf_class, meta['runpath']))
+                    obj, meta['soname'], soname, meta['class'],
+                    meta['runpath']))
 
         return frozenset(needed_libs)
 
@@ -4766,7 +4776,7 @@ class PortagePlugin(SpmPlugin):
         # NOTE: this does not take into account changes to environment
         # caused by the installation of the package, if this metadata
         # is read off a non-installed one.
-        provided_libs = set()
+        elf_objs = []
         for obj, ftype in content.items():
 
             if ftype not in ("obj", "sym"):
@@ -4792,11 +4802,14 @@ class PortagePlugin(SpmPlugin):
                     level = "warning")
                 continue
 
-            try:
-                elf_meta = entropy.tools.read_elf_metadata(unpack_obj)
-            except FileNotFound:
-                continue
+            elf_objs.append((obj, unpack_obj))
+
+        provided_libs = set()
+        elfs_meta = entropy.tools.read_elf_metadata_many(
+            unpack_obj for _obj, unpack_obj in elf_objs)
+        for obj, unpack_obj in elf_objs:
 
+            elf_meta = elfs_meta[unpack_obj]
             if elf_meta is None:
                 continue
 
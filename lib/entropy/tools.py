@@ -38,7 +38,7 @@ from entropy.output import print_generic
 from entropy.const import etpConst, const_kill_threads, const_islive, \
     const_isunicode, const_convert_to_unicode, const_convert_to_rawstring, \
     const_israwstring, const_secure_config_file, const_is_python3, \
-    const_mkstemp, const_file_readable
+    const_mkstemp, const_file_readable, const_get_cpus
 from entropy.exceptions import FileNotFound, InvalidAtom, DirectoryNotFound
 
 
@@ -838,6 +838,57 @@ def split_indexable_into_chunks(mystr, chunk_len):
         mylen -= my_chunk_len
     return chunks
 
+def digests(filepath, hash_types, use_mmap = False):
+    """
+    Calculate the given hashes of file at path, reading it only once.
+    Supported hash types are the ones provided by hashlib, like "md5",
+    "sha1", "sha256" and "sha512".
+
+    @param filepath: path to file
+    @type filepath: string
+    @param hash_types: list of hash types to calculate
+    @type hash_types: iterable
+    @keyword use_mmap: memory map the file instead of doing buffered reads
+    @type use_mmap: bool
+    @return: dict of hex digests, keyed by hash type
+    @rtype: dict
+    @raise ValueError: if a hash type is not supported
+    """
+    hashers = []
+    for hash_type in set(hash_types):
+        hashers.append((hash_type, hashlib.new(hash_type)))
+    updaters = [m.update for _hash_type, m in hashers]
+
+    with open(filepath, "rb") as readfile:
+        mapped = None
+        if use_mmap:
+            try:
+                mapped = mmap.mmap(readfile.fileno(), 0,
+                                   access = mmap.ACCESS_READ)
+            except (mmap.error, ValueError, EnvironmentError):
+                # empty files cannot be mapped
+                mapped = None
+
+        if mapped is not None:
+            try:
+                size = len(mapped)
+                offset = 0
+                while offset < size:
+                    block = mapped[offset:offset + _READ_SIZE]
+                    for updater in updaters:
+                        updater(block)
+                    offset += _READ_SIZE
+            finally:
+                mapped.close()
+        else:
+            block = readfile.read(_READ_SIZE)
+            while block:
+                for updater in updaters:
+                    updater(block)
+                block = readfile.read(_READ_SIZE)
+
+    return dict((hash_type, m.hexdigest()) for hash_type, m in hashers)
+
 def md5sum(filepath):
     """
     Calculate md5 hash of given file at path.
@@ -847,13 +898,7 @@ def md5sum(filepath):
     @return: md5 hex digest
     @rtype: string
     """
-    m = hashlib.md5()
-    with open(filepath, "rb") as readfile:
-        block = readfile.read(_READ_SIZE)
-        while block:
-            m.update(block)
-            block = readfile.read(_READ_SIZE)
-    return m.hexdigest()
+    return digests(filepath, ("md5",))["md5"]
 
 def sha512(filepath):
     """
@@ -864,13 +909,7 @@ def sha512(filepath):
     @return: SHA512 hex digest
     @rtype: string
     """
-    m = hashlib.sha512()
-    with open(filepath, "rb") as readfile:
-        block = readfile.read(_READ_SIZE)
-        while block:
-            m.update(block)
-            block = readfile.read(_READ_SIZE)
-    return m.hexdigest()
+    return digests(filepath, ("sha512",))["sha512"]
 
 def sha256(filepath):
     """
@@ -881,13 +920,7 @@ def sha256(filepath):
     @return: SHA256 hex digest
     @rtype: string
     """
-    m = hashlib.sha256()
-    with open(filepath, "rb") as readfile:
-        block = readfile.read(_READ_SIZE)
-        while block:
-            m.update(block)
-            block = readfile.read(_READ_SIZE)
-    return m.hexdigest()
+    return digests(filepath, ("sha256",))["sha256"]
 
 def sha1(filepath):
     """
@@ -898,13 +931,7 @@ def sha1(filepath):
     @return: SHA1 hex digest
     @rtype: string
     """
-    m = hashlib.sha1()
-    with open(filepath, "rb") as readfile:
-        block = readfile.read(_READ_SIZE)
-        while block:
-            m.update(block)
-            block = readfile.read(_READ_SIZE)
-    return m.hexdigest()
+    return digests(filepath, ("sha1",))["sha1"]
 
 def md5sum_directory(directory):
     """
@@ -1666,6 +1693,40 @@ def remove_entropy_metadata(entropy_package_file, save_path):
 
     return True
 
+def create_digest_files(filepath, hash_types):
+    """
+    Create valid checksum files (MD5, SHA1, SHA256, SHA512) off filepath,
+    reading it only once.
+
+    @param filepath: file path to read
+    @type filepath: string
+    @param hash_types: list of hash types, "md5", "sha1", "sha256"
+        or "sha512"
+    @type hash_types: iterable
+    @return: dict of paths to checksum files, keyed by hash type
+    @rtype: dict
+    """
+    file_exts = {
+        "md5": etpConst['packagesmd5fileext'],
+        "sha1": etpConst['packagessha1fileext'],
+        "sha256": etpConst['packagessha256fileext'],
+        "sha512": etpConst['packagessha512fileext'],
+    }
+    hashes = digests(filepath, hash_types)
+    enc = etpConst['conf_encoding']
+    fname = os.path.basename(filepath)
+
+    hashfiles = {}
+    for hash_type, hash_val in hashes.items():
+        hashfile = filepath + file_exts[hash_type]
+        with codecs.open(hashfile, "w", encoding=enc) as f:
+            f.write(hash_val)
+            f.write("  ")
+            f.write(fname)
+            f.write("\n")
+        hashfiles[hash_type] = hashfile
+    return hashfiles
+
 def create_md5_file(filepath):
     """
     Create valid MD5 file off filepath.
@@ -1675,16 +1736,7 @@ def create_md5_file(filepath):
     @return: path to MD5 file
     @rtype: string
     """
-    md5hash = md5sum(filepath)
-    hashfile = filepath+etpConst['packagesmd5fileext']
-    enc = etpConst['conf_encoding']
-    with codecs.open(hashfile, "w", encoding=enc) as f:
-        name = os.path.basename(filepath)
-        f.write(md5hash)
-        f.write("  ")
-        f.write(name)
-        f.write("\n")
-    return hashfile
+    return create_digest_files(filepath, ("md5",))["md5"]
 
 def create_sha512_file(filepath):
     """
@@ -1695,16 +1747,7 @@ def create_sha512_file(filepath):
     @return: path to SHA512 file
     @rtype: string
     """
-    sha512hash = sha512(filepath)
-    hashfile = filepath+etpConst['packagessha512fileext']
-    enc = etpConst['conf_encoding']
-    with codecs.open(hashfile, "w", encoding=enc) as f:
-        fname = os.path.basename(filepath)
-        f.write(sha512hash)
-        f.write("  ")
-        f.write(fname)
-        f.write("\n")
-    return hashfile
+    return create_digest_files(filepath, ("sha512",))["sha512"]
 
 def create_sha256_file(filepath):
     """
@@ -1715,16 +1758,7 @@ def create_sha256_file(filepath):
     @return: path to SHA256 file
     @rtype: string
     """
-    sha256hash = sha256(filepath)
-    hashfile = filepath+etpConst['packagessha256fileext']
-    enc = etpConst['conf_encoding']
-    with codecs.open(hashfile, "w", encoding=enc) as f:
-        fname = os.path.basename(filepath)
-        f.write(sha256hash)
-        f.write("  ")
-        f.write(fname)
-        f.write("\n")
-    return hashfile
+    return create_digest_files(filepath, ("sha256",))["sha256"]
 
 def create_sha1_file(filepath):
     """
@@ -1735,16 +1769,7 @@ def create_sha1_file(filepath):
     @return: path to SHA1 file
     @rtype: string
     """
-    sha1hash = sha1(filepath)
-    hashfile = filepath+etpConst['packagessha1fileext']
-    enc = etpConst['conf_encoding']
-    with codecs.open(hashfile, "w", encoding=enc) as f:
-        fname = os.path.basename(filepath)
-        f.write(sha1hash)
-        f.write("  ")
-        f.write(fname)
-        f.write("\n")
-    return hashfile
+    return create_digest_files(filepath, ("sha1",))["sha1"]
 
 def compare_md5(filepath, checksum):
     """
@@ -2702,47 +2727,234 @@ def resolve_dynamic_library(library, requiring_executable):
 
     return found_path
 
-def read_elf_dynamic_libraries(elf_file):
+# ELF constants used by _read_elf_dynamic_metadata()
+_ELF_PT_LOAD = 1
+_ELF_PT_DYNAMIC = 2
+_ELF_SHT_DYNAMIC = 6
+_ELF_DT_NULL = 0
+_ELF_DT_NEEDED = 1
+_ELF_DT_STRTAB = 5
+_ELF_DT_SONAME = 14
+_ELF_DT_RPATH = 15
+_ELF_DT_RUNPATH = 29
+
+def _read_elf_dynamic_metadata(elf_file):
     """
-    Extract NEEDED metadatum from ELF file at path.
+    Parse ELF file headers and dynamic section without spawning any external
+    tool (like scanelf).
 
     @param elf_file: path to ELF file
     @type elf_file: string
-    @return: list (set) of strings in NEEDED metadatum
-    @rtype: set
+    @return: dict with "class", "soname", "needed" (ordered list), "rpath"
+        and "runpath" keys. None if the file is not a valid ELF object.
+    @rtype: dict or None
+    @raise IOError: if the file cannot be read
     """
-    proc = None
-    args = ("/usr/bin/scanelf", "-qF", "%n", elf_file)
+    with open(elf_file, "rb") as elf_f:
+        try:
+            size = os.fstat(elf_f.fileno()).st_size
+            if size < 52: # smallest ELF header
+                return None
+            elf_map = mmap.mmap(elf_f.fileno(), size,
+                access = mmap.ACCESS_READ)
+        except (mmap.error, ValueError, OSError):
+            return None
 
-    out = None
     try:
-        proc = subprocess.Popen(args, stdout = subprocess.PIPE)
-        exit_st = proc.wait()
-        if exit_st != 0:
-            raise FileNotFound("scanelf failure")
-        out = proc.stdout.read()
+        return _parse_elf_dynamic_metadata(elf_map, size)
+    except (struct.error, IndexError, ValueError):
+        # truncated or corrupted ELF file
+        return None
+    finally:
+        elf_map.close()
 
-    except (OSError, IOError) as err:
-        if err.errno != errno.ENOENT:
-            raise
-        raise FileNotFound("/usr/bin/scanelf not found")
+def _parse_elf_dynamic_metadata(elf_map, size):
+    """
+    _read_elf_dynamic_metadata() parser, working on ELF file mmap.
+    """
+    if elf_map[0:4] != b"\x7fELF":
+        return None
 
-    finally:
-        if proc is not None:
-            try:
-                proc.stdout.close()
-            except (OSError, IOError):
-                pass
+    elf_class = struct.unpack("B", elf_map[4:5])[0]
+    elf_data = struct.unpack("B", elf_map[5:6])[0]
+    if elf_data == 1:
+        endian = "<"
+    elif elf_data == 2:
+        endian = ">"
+    else:
+        return None
 
-    outcome = set()
-    if out is not None:
+    if elf_class == 1:
+        phoff, shoff = struct.unpack(endian + "II", elf_map[28:36])
+        phentsize, phnum, shentsize, shnum = struct.unpack(
+            endian + "HHHH", elf_map[42:50])
+        phdr_fmt = endian + "IIIII"   # type, offset, vaddr, paddr, filesz
+        shdr_fmt = endian + "IIIIIII" # name, type, flags, addr, off, sz, link
+        dyn_fmt = endian + "iI"
+    elif elf_class == 2:
+        phoff, shoff = struct.unpack(endian + "QQ", elf_map[32:48])
+        phentsize, phnum, shentsize, shnum = struct.unpack(
+            endian + "HHHH", elf_map[54:62])
+        phdr_fmt = endian + "IIQQQQ"  # type, flags, offset, vaddr, ...
+        shdr_fmt = endian + "IIQQQQI"
+        dyn_fmt = endian + "qQ"
+    else:
+        return None
+
+    phdr_size = struct.calcsize(phdr_fmt)
+    shdr_size = struct.calcsize(shdr_fmt)
+    dyn_size = struct.calcsize(dyn_fmt)
+
+    def _phdr(index):
+        off = phoff + index * phentsize
+        data = struct.unpack(phdr_fmt, elf_map[off:off + phdr_size])
+        if elf_class == 1:
+            p_type, p_offset, p_vaddr, _p_paddr, p_filesz = data
+        else:
+            p_type, _p_flags, p_offset, p_vaddr, _p_paddr, p_filesz = data
+        return p_type, p_offset, p_vaddr, p_filesz
+
+    def _shdr(index):
+        off = shoff + index * shentsize
+        (_sh_name, sh_type, _sh_flags, _sh_addr, sh_offset, sh_size,
+         sh_link) = struct.unpack(shdr_fmt, elf_map[off:off + shdr_size])
+        return sh_type, sh_offset, sh_size, sh_link
+
+    dyn_offset = None
+    dyn_filesz = 0
+    strtab_offset = None
+    loads = []
+    if phoff and phentsize >= phdr_size:
+        for index in range(phnum):
+            p_type, p_offset, p_vaddr, p_filesz = _phdr(index)
+            if p_type == _ELF_PT_DYNAMIC:
+                dyn_offset, dyn_filesz = p_offset, p_filesz
+            elif p_type == _ELF_PT_LOAD:
+                loads.append((p_vaddr, p_offset, p_filesz))
+
+    if dyn_offset is None and shoff and shentsize >= shdr_size:
+        # no program headers (or no PT_DYNAMIC), use section headers
+        for index in range(shnum):
+            sh_type, sh_offset, sh_size, sh_link = _shdr(index)
+            if sh_type == _ELF_SHT_DYNAMIC:
+                dyn_offset, dyn_filesz = sh_offset, sh_size
+                if sh_link < shnum:
+                    strtab_offset = _shdr(sh_link)[1]
+                break
+
+    metadata = {
+        'class': elf_class,
+        'soname': None,
+        'needed': [],
+        'rpath': None,
+        'runpath': None,
+    }
+    if dyn_offset is None:
+        # static object
+        return metadata
+
+    entries = []
+    strtab_vaddr = None
+    dyn_end = min(dyn_offset + dyn_filesz, size)
+    off = dyn_offset
+    while off + dyn_size <= dyn_end:
+        d_tag, d_val = struct.unpack(dyn_fmt, elf_map[off:off + dyn_size])
+        off += dyn_size
+        if d_tag == _ELF_DT_NULL:
+            break
+        if d_tag == _ELF_DT_STRTAB:
+            strtab_vaddr = d_val
+        elif d_tag in (_ELF_DT_NEEDED, _ELF_DT_SONAME,
+                       _ELF_DT_RPATH, _ELF_DT_RUNPATH):
+            entries.append((d_tag, d_val))
+
+    if strtab_vaddr is not None:
+        # DT_STRTAB is a virtual address, map it to a file offset
+        for p_vaddr, p_offset, p_filesz in loads:
+            if p_vaddr <= strtab_vaddr < p_vaddr + p_filesz:
+                strtab_offset = strtab_vaddr - p_vaddr + p_offset
+                break
+    if strtab_offset is None:
+        if entries:
+            return None
+        return metadata
+
+    def _string(str_off):
+        start = strtab_offset + str_off
+        if start >= size:
+            raise ValueError("string out of bounds")
+        end = elf_map.find(b"\0", start)
+        if end == -1:
+            end = size
+        value = elf_map[start:end]
         if const_is_python3():
-            out = const_convert_to_unicode(out)
-        for line in out.split("\n"):
-            if line:
-                libs = line.strip().split(" ", -1)[0].split(",")
-                outcome.update(libs)
-    return outcome
+            value = const_convert_to_unicode(value)
+        return value
+
+    for d_tag, d_val in entries:
+        if d_tag == _ELF_DT_NEEDED:
+            metadata['needed'].append(_string(d_val))
+        elif d_tag == _ELF_DT_SONAME:
+            metadata['soname'] = _string(d_val)
+        elif d_tag == _ELF_DT_RPATH:
+            metadata['rpath'] = _string(d_val)
+        elif d_tag == _ELF_DT_RUNPATH:
+            metadata['runpath'] = _string(d_val)
+
+    return metadata
+
+def _read_elf_dynamic_metadata_or_raise(elf_file):
+    """
+    Same as _read_elf_dynamic_metadata() but raising FileNotFound if the
+    file cannot be read, like the old scanelf based implementations.
+    """
+    try:
+        return _read_elf_dynamic_metadata(elf_file)
+    except (OSError, IOError) as err:
+        raise FileNotFound("cannot read %s: %s" % (elf_file, err))
+
+def _elf_linker_path(metadata):
+    """
+    Return the built-in linker path string of the ELF metadata returned by
+    _read_elf_dynamic_metadata(). Like the dynamic linker does, DT_RPATH is
+    ignored if DT_RUNPATH is set.
+    """
+    if metadata['runpath'] is not None:
+        return metadata['runpath']
+    if metadata['rpath'] is not None:
+        return metadata['rpath']
+    return ""
+
+def read_elf_dynamic_libraries(elf_file):
+    """
+    Extract NEEDED metadatum from ELF file at path.
+
+    @param elf_file: path to ELF file
+    @type elf_file: string
+    @return: list (set) of strings in NEEDED metadatum
+    @rtype: set
+    @raise FileNotFound: if the file cannot be read
+    """
+    metadata = _read_elf_dynamic_metadata_or_raise(elf_file)
+    if metadata is None:
+        return set()
+    return set(metadata['needed'])
+
+def _elf_metadata_from_dynamic(metadata):
+    """
+    Convert _read_elf_dynamic_metadata() output to read_elf_metadata() one.
+    """
+    if metadata is None:
+        return None
+    soname = metadata['soname']
+    if soname is None:
+        soname = ""
+    return {
+        'soname': soname,
+        'class': metadata['class'],
+        'runpath': _elf_linker_path(metadata),
+        'needed': set(metadata['needed']),
+    }
 
 def read_elf_metadata(elf_file):
     """
@@ -2753,58 +2965,65 @@ def read_elf_metadata(elf_file):
     @return: dict with "soname", "class", "runpath" and "needed" keys. None if
         no metadata is found.
     @rtype: dict or None
+    @raise FileNotFound: if the file cannot be read
     """
-    proc = None
-    args = ("/usr/bin/scanelf", "-qF", "%M;%S;%r;%n", elf_file)
+    return _elf_metadata_from_dynamic(
+        _read_elf_dynamic_metadata_or_raise(elf_file))
 
-    out = None
+def _read_elf_metadata_many_worker(elf_file):
+    """
+    read_elf_metadata_many() worker function, must not raise exceptions.
+    """
     try:
-        proc = subprocess.Popen(args, stdout = subprocess.PIPE)
-        exit_st = proc.wait()
-        if exit_st != 0:
-            raise FileNotFound("scanelf failure")
-        out = proc.stdout.read()
+        return elf_file, read_elf_metadata(elf_file)
+    except FileNotFound:
+        return elf_file, None
+
+def read_elf_metadata_many(elf_files, processes = None):
+    """
+    Batch version of read_elf_metadata(). Big lists of files are
+    scanned using a pool of processes.
+
+    @param elf_files: list of paths to ELF files
+    @type elf_files: list
+    @keyword processes: number of processes to use, if None, the number
+        of available CPUs
+    @type processes: int
+    @return: dict composed by ELF file path as key and read_elf_metadata()
+        output as value (None if the file is not readable or not an ELF one)
+    @rtype: dict
+    """
+    elf_files = list(elf_files)
+    if processes is None:
+        processes = const_get_cpus()
+    processes = min(processes, len(elf_files) // 64)
 
-    except (OSError, IOError) as err:
-        if err.errno != errno.ENOENT:
-            raise
-        raise FileNotFound("/usr/bin/scanelf not found")
+    if processes < 2:
+        return dict(map(_read_elf_metadata_many_worker, elf_files))
 
+    import multiprocessing
+    pool = multiprocessing.Pool(processes)
+    try:
+        chunksize = max(1, len(elf_files) // (processes * 8))
+        outcome = dict(pool.imap_unordered(
+            _read_elf_metadata_many_worker, elf_files, chunksize))
+        pool.close()
+    except:
+        pool.terminate()
+        raise
     finally:
-        if proc is not None:
-            try:
-                proc.stdout.close()
-            except (OSError, IOError):
-                pass
-
-    if out is not None:
-        if const_is_python3():
-            out = const_convert_to_unicode(out)
-        if not out:
-            # no metadata.
-            return None
-
-        for line in out.split("\n"):
-            if line:
-                data = line.strip().split(" ", -1)[0]
-                elfclass_str, soname, runpath, libs = data.split(";")
-                libs = set(libs.split(","))
-                return {
-                    'soname': soname,
-                    'class': elf_class_strtoint(elfclass_str),
-                    'runpath': runpath,
-                    'needed': libs,
-                }
-
-    raise FileNotFound("scanelf failure")
+        pool.join()
+    return outcome
 
 def read_elf_real_dynamic_libraries(elf_file):
     """
-    This function is similar to read_elf_dynamic_libraries but uses ldd to
-    retrieve a list of "real" .so library dependencies used by the ELF file.
+    This function is similar to read_elf_dynamic_libraries but also
+    retrieves, recursively, the NEEDED metadata of the resolved .so library
+    dependencies, returning the whole list of "real" .so libraries used
+    by the ELF file.
     This is useful to ensure that there are no .so libraries missing in the
-    dependencies, because ldd expands and resolves the .so dependency graph.
-    This is anyway dangerous because the output returned by ldd is somehow
+    dependencies, because the .so dependency graph gets expanded and resolved.
+    This is anyway dangerous because the resolution is somehow
     environment-dependent, so make sure this function is only used for
     informative purposes, and not for adding real dependencies to a package.
 
@@ -2812,51 +3031,38 @@ def read_elf_real_dynamic_libraries(elf_file):
     @type elf_file: string
     @return: list (set) of strings in NEEDED metadatum
     @rtype: set
-    @raise FileNotFound: if ldd is not found
+    @raise FileNotFound: if the ELF file cannot be read
     """
     # use the real path, so that it can be dropped from the resulting set
     elf_file = os.path.realpath(elf_file)
 
-    proc = None
-    output = None
-    args = ("/usr/bin/lddtree", "-l", elf_file)
-
-    try:
-        proc = subprocess.Popen(args, stdout = subprocess.PIPE)
-
-        output = const_convert_to_unicode("")
-
-        while True:
-
-            out = proc.stdout.read()
-            if not out:
-                break
-
-            if const_is_python3():
-                out = const_convert_to_unicode(out)
-            output += out
-
-        exit_st = proc.wait()
-        if exit_st != 0:
-            raise FileNotFound("lddtree returned error %d on %s" % (
-                exit_st, elf_file))
-
-    except (OSError, IOError) as err:
-        if err.errno != errno.ENOENT:
-            raise
-        raise FileNotFound("/usr/bin/lddtree not found")
+    outcome = set()
+    seen = set([elf_file])
+    elf_objects = collections.deque([elf_file])
+    resolve_cache = {}
 
-    finally:
-        if proc is not None:
-            proc.stdout.close()
+    while elf_objects:
+        elf_object = elf_objects.popleft()
+        try:
+            needed = read_elf_dynamic_libraries(elf_object)
+        except FileNotFound:
+            if elf_object == elf_file:
+                raise
+            continue
 
-    outcome = set()
-    if output is not None:
-        for line in output.split("\n"):
-            if line == elf_file:
+        for library in needed:
+            outcome.add(library)
+            cache_key = (library, elf_object)
+            library_path = resolve_cache.get(cache_key)
+            if cache_key not in resolve_cache:
+                library_path = resolve_dynamic_library(library, elf_object)
+                resolve_cache[cache_key] = library_path
+            if library_path is None:
                 continue
-            if line:
-                outcome.add(os.path.basename(line))
+            library_path = os.path.realpath(library_path)
+            if library_path not in seen:
+                seen.add(library_path)
+                elf_objects.append(library_path)
 
     return outcome
 
@@ -2925,42 +3131,19 @@ def read_elf_linker_paths(elf_file):
     @type elf_file: string
     @return: list of extracted built-in linker paths.
     @rtype: list
+    @raise FileNotFound: if the file cannot be read
     """
-    proc = None
-    args = ("/usr/bin/scanelf", "-qF", "%r", elf_file)
-    out = None
-
-    try:
-        proc = subprocess.Popen(args, stdout = subprocess.PIPE)
-        exit_st = proc.wait()
-        if exit_st != 0:
-            raise FileNotFound("scanelf error")
-
-        out = proc.stdout.read()
-
-    except (OSError, IOError) as err:
-        if err.errno != errno.ENOENT:
-            raise
-        raise FileNotFound("/usr/bin/scanelf not found")
-
-    finally:
-        if proc is not None:
-            proc.stdout.close()
+    metadata = _read_elf_dynamic_metadata_or_raise(elf_file)
+    if metadata is None:
+        return []
 
     outcome = []
-    if out is not None:
-
-        elf_dir = os.path.dirname(elf_file)
-        if const_is_python3():
-            out = const_convert_to_unicode(out)
-        for line in out.split("\n"):
-            if line:
-                paths = line.strip().split(" ", -1)[0].split(",")
-                for path in paths:
-                    path = path.replace("$ORIGIN", elf_dir)
-                    path = path.replace("${ORIGIN}", elf_dir)
-                    outcome.append(path)
-
+    elf_dir = os.path.dirname(elf_file)
+    for path in _elf_linker_path(metadata).split(":"):
+        if path:
+            path = path.replace("$ORIGIN", elf_dir)
+            path = path.replace("${ORIGIN}", elf_dir)
+            outcome.append(path)
     return outcome
 
 def xml_from_dict_extended(dictionary):
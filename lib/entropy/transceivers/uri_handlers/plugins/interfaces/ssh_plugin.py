@@ -35,6 +35,9 @@ class EntropySshUriHandler(EntropyUriHandler):
     _DEFAULT_PORT = 22
     _TXC_CMD = "/usr/bin/scp"
     _SSH_CMD = "/usr/bin/ssh"
+    # seconds the shared master connection survives once idle, this
+    # bounds the lifetime of masters whose handler is never close()d
+    _CONTROL_PERSIST = 300
 
     @staticmethod
     def approve_uri(uri):
@@ -62,6 +65,9 @@ class EntropySshUriHandler(EntropyUriHandler):
         self.__host = EntropySshUriHandler.get_uri_name(self._uri)
         self.__user, self.__port, self.__dir = self.__extract_scp_data(
             self._uri)
+        self.__control_dir = None
+        self.__control_path = None
+        self.__control_failed = False
 
     def __enter__(self):
         pass
@@ -184,8 +190,82 @@ class EntropySshUriHandler(EntropyUriHandler):
 
         return exec_rc, output, error
 
+    def _remote_host_str(self):
+        remote_str = ""
+        if self.__user:
+            remote_str += self.__user + "@"
+        remote_str += self.__host
+        return remote_str
+
+    def _control_cmd(self, command):
+        """
+        Send a control command ("check", "exit") to the master connection.
+        """
+        args = [EntropySshUriHandler._SSH_CMD,
+                "-o", "ControlPath=%s" % (self.__control_path,),
+                "-O", command, "-p", str(self.__port),
+                self._remote_host_str()]
+        return self._exec_cmd(args)[0]
+
+    def _start_master(self):
+        """
+        Spawn the OpenSSH master connection that every subsequent ssh and
+        scp call is multiplexed over, so that only the first operation
+        pays for the TCP and key exchange round trips. If the master
+        cannot be started, commands fall back to one connection each.
+        """
+        if self.__control_dir is None:
+            self.__control_dir = const_mkdtemp(
+                prefix="entropy.transceivers.ssh_ctl")
+        control_path = os.path.join(self.__control_dir, "ctl")
+        # a master killed by a signal leaves its socket behind, ssh -M
+        # would then disable multiplexing and stay in the background as
+        # a plain connection that cannot be told to exit.
+        try:
+            os.remove(control_path)
+        except OSError as err:
+            if err.errno != errno.ENOENT:
+                raise
+
+        args = [EntropySshUriHandler._SSH_CMD, "-M", "-N", "-f",
+                "-o", "ControlPath=%s" % (control_path,),
+                "-o", "ControlPersist=%d" % (
+                    EntropySshUriHandler._CONTROL_PERSIST,)]
+        if const_isnumber(self._timeout):
+            args += ["-o", "ConnectTimeout=%s" % (self._timeout,),
+                "-o", "ServerAliveCountMax=4", # hardcoded
+                "-o", "ServerAliveInterval=15"] # hardcoded
+        args += ["-p", str(self.__port), self._remote_host_str()]
+
+        # ssh -f returns once authenticated, leaving the master behind.
+        # It must not inherit our pty (see _fork_cmd) or stdout.
+        with open(os.devnull, "rb+") as null_f:
+            proc = self._subprocess.Popen(args, stdin = null_f,
+                stdout = null_f, stderr = null_f)
+            exec_rc = proc.wait()
+
+        const_debug_write(__name__,
+            "_start_master: %s, rc: %s" % (control_path, exec_rc,))
+        if exec_rc == os.EX_OK and os.path.exists(control_path):
+            self.__control_path = control_path
+        else:
+            self.__control_path = None
+        # do not retry on every command, keep_alive() will
+        self.__control_failed = self.__control_path is None
+
+    def _control_args(self):
+        """
+        Return the ssh/scp options that attach to the master connection,
+        starting it if needed.
+        """
+        if self.__control_path is None and not self.__control_failed:
+            self._start_master()
+        if self.__control_path is None:
+            return []
+        return ["-o", "ControlPath=%s" % (self.__control_path,)]
+
     def _setup_common_args(self, remote_path):
-        args = []
+        args = self._control_args()
         if const_isnumber(self._timeout):
             args += ["-o", "ConnectTimeout=%s" % (self._timeout,),
                 "-o", "ServerAliveCountMax=4", # hardcoded
@@ -193,10 +273,7 @@ class EntropySshUriHandler(EntropyUriHandler):
         if self._speed_limit:
             args += ["-l", str(self._speed_limit*8)] # scp wants kbits/sec
         remote_ptr = os.path.join(self.__dir, remote_path)
-        remote_str = ""
-        if self.__user:
-            remote_str += self.__user + "@"
-        remote_str += self.__host + ":" + remote_ptr
+        remote_str = self._remote_host_str() + ":" + remote_ptr
 
         return args, remote_str
 
@@ -334,13 +411,13 @@ class EntropySshUriHandler(EntropyUriHandler):
             if not upload_sts:
                 return False
 
-            # atomic rename
-            rename_fine = True
+            # atomic rename, all of them pipelined into one remote shell
+            rename_cmds = []
             for tmp_path, orig_path in tmp_file_map.items():
                 tmp_file = os.path.basename(tmp_path)
                 orig_file = os.path.basename(orig_path)
-                tmp_remote_path = os.path.join(remote_dir, tmp_file)
-                remote_path = os.path.join(remote_dir, orig_file)
+                remote_ptr_old = os.path.join(self.__dir, remote_dir, tmp_file)
+                remote_ptr_new = os.path.join(self.__dir, remote_dir, orig_file)
                 self.output(
                     "<-> %s %s %s" % (
                         brown(tmp_file),
@@ -350,9 +427,13 @@ class EntropySshUriHandler(EntropyUriHandler):
                     header = "    ",
                     back = True
                 )
-                rc = self.rename(tmp_remote_path, remote_path)
-                if not rc:
-                    rename_fine = False
+                rename_cmds.append("mv %s %s || rc=1;" % (
+                    remote_ptr_old, remote_ptr_new))
+
+            args, remote_str = self._setup_fs_args()
+            args += [remote_str, "rc=0; %s exit ${rc}" % (
+                    " ".join(rename_cmds),)]
+            rename_fine = self._exec_cmd(args)[0] == os.EX_OK
         finally:
             for path in tmp_file_map.keys():
                 do_rm(path)
@@ -360,12 +441,10 @@ class EntropySshUriHandler(EntropyUriHandler):
         return rename_fine
 
     def _setup_fs_args(self):
-        args = [EntropySshUriHandler._SSH_CMD, "-p", str(self.__port)]
-        remote_str = ""
-        if self.__user:
-            remote_str += self.__user + "@"
-        remote_str += self.__host
-        return args, remote_str
+        args = [EntropySshUriHandler._SSH_CMD]
+        args += self._control_args()
+        args += ["-p", str(self.__port)]
+        return args, self._remote_host_str()
 
     def rename(self, remote_path_old, remote_path_new):
         args, remote_str = self._setup_fs_args()
@@ -470,7 +549,17 @@ class EntropySshUriHandler(EntropyUriHandler):
         return exec_rc == os.EX_OK
 
     def keep_alive(self):
-        return
+        if self.__control_path is not None:
+            if self._control_cmd("check") == os.EX_OK:
+                return
+            const_debug_write(__name__,
+                "keep_alive: master connection is gone, restarting")
+        self._start_master()
 
     def close(self):
-        return
+        if self.__control_path is not None:
+            self._control_cmd("exit")
+            self.__control_path = None
+        if self.__control_dir is not None:
+            shutil.rmtree(self.__control_dir, True)
+            self.__control_dir = None